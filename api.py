@@ -1,13 +1,47 @@
-from fastapi import FastAPI
-from tasks import execute_macd_reverse_strategies
+import time
+import json
+import asyncio
+import logging
+from datetime import date
+from typing import Optional
 
+# the startup time is measured from here: the standard library modules above are already imported by uvicorn
+_import_start_time = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query  # noqa: E402
+from starlette.concurrency import run_in_threadpool  # noqa: E402
+from starlette.responses import StreamingResponse, Response  # noqa: E402
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST  # noqa: E402
+
+from tadawol.broker import app as celery_app  # noqa: E402
+from tadawol import progress  # noqa: E402
+
+# the api only enqueues tasks by name and reads stored results: pandas and the strategies are imported lazily by the
+# endpoints that need them
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+startup_seconds = None
+
+
+@app.on_event("startup")
+async def report_startup_time():
+    global startup_seconds
+    # wall-clock time from the import of the api module to the startup
+    startup_seconds = round(time.perf_counter() - _import_start_time, 3)
+    logger.info(f"Api is started in {startup_seconds}s")
+
 
 @app.get("/")
 async def root():
-    return {"status": "up"}
+    return {"status": "up", "startup_seconds": startup_seconds}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get("/macd_and_reverse")
@@ -15,8 +49,114 @@ async def macd_reverse(
         min_top_ticker: int = 0,
         max_top_ticker: int = 500
 ):
-    execute_macd_reverse_strategies.delay(
-        min_top_ticker=min_top_ticker,
-        max_top_ticker=max_top_ticker,
+    celery_app.send_task(
+        "tasks.execute_macd_reverse_strategies",
+        kwargs={"min_top_ticker": min_top_ticker, "max_top_ticker": max_top_ticker},
     )
     return {"message": "Strategies will be executed, results will be sent by email !"}
+
+
+@app.get("/signals/send")
+async def send_signals():
+    celery_app.send_task("tasks.send_precomputed_signals")
+    return {"message": "Precomputed signals will be sent by email !"}
+
+
+@app.get("/signals/{strategy_name}")
+async def precomputed_signals(strategy_name: str):
+    from tadawol import signals
+
+    computation_date = signals.get_computation_date(strategy_name)
+    if computation_date is None:
+        raise HTTPException(status_code=404, detail=f"No precomputed signals for {strategy_name}")
+
+    entries, exits = signals.get_signals(strategy_name)
+    return {
+        "computed_at": computation_date.isoformat(),
+        "entries": json.loads(entries.to_json(orient="records", date_format="iso")),
+        "exits": json.loads(exits.to_json(orient="records", date_format="iso")),
+    }
+
+
+@app.get("/progress")
+async def progress_jobs():
+    progress.delete_expired_jobs()
+    return {
+        "jobs": [{"job_id": job_id, "last_event": progress.get_last_event(job_id)} for job_id in progress.get_jobs()]
+    }
+
+
+@app.get("/progress/{job_id}/events")
+async def progress_events(job_id: str, poll_seconds: float = 1):
+    if job_id not in progress.get_jobs():
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+
+    async def stream():
+        offset = 0
+        while True:
+            events, offset = progress.read_events(job_id, offset)
+            for event in events:
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+                if event["event"] == "end":
+                    return
+            await asyncio.sleep(poll_seconds)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+async def _run_query(function, *args):
+    # pandas work is done in the thread pool, to keep the event loop free
+    from tadawol.queries import NotFoundError
+
+    try:
+        return await run_in_threadpool(function, *args)
+    except NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.get("/tickers")
+async def tickers():
+    from tadawol import queries
+
+    return {"tickers": await _run_query(queries.get_tickers)}
+
+
+@app.get("/bars/{ticker}")
+async def bars(
+        ticker: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(500, ge=1, le=5000)
+):
+    from tadawol import queries
+
+    return await _run_query(queries.get_bars_page, ticker, start, end, offset, limit)
+
+
+@app.get("/indicators/{strategy_name}/{ticker}")
+async def indicators(
+        strategy_name: str,
+        ticker: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(500, ge=1, le=5000)
+):
+    from tadawol import queries
+
+    return await _run_query(queries.get_indicators_page, strategy_name, ticker, start, end, offset, limit)
+
+
+@app.get("/signals/{strategy_name}/{ticker}")
+async def ticker_signals(
+        strategy_name: str,
+        ticker: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(500, ge=1, le=5000)
+):
+    from tadawol import queries
+
+    return await _run_query(queries.get_signals_page, strategy_name, ticker, start, end, offset, limit)
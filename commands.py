@@ -1,8 +1,9 @@
-from tadawol.history import update_data, check_data as check_history_data, update_tickers_from_scratch
+from tadawol.history import update_data, check_data as check_history_data, repair_history
 from tadawol.earnings import update_data as update_earnings, check_data as check_earnings_data
 from tadawol.strategies.base_strategy import get_best_config
 from tadawol.strategies.reverse import Reverse
 from tadawol.strategies.macd import MACD
+from tadawol import benchmark, grid_runs, universe, positions
 import click
 
 
@@ -11,9 +12,17 @@ def cli():
     pass
 
 
-@cli.command("update_history")
-def update():
-    update_tickers_from_scratch()
+@cli.command("repair_history")
+@click.option("--ticker", "tickers", multiple=True, help="Ticker to repair, the top tickers by default")
+@click.option("--workers", default=8, help="Number of concurrent fetches")
+@click.option("--max-gap-days", default=5, help="Holes of more than this number of days are fetched again")
+@click.option("--dry-run", is_flag=True, help="Only print the gaps")
+def repair(tickers, workers, max_gap_days, dry_run):
+    result = repair_history(list(tickers) or None, workers, max_gap_days, dry_run)
+    for gap in result["gaps"]:
+        print(f"{gap.ticker}: {gap.reason} from {gap.start_date.date()} to {gap.end_date.date()}")
+    if not dry_run:
+        print(f"{result['added_rows']} rows are added, {len(result['failed_gaps'])} gaps failed")
 
 
 @cli.command("update_earnings")
@@ -40,11 +49,96 @@ def check(ticker):
 
 @cli.command("run_grid")
 @click.argument("strategy", type=click.Choice(['MACD', 'Reverse'], case_sensitive=False))
-def check(strategy):
+@click.option("--profile", is_flag=True, help="Profile the backtest stages")
+@click.option("--profile-output", default="profile.json", help="Path of the json profile report")
+@click.option("--distributed", is_flag=True, help="Evaluate the combinations on the celery workers")
+@click.option("--resume", "run_id", default=None, help="Id of the grid run to resume, with its sampling")
+@click.option("--sampling", type=click.Choice(["random", "lhs"]), default=None, help="Evaluate a sample of the grid")
+@click.option("--budget", default=None, type=int, help="Number of combinations of the sample")
+@click.option("--seed", default=None, type=int, help="Seed of the sample, 0 by default")
+@click.option("--universe", "universe_snapshot", default=None, help="Universe snapshot to take the tickers from")
+def check(strategy, profile, profile_output, distributed, run_id, sampling, budget, seed, universe_snapshot):
+    if distributed:
+        from tasks import run_distributed_grid
+        run_distributed_grid(
+            strategy, run_id=run_id, sampling=sampling, budget=budget, seed=seed, universe_snapshot=universe_snapshot
+        )
+        return
+
     if strategy == "MACD":
         strategy = MACD
 
     if strategy == "Reverse":
         strategy = Reverse
 
-    get_best_config(strategy)
+    get_best_config(
+        strategy, profile_path=profile_output if profile else None, run_id=run_id, sampling=sampling, budget=budget,
+        seed=seed, universe_snapshot=universe_snapshot
+    )
+
+
+@cli.command("grid_leaderboard")
+@click.argument("run_id", required=False)
+@click.option("--top", default=20, help="Number of combinations to show")
+def grid_leaderboard(run_id, top):
+    if run_id is None:
+        print("Grid runs: ")
+        for run in grid_runs.get_runs():
+            print(run)
+        return
+
+    print(grid_runs.get_leaderboard(run_id, top).to_string())
+
+
+@cli.command("universe_snapshot")
+@click.option("--list", "list_snapshots", is_flag=True, help="Only list the saved snapshots")
+def universe_snapshot(list_snapshots):
+    if not list_snapshots:
+        print(f"Universe snapshot: {universe.save_snapshot()}")
+        return
+    for snapshot in universe.get_snapshots():
+        print(snapshot)
+
+
+@cli.command("reset_positions")
+@click.argument("strategy", type=click.Choice(['MACD', 'Reverse'], case_sensitive=False))
+def reset_positions(strategy):
+    """
+    Deletes the open positions book of a strategy, it is rebuilt from the simulated trades by the next live run.
+    """
+    positions.delete_positions(strategy)
+
+
+@cli.command("benchmark")
+@click.option("--tickers", default=50, help="Number of synthetic tickers")
+@click.option("--years", default=3, help="Number of years of synthetic history")
+@click.option("--seed", default=0)
+@click.option("--output", default="benchmark.json", help="Path of the json report")
+@click.option("--baseline", default=None, help="Report to compare with, to flag regressions")
+@click.option("--tolerance", default=0.2, help="Allowed relative slowdown against the baseline")
+def run_benchmark(tickers, years, seed, output, baseline, tolerance):
+    report = benchmark.run_benchmarks(tickers, years, seed)
+    benchmark.save_report(report, output)
+
+    for name, result in report["benchmarks"].items():
+        print(f"{name}: {result['wall_seconds']}s, {result['throughput']} {result['throughput_unit']}, "
+              f"memory peak = {result['memory_peak_bytes']} bytes")
+
+    if baseline is not None:
+        regressions = benchmark.get_regressions(report, benchmark.load_report(baseline), tolerance)
+        if len(regressions) > 0:
+            raise click.ClickException("Regressions found:\n" + "\n".join(regressions))
+        print("No regression against the baseline")
+
+
+@cli.command("ingestion_benchmark")
+@click.option("--tickers", default=100, help="Number of top tickers to fetch")
+@click.option("--past-days", default=90, help="Number of days of history to fetch per ticker")
+@click.option("--output", default="ingestion_benchmark.json", help="Path of the json report")
+def run_ingestion_benchmark(tickers, past_days, output):
+    report = benchmark.run_ingestion_benchmark(tickers, past_days)
+    benchmark.save_report(report, output)
+
+    result = report["benchmarks"]["history.get_fresh_data"]
+    print(f"{result['wall_seconds']}s, {result['throughput']} {result['throughput_unit']}, {report['rows']} rows")
+    print(f"Requests: {report['requests']}")
@@ -0,0 +1,213 @@
+import os
+import json
+import tempfile
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from tadawol import history, stats, earnings, replay
+from tadawol.config import FetchReplayConfig
+from tadawol.panel import TickerPanel
+from tadawol.profiler import StageProfiler
+from tadawol.simulator import simulate_trades
+from tadawol.synthetic import get_synthetic_data
+from tadawol.utils import get_last_week_entries, clean_results
+from tadawol.search_space import SearchSpace
+from tadawol.strategies.macd import MACD
+from tadawol.strategies.reverse import Reverse
+from tadawol.strategies.earnings import Earnings
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+INDICATORS = {
+    "add_ema": lambda df: stats.add_ema(df, window=12),
+    "add_sma": lambda df: stats.add_sma(df, window=12),
+    "add_max": lambda df: stats.add_max(df, window=12),
+    "add_atr": lambda df: stats.add_atr(df),
+    "add_macd": lambda df: stats.add_macd(df),
+    "add_rsi": lambda df: stats.add_rsi(df),
+    "add_bollinger_bands": lambda df: stats.add_bollinger_bands(df),
+}
+
+GRID = [
+    [9, 12],
+    [26],
+    [9],
+    [5],
+    [8],
+    [15],
+    [10],
+]
+
+
+class _BenchmarkRunner:
+
+    def __init__(self):
+        self.profiler = StageProfiler()
+        self.results: Dict[str, Dict[str, Any]] = dict()
+
+    def run(self, name: str, items_number: int, unit: str, function: Callable[[], Any]) -> Any:
+        logger.info(f"[Benchmark] Running {name} ...")
+        with self.profiler.stage(name):
+            result = function()
+        record = self.profiler.stages[name]
+        self.results[name] = {
+            "wall_seconds": round(record["wall_seconds"], 4),
+            "cpu_seconds": round(record["cpu_seconds"], 4),
+            "memory_peak_bytes": record["memory_peak_bytes"],
+            "items": items_number,
+            "throughput": round(items_number / max(record["wall_seconds"], 1e-9), 2),
+            "throughput_unit": f"{unit}/sec",
+        }
+        return result
+
+
+def _load_history(history_df: pd.DataFrame) -> pd.DataFrame:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.csv")
+        history_df.to_csv(path, index=False)
+        original_path = history.STOCKS_HISTORY_PATH
+        history.STOCKS_HISTORY_PATH = path
+        history._history_cache.clear()
+        try:
+            return history.get_historical_data()
+        finally:
+            history.STOCKS_HISTORY_PATH = original_path
+            history._history_cache.clear()
+
+
+def _get_ticker_frames(df: pd.DataFrame) -> List[pd.DataFrame]:
+    return [ticker_data for _, ticker_data in TickerPanel.from_frame(df).iter_frames()]
+
+
+def _get_entries(exits: List[pd.DataFrame]) -> pd.DataFrame:
+    df = pd.concat(exits, axis=0)
+    df = df[df["entry"]]
+    df.loc[:, "win_percent"] = 100 * (df["exit_price"] - df["Close"]) / df["Close"]
+    return clean_results(df)
+
+
+def _run_grid(df: pd.DataFrame):
+    results = []
+    for combination in SearchSpace(GRID, MACD.is_valid_combination):
+        trades = MACD(*combination)._get_trades(df)
+        trades = trades[trades["exit_price"].notna()]
+        results.append(simulate_trades(trades)[0])
+    return results
+
+
+def run_benchmarks(tickers_number: int, years_number: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Runs the benchmark suite offline, on synthetic data, and returns a json serializable report.
+    """
+    history_df, earnings_df = get_synthetic_data(tickers_number, years_number, seed)
+    rows_number = history_df.shape[0]
+    runner = _BenchmarkRunner()
+
+    df = runner.run("load_history", rows_number, "rows", lambda: _load_history(history_df))
+    ticker_frames = _get_ticker_frames(df)
+
+    for indicator, function in INDICATORS.items():
+        runner.run(f"stats.{indicator}", rows_number, "rows", lambda: [function(f) for f in ticker_frames])
+    ticker_frames = _get_ticker_frames(df)
+
+    strategies = [MACD(), Reverse(), Earnings(earnings_df=earnings_df)]
+    entries_by_strategy = dict()
+    for strategy in strategies:
+        entries_by_strategy[strategy.name] = runner.run(
+            f"{strategy.name}.add_entries_for_ticker",
+            rows_number,
+            "rows",
+            lambda: [strategy.add_entries_for_ticker(f) for f in ticker_frames]
+        )
+
+    macd = strategies[0]
+    runner.run(
+        "get_lean_exit_prices_for_ticker",
+        rows_number,
+        "rows",
+        lambda: [macd.get_lean_exit_prices_for_ticker(f) for f in entries_by_strategy[macd.name]]
+    )
+    exits = runner.run(
+        "get_exit_prices_for_ticker",
+        rows_number,
+        "rows",
+        lambda: [macd.get_exit_prices_for_ticker(f) for f in entries_by_strategy[macd.name]]
+    )
+    entries = _get_entries(exits)
+    trades = runner.run("get_last_week_entries", entries.shape[0], "entries", lambda: get_last_week_entries(entries))
+    trades = trades[trades["exit_price"].notna()]
+    runner.run("simulate_trades", trades.shape[0], "trades", lambda: simulate_trades(trades))
+
+    runner.run(
+        "earnings.get_earnings_data_on_all_dates",
+        rows_number,
+        "rows",
+        lambda: earnings.get_earnings_data_on_all_dates(df, earnings_df)
+    )
+    runner.run("grid_search", len(GRID[0]) * tickers_number, "tickers", lambda: _run_grid(df))
+
+    return {
+        "config": {"tickers_number": tickers_number, "years_number": years_number, "seed": seed, "rows": rows_number},
+        "benchmarks": runner.results,
+    }
+
+
+def run_ingestion_benchmark(tickers_number: int, past_days: int = 90) -> Dict[str, Any]:
+    """
+    Measures the tickers fetching throughput against recorded yahoo responses, with the latency, error rate
+    and throttling of the fetch_replay_ settings.
+    """
+    config = FetchReplayConfig()
+    if config.mode != "replay":
+        raise ValueError("The ingestion benchmark runs on recorded responses only, set fetch_replay_mode=replay")
+
+    session = replay.wrap_session(None, config)
+    history._yahoo_client = history.YahooHistoryClient(session=session)
+    tickers = history.get_top_tickers(0, tickers_number - 1)
+    runner = _BenchmarkRunner()
+    try:
+        df = runner.run(
+            "history.get_fresh_data", len(tickers), "tickers", lambda: history.get_fresh_data(tickers, past_days)
+        )
+    finally:
+        history._yahoo_client = None
+
+    return {
+        "config": {**config.dict(), "tickers_number": tickers_number, "past_days": past_days},
+        "benchmarks": runner.results,
+        "rows": df.shape[0],
+        "requests": session.counts,
+    }
+
+
+def save_report(report: Dict[str, Any], path: str):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def get_regressions(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2) -> List[str]:
+    """
+    Returns a message for each benchmark that is slower, or uses more memory, than the baseline by more than
+    the given tolerance.
+    """
+    if report["config"] != baseline["config"]:
+        raise ValueError(f"Benchmark config {report['config']} differs from baseline config {baseline['config']}")
+
+    regressions = []
+    for name, result in report["benchmarks"].items():
+        baseline_result: Optional[Dict[str, Any]] = baseline["benchmarks"].get(name)
+        if baseline_result is None:
+            continue
+        for metric in ["wall_seconds", "memory_peak_bytes"]:
+            if result[metric] > (1 + tolerance) * baseline_result[metric]:
+                regressions.append(f"{name}: {metric} = {result[metric]} against {baseline_result[metric]} in baseline")
+    return regressions
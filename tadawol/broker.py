@@ -0,0 +1,18 @@
+import time
+
+from celery import Celery
+from celery.signals import before_task_publish
+
+from tadawol.config import BrokerConfig, ResultBackendConfig
+
+
+# Celery client shared by the workers (tasks.py) and the api. It does not import any task module, so that the api
+# can enqueue tasks by name without loading pandas and the strategies.
+app = Celery("tasks", broker=BrokerConfig().url, backend=ResultBackendConfig().url)
+
+
+@before_task_publish.connect
+def add_publication_time(headers=None, **kwargs):
+    # read by the workers to measure the queue wait
+    if headers is not None:
+        headers["published_at"] = time.time()
@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from tadawol.config import TradesCacheConfig
+from tadawol.history import DATA_PATH
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+TRADES_CACHE_PATH = os.path.join(DATA_PATH, "cache", "trades")
+
+
+def get_data_version(df: pd.DataFrame) -> str:
+    hasher = hashlib.sha1()
+    hasher.update(json.dumps([str(c) for c in df.columns]).encode())
+    hasher.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return hasher.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def get_code_version(modules_names: Tuple[str, ...]) -> str:
+    """
+    Hash of the source files of the given imported modules: the trades cached before a change of the code that
+    computes them are not used anymore. The files do not change while the process runs, they are hashed once.
+    """
+    hasher = hashlib.sha1()
+    for module_name in sorted(modules_names):
+        with open(sys.modules[module_name].__file__, "rb") as f:
+            hasher.update(f.read())
+    return hasher.hexdigest()
+
+
+def get_trades_key(
+        strategy_name: str,
+        parameters: Dict[str, Any],
+        tickers: List[str],
+        data_version: str,
+        code_version: str
+) -> str:
+    key = json.dumps(
+        {
+            "strategy": strategy_name,
+            "parameters": parameters,
+            "tickers": sorted(tickers),
+            "data_version": data_version,
+            "code_version": code_version,
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class TradesCache:
+    """
+    Trades frames stored on disk, one pickle file per key. When the cache is bigger than its maximum size, the least
+    recently used files are evicted.
+    """
+
+    def __init__(self, directory: str = TRADES_CACHE_PATH, max_size_bytes: Optional[int] = None):
+        if max_size_bytes is None:
+            max_size_bytes = TradesCacheConfig().max_size_mb * 1024 * 1024
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        path = self._get_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_pickle(path)
+        except Exception:
+            logger.warning(f"[Cache] Corrupted entry {key} is removed")
+            os.remove(path)
+            return None
+        # the modification time is used as last access time by the eviction
+        os.utime(path)
+        return df
+
+    def set(self, key: str, df: pd.DataFrame):
+        os.makedirs(self.directory, exist_ok=True)
+        temporary_path = self._get_path(key) + ".tmp"
+        df.to_pickle(temporary_path)
+        os.replace(temporary_path, self._get_path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.directory, file_name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        size = sum(e[1] for e in entries)
+        for _, file_size, path in sorted(entries):
+            if size <= self.max_size_bytes:
+                break
+            os.remove(path)
+            size -= file_size
+            logger.info(f"[Cache] {path} is evicted")
+
+    def clear(self):
+        if not os.path.exists(self.directory):
+            return
+        for file_name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, file_name))
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseSettings
 
 
@@ -19,3 +21,89 @@ class BrokerConfig(BaseSettings):
     class Config:
         allow_mutation = False
         env_prefix = "amqp_"
+
+
+class ResultBackendConfig(BaseSettings):
+
+    url: Optional[str] = None
+
+    class Config:
+        allow_mutation = False
+        env_prefix = "result_backend_"
+
+
+class MetricsConfig(BaseSettings):
+
+    worker_port: int = 9100
+
+    class Config:
+        allow_mutation = False
+        env_prefix = "metrics_"
+
+
+class TradesCacheConfig(BaseSettings):
+
+    max_size_mb: int = 1024
+
+    class Config:
+        allow_mutation = False
+        env_prefix = "trades_cache_"
+
+
+class ProgressConfig(BaseSettings):
+
+    # the events of a finished job are deleted once they are older
+    retention_hours: float = 24
+
+    class Config:
+        allow_mutation = False
+        env_prefix = "progress_"
+
+
+class UniverseFilterConfig(BaseSettings):
+
+    min_close: float = 2
+    min_volume: float = 100000
+
+    class Config:
+        allow_mutation = False
+        env_prefix = "universe_"
+
+
+class SimulationConfig(BaseSettings):
+
+    # processes computing the tickers of the daily signals in parallel, None to compute them in the worker process.
+    # The prefork pool children can not start processes: the worker must use the solo or threads pool.
+    processes: Optional[int] = None
+
+    class Config:
+        allow_mutation = False
+        env_prefix = "simulation_"
+
+
+class YahooConfig(BaseSettings):
+
+    quote_url: str = "https://finance.yahoo.com/quote"
+    download_url: str = "https://query1.finance.yahoo.com/v7/finance/download"
+    pool_size: int = 10
+    timeout_seconds: float = 30
+    retries: int = 2
+    retry_backoff_seconds: float = 1
+
+    class Config:
+        allow_mutation = False
+        env_prefix = "yahoo_"
+
+
+class FetchReplayConfig(BaseSettings):
+
+    mode: Optional[str] = None
+    directory: str = "tadawol/data/fetch_records"
+    latency_seconds: float = 0
+    error_rate: float = 0
+    max_requests_per_second: Optional[float] = None
+    seed: int = 0
+
+    class Config:
+        allow_mutation = False
+        env_prefix = "fetch_replay_"
@@ -1,12 +1,18 @@
 import os
+import json
 from datetime import datetime, timedelta
 import time
 import logging
-from typing import Optional
+from typing import Optional, Dict, Any
 from yahoo_earnings_calendar import YahooEarningsCalendar
+import numpy as np
 import pandas as pd
+import requests
 
+from tadawol import replay
+from tadawol.config import FetchReplayConfig
 from tadawol.history import get_tickers
+from tadawol.panel import TickerPanel
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -25,11 +31,31 @@ def get_latest_data():
     return data["Date"].max()
 
 
+class EarningsCalendarClient(YahooEarningsCalendar):
+    """
+    Earnings calendar sending its requests through a given session, so they can be recorded or replayed.
+    """
+
+    def __init__(self, session=None, delay: float = 1):
+        super().__init__(delay=delay)
+        self.session = session if session is not None else replay.wrap_session(requests.Session())
+
+    def _get_data_dict(self, url):
+        time.sleep(self.delay)
+        page = self.session.get(url)
+        page.raise_for_status()
+        page_content = page.content.decode(encoding='utf-8', errors='strict')
+        page_data_string = [row for row in page_content.split('\n') if row.startswith('root.App.main = ')][0][:-1]
+        return json.loads(page_data_string.split('root.App.main = ', 1)[1])
+
+
 def update_data():
     latest_date = get_latest_data()
     on_date = latest_date + timedelta(days=1)
     on_date = datetime(on_date.year, on_date.month, on_date.day)
-    yec = YahooEarningsCalendar(delay=1)
+    # no need to be polite with recorded responses
+    delay = 0 if FetchReplayConfig().mode == "replay" else 1
+    yec = EarningsCalendarClient(delay=delay)
     while on_date <= datetime.utcnow() - timedelta(days=1):
         logger.info(f"[Earnings] Add data on {on_date}")
         data = yec.earnings_on(on_date)
@@ -37,37 +63,47 @@ def update_data():
         df.to_csv(CRUDE_EARNINGS_DATA_PATH, mode='a', header=False)
 
         on_date += timedelta(days=1)
-        time.sleep(1)
+        time.sleep(delay)
 
 
-def get_earnings_df():
-    df = pd.read_csv(CRUDE_EARNINGS_DATA_PATH)
-    df.loc[:, "Date"] = pd.to_datetime(df['startdatetime'], format="%Y-%m-%d").\
-        map(lambda x: datetime(x.year, x.month, x.day))
-    df.dropna(how="any", inplace=True)
-    df.drop_duplicates(subset=["ticker", "Date", "epsestimate", "epsactual", "epssurprisepct"], keep="first", inplace=True)
-    return df
+# earnings index of the current process, reloaded only when the earnings file changes
+_earnings_cache: Dict[str, Any] = {}
 
 
-def get_earnings_data_on_all_dates(reference_df: pd.DataFrame):
+def get_earnings_df():
+    modification_time = os.path.getmtime(CRUDE_EARNINGS_DATA_PATH)
+    if _earnings_cache.get("modification_time") != modification_time:
+        df = pd.read_csv(CRUDE_EARNINGS_DATA_PATH)
+        df.loc[:, "Date"] = pd.to_datetime(df['startdatetime'], format="%Y-%m-%d").\
+            map(lambda x: datetime(x.year, x.month, x.day))
+        df.dropna(how="any", inplace=True)
+        df.drop_duplicates(
+            subset=["ticker", "Date", "epsestimate", "epsactual", "epssurprisepct"], keep="first", inplace=True
+        )
+        _earnings_cache["modification_time"] = modification_time
+        _earnings_cache["data"] = df
+
+    return _earnings_cache["data"].copy()
+
+
+def get_earnings_data_on_all_dates(reference_df: pd.DataFrame, earnings_df: Optional[pd.DataFrame] = None):
     reference_df = reference_df.copy(deep=True)
     reference_df.loc[:, "Date"] = pd.to_datetime(reference_df['Date'])
     assert "Ticker" in reference_df.columns
     assert "Date" in reference_df.columns
 
-    earnings_df = get_earnings_df()
+    if earnings_df is None:
+        earnings_df = get_earnings_df()
     data = []
-    tickers_number = reference_df["Ticker"].nunique()
+    reference_panel = TickerPanel.from_frame(reference_df[["Ticker", "Date"]])
+    tickers_number = len(reference_panel.tickers)
     logger.info(f"Tickers number = {tickers_number}")
     treated_tickers_number = 0
-    for ticker, ticker_earnings in earnings_df.groupby(["ticker"]):
-        ticker_reference_data = reference_df[reference_df["Ticker"] == ticker]
-        if ticker_reference_data.shape[0] == 0:
+    for ticker, ticker_earnings in TickerPanel.from_frame(earnings_df, ticker_column="ticker").iter_frames():
+        if ticker not in reference_panel:
             continue
 
-        ticker_dates = [pd.to_datetime(d) for d in ticker_reference_data["Date"].unique()]
-        ticker_earnings = ticker_earnings.sort_values(by="Date", ascending=True)
-        ticker_earnings.reset_index(drop=True, inplace=True)
+        ticker_dates = set(pd.to_datetime(reference_panel.get_column(ticker, "Date")))
         ticker_earnings.loc[:, "last_date"] = ticker_earnings["Date"].shift(1)
         ticker_earnings.loc[:, "next_date"] = ticker_earnings["Date"].shift(-1)
 
@@ -122,6 +158,32 @@ def get_earnings_data_on_all_dates(reference_df: pd.DataFrame):
     return res_df
 
 
+def get_latest_surprises(reference_df: pd.DataFrame, surprises_df: pd.DataFrame, max_age_days: int) -> np.ndarray:
+    """
+    Surprise of the latest earnings published strictly before the date of each row of reference_df, for all the tickers
+    in a single as-of join. Earnings older than max_age_days days are stale: NaN is returned for them.
+    :param surprises_df: Ticker, Date and epssurprisepct of the earnings with a surprise, sorted by date
+    """
+    rows = pd.DataFrame({
+        "Ticker": reference_df["Ticker"].to_numpy(),
+        "Date": pd.to_datetime(reference_df["Date"]).to_numpy(),
+        "position": np.arange(reference_df.shape[0]),
+    })
+    rows.sort_values(by="Date", kind="mergesort", inplace=True)
+    aligned = pd.merge_asof(
+        rows,
+        surprises_df[["Ticker", "Date", "epssurprisepct"]],
+        on="Date",
+        by="Ticker",
+        allow_exact_matches=False,
+        tolerance=pd.Timedelta(days=max_age_days)
+    )
+
+    surprises = np.empty(reference_df.shape[0])
+    surprises[aligned["position"].to_numpy()] = aligned["epssurprisepct"].to_numpy(dtype=float)
+    return surprises
+
+
 def check_data(ticker: Optional[str] = None):
 
     df = get_earnings_df()
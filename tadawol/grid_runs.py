@@ -0,0 +1,97 @@
+import os
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+DATA_PATH = os.path.join(os.getcwd(), 'tadawol/data')
+GRID_RUNS_DATA_PATH = os.path.join(DATA_PATH, "grid_runs")
+
+
+def _get_path(run_id: str) -> str:
+    return os.path.join(GRID_RUNS_DATA_PATH, f"{run_id}.jsonl")
+
+
+def _get_metadata_path(run_id: str) -> str:
+    return os.path.join(GRID_RUNS_DATA_PATH, f"{run_id}.json")
+
+
+def get_runs() -> List[str]:
+    if not os.path.exists(GRID_RUNS_DATA_PATH):
+        return []
+    return sorted(f[:-len(".jsonl")] for f in os.listdir(GRID_RUNS_DATA_PATH) if f.endswith(".jsonl"))
+
+
+def save_result(run_id: str, result: Dict[str, Any]):
+    os.makedirs(GRID_RUNS_DATA_PATH, exist_ok=True)
+    with open(_get_path(run_id), "a") as f:
+        f.write(json.dumps(result) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def load_results(run_id: str) -> List[Dict[str, Any]]:
+    path = _get_path(run_id)
+    if not os.path.exists(path):
+        return []
+
+    results = []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                # last line of a run killed while writing
+                logger.warning(f"[Grid] Ignoring a corrupted result in run {run_id}")
+    return results
+
+
+def save_metadata(run_id: str, metadata: Dict[str, Any]):
+    """
+    Saves the settings a run is started with, e.g. its sampling, to resume it with the same ones.
+    """
+    os.makedirs(GRID_RUNS_DATA_PATH, exist_ok=True)
+    path = _get_metadata_path(run_id)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(metadata, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def get_metadata(run_id: str) -> Optional[Dict[str, Any]]:
+    path = _get_metadata_path(run_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def get_universe_snapshot(run_id: str) -> Optional[str]:
+    """
+    Universe snapshot the run is pinned to: the one it is started with, else the one of its results for the runs started
+    without it.
+    """
+    metadata = get_metadata(run_id)
+    if metadata is not None and metadata.get("universe_snapshot") is not None:
+        return metadata["universe_snapshot"]
+    for result in load_results(run_id):
+        return result.get("universe_snapshot")
+    return None
+
+
+def get_leaderboard(run_id: str, top: Optional[int] = None) -> pd.DataFrame:
+    results = load_results(run_id)
+    if len(results) == 0:
+        raise ValueError(f"No result for grid run {run_id}")
+
+    df = pd.DataFrame(results)
+    df.loc[:, "combination"] = df["combination"].map(tuple)
+    df.sort_values(by=["win", "win_percent"], ascending=False, inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    if top is not None:
+        df = df.head(top)
+    return df
@@ -1,11 +1,23 @@
-from typing import Set, Dict, Optional, List
+from typing import Set, Dict, Optional, List, Any, Iterator, Union, NamedTuple, Tuple
 import os
+import re
 import time
-from datetime import datetime, timedelta
+import calendar
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, date
 import logging
 
-from yahoo_historical.fetch import Fetcher
+import numpy as np
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from tadawol import metrics, replay
+from tadawol.panel import TickerPanel
+from tadawol.universe import get_catalog
+from tadawol.config import YahooConfig
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -14,48 +26,251 @@ logger.setLevel(logging.DEBUG)
 DEFAULT_START_DATE = datetime(2015, 1, 1)
 DATA_PATH = os.path.join(os.getcwd(), 'tadawol/data')
 
-TICKERS_LIST_PATH = os.path.join(DATA_PATH, "tickers_list.csv")
 STOCKS_HISTORY_PATH = os.path.join(DATA_PATH, "history.csv")
+# first date of the tickers listed after DEFAULT_START_DATE, found by the history repairs
+HISTORY_FIRST_DATES_PATH = os.path.join(DATA_PATH, "history_first_dates.csv")
+# last date of the tickers without bars after it (delisted or halted) and ranges without bars, found by the repairs
+HISTORY_LAST_DATES_PATH = os.path.join(DATA_PATH, "history_last_dates.csv")
+HISTORY_EMPTY_RANGES_PATH = os.path.join(DATA_PATH, "history_empty_ranges.csv")
+
+
+CRUMB_PATTERN = re.compile(r'"CrumbStore":\{"crumb":"(?P<crumb>[^"]+)"\}')
+RETRIED_STATUS_CODES = {429, 500, 502, 503, 504}
+YAHOO_HISTORY_COLUMNS = ["Date", "Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+def get_pooled_session(config: YahooConfig) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=config.pool_size, pool_maxsize=config.pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class YahooHistoryClient:
+    """
+    Fetches tickers history from yahoo with a single keep-alive session: the cookie/crumb handshake is done once
+    and reused across tickers, it is only renewed when yahoo rejects it.
+    """
+
+    def __init__(self, config: Optional[YahooConfig] = None, session=None):
+        self.config = config or YahooConfig()
+        self.session = session if session is not None else replay.wrap_session(get_pooled_session(self.config))
+        self.crumb: Optional[str] = None
+        self._crumb_lock = threading.Lock()
+
+    def _get(self, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a GET request, retried with an exponential backoff on throttling, server and connection errors.
+        """
+        for attempt in range(self.config.retries + 1):
+            if attempt > 0:
+                metrics.YAHOO_REQUEST_RETRIES.labels(endpoint).inc()
+                time.sleep(self.config.retry_backoff_seconds * 2 ** (attempt - 1))
+            try:
+                with metrics.YAHOO_REQUEST_SECONDS.labels(endpoint).time():
+                    response = self.session.get(url, timeout=self.config.timeout_seconds, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.config.retries:
+                    raise
+                continue
+            if response.status_code not in RETRIED_STATUS_CODES:
+                break
+        return response
+
+    def refresh_crumb(self, ticker: str, rejected_crumb: Optional[str] = None) -> str:
+        """
+        Does the cookie/crumb handshake, unless another thread already replaced the rejected crumb.
+        The cookie is kept by the session.
+        """
+        with self._crumb_lock:
+            if self.crumb is not None and self.crumb != rejected_crumb:
+                return self.crumb
+            response = self._get("quote", f"{self.config.quote_url}/{ticker}/history")
+            response.raise_for_status()
+            match = CRUMB_PATTERN.search(response.text)
+            if match is None:
+                raise ValueError(f"No crumb found in yahoo response for {ticker}")
+            self.crumb = match.group("crumb").replace("\\u002F", "/")
+            metrics.YAHOO_CRUMB_REFRESHES.inc()
+            logger.debug("Yahoo crumb is refreshed")
+            return self.crumb
+
+    def get_history(
+            self,
+            ticker: str,
+            start_date: Union[datetime, date],
+            end_date: Union[datetime, date]
+    ) -> pd.DataFrame:
+        ticker = ticker.upper()
+        crumb = self.crumb or self.refresh_crumb(ticker)
+        params = {
+            "period1": calendar.timegm(datetime(start_date.year, start_date.month, start_date.day).timetuple()),
+            "period2": calendar.timegm(datetime(end_date.year, end_date.month, end_date.day).timetuple()),
+            "interval": "1d",
+            "events": "history",
+        }
+        url = f"{self.config.download_url}/{ticker}"
+        response = self._get("download", url, params={**params, "crumb": crumb})
+        if response.status_code in (401, 403):
+            crumb = self.refresh_crumb(ticker, rejected_crumb=crumb)
+            response = self._get("download", url, params={**params, "crumb": crumb})
+        response.raise_for_status()
+        return parse_history(response.text)
+
+
+def parse_history(text: str) -> pd.DataFrame:
+    """
+    Parses a yahoo history csv into typed columns: dates are kept as strings, "null" prices become NaN
+    and volumes are integers when none of them is missing. Blank lines are skipped, an empty csv gives no rows.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(lines) == 0:
+        return pd.DataFrame(columns=YAHOO_HISTORY_COLUMNS)
+    columns = lines[0].split(",")
+    values = list(zip(*(line.split(",") for line in lines[1:]))) or [()] * len(columns)
+
+    data = {}
+    for column, column_values in zip(columns, values):
+        if column == "Date":
+            data[column] = np.array(column_values, dtype=object)
+            continue
+        array = np.array([np.nan if value == "null" else value for value in column_values], dtype=np.float64)
+        if column == "Volume" and not np.isnan(array).any():
+            array = array.astype(np.int64)
+        data[column] = array
+    return pd.DataFrame(data, columns=columns)
+
+
+_yahoo_client: Optional[YahooHistoryClient] = None
+
+
+def get_yahoo_client() -> YahooHistoryClient:
+    global _yahoo_client
+    if _yahoo_client is None:
+        _yahoo_client = YahooHistoryClient()
+    return _yahoo_client
+
+
+def get_history_end_date() -> datetime:
+    """
+    End of the history fetches, excluded by yahoo: tomorrow, so that today's bar is fetched. The stored bar of today is
+    only complete once the market is closed, the history updates are scheduled after the close.
+    """
+    tomorrow = (datetime.now() + timedelta(days=1)).date()
+    return datetime(tomorrow.year, tomorrow.month, tomorrow.day)
 
 
 def get_ticker_data(ticker: str, start_date: datetime, end_date: Optional[datetime] = None) -> pd.DataFrame:
     if end_date is None:
-        end_date = datetime.utcnow() - timedelta(days=1)
+        end_date = get_history_end_date()
 
     assert start_date < end_date
 
-    fetcher = Fetcher(
-        ticker=ticker,
-        start=[start_date.year, start_date.month, start_date.day],
-        end=[end_date.year, end_date.month, end_date.day],
-    )
-    data = fetcher.get_historical()
+    with metrics.TICKER_FETCH_SECONDS.time():
+        try:
+            data = get_yahoo_client().get_history(ticker, start_date, end_date)
+        except Exception:
+            metrics.TICKER_FETCH_FAILURES.inc()
+            raise
     data['Ticker'] = ticker
     data.drop_duplicates(subset=["Date"], inplace=True)
     return data
 
 
 def get_tickers() -> Set[str]:
-    df = pd.read_csv(TICKERS_LIST_PATH)
-    return set(df['Ticker'])
+    return get_catalog().tickers
 
 
-def get_historical_data() -> pd.DataFrame:
-    df = pd.read_csv(STOCKS_HISTORY_PATH)
+# history store of the current process, reloaded only when the history file changes
+_history_cache: Dict[str, Any] = {}
+
+
+def _prepare_historical_data(df: pd.DataFrame) -> pd.DataFrame:
     df.loc[:, 'Date'] = pd.to_datetime(df['Date'], format="%Y-%m-%d")
-    df = df[df["Date"] > datetime(2017, 1, 1)]
-    logger.info("Historical data is extracted, rows_umber = {}".format(df.shape[0]))
-    return df
+    return df[df["Date"] > datetime(2017, 1, 1)]
+
+
+def _load_historical_data() -> pd.DataFrame:
+    modification_time = os.path.getmtime(STOCKS_HISTORY_PATH)
+    if _history_cache.get("modification_time") != modification_time:
+        df = _prepare_historical_data(pd.read_csv(STOCKS_HISTORY_PATH))
+        logger.info("Historical data is extracted, rows_umber = {}".format(df.shape[0]))
+        metrics.HISTORY_ROWS_LOADED.inc(df.shape[0])
+        _history_cache.clear()
+        _history_cache["modification_time"] = modification_time
+        _history_cache["data"] = df
+
+    return _history_cache["data"]
+
+
+def get_historical_data() -> pd.DataFrame:
+    return _load_historical_data().copy()
+
+
+def get_historical_panel() -> TickerPanel:
+    """
+    Historical data as a TickerPanel, built once per load of the history file. It is shared: it must not be modified.
+    """
+    df = _load_historical_data()
+    if "panel" not in _history_cache:
+        _history_cache["panel"] = TickerPanel.from_frame(df)
+    return _history_cache["panel"]
+
+
+def iter_historical_data_chunks(
+        tickers_chunk_size: int,
+        tickers: Optional[List[str]] = None,
+        rows_chunk_size: int = 10 ** 6
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields the historical data by chunks of tickers_chunk_size tickers, without loading the whole history:
+    the history file is read by chunks of rows_chunk_size rows and split into temporary files, one per tickers chunk.
+    """
+    stored_tickers = set()
+    for rows in pd.read_csv(STOCKS_HISTORY_PATH, usecols=["Ticker"], chunksize=rows_chunk_size):
+        stored_tickers.update(rows["Ticker"].unique())
+    if tickers is not None:
+        stored_tickers &= set(tickers)
+
+    sorted_tickers = sorted(stored_tickers)
+    chunk_by_ticker = {ticker: i // tickers_chunk_size for i, ticker in enumerate(sorted_tickers)}
+    chunks_number = (len(sorted_tickers) + tickers_chunk_size - 1) // tickers_chunk_size
+    logger.info(f"Historical data is split in {chunks_number} chunks of {tickers_chunk_size} tickers")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in pd.read_csv(STOCKS_HISTORY_PATH, chunksize=rows_chunk_size):
+            rows = rows[rows["Ticker"].isin(stored_tickers)]
+            for chunk, chunk_rows in rows.groupby(rows["Ticker"].map(chunk_by_ticker)):
+                path = os.path.join(directory, f"chunk_{chunk}.csv")
+                chunk_rows.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+        for chunk in range(chunks_number):
+            path = os.path.join(directory, f"chunk_{chunk}.csv")
+            df = _prepare_historical_data(pd.read_csv(path))
+            metrics.HISTORY_ROWS_LOADED.inc(df.shape[0])
+            os.remove(path)
+            yield df
+
+
+def get_recent_data(tickers: Optional[List[str]] = None, past_days: int = 90) -> pd.DataFrame:
+    df = get_historical_data()
+    if tickers is not None:
+        df = df[df["Ticker"].isin(tickers)]
+    limit_date = datetime.now() - timedelta(days=past_days)
+    df = df[df["Date"] > limit_date]
+    df = df.drop_duplicates(subset=["Ticker", "Date"], keep="last")
+    return df.reset_index(drop=True)
 
 
 def get_last_update_date_per_ticker() -> Dict[str, datetime]:
     tickers = get_tickers()
-    historical_data = get_historical_data()
+    panel = get_historical_panel()
 
     start_date_per_ticker = {}
-    for ticker, ticker_data in historical_data.groupby(['Ticker']):
+    for ticker in panel.tickers:
         if ticker in tickers:
-            last_date = max(ticker_data['Date'])
+            last_date = pd.Timestamp(panel.get_column(ticker, 'Date')[-1])
             start_date_per_ticker[ticker] = last_date + timedelta(days=1)
     for ticker in tickers:
         if ticker not in start_date_per_ticker:
@@ -83,6 +298,12 @@ def update_data(tickers_to_update: Optional[List[str]] = None, save_data: bool =
     if tickers_to_update is not None:
         start_date_per_ticker = {ticker: start_date for ticker, start_date in start_date_per_ticker.items() if ticker in tickers_to_update}
 
+    # the tickers that already have today's bar are up to date
+    end_date = get_history_end_date()
+    start_date_per_ticker = {
+        ticker: start_date for ticker, start_date in start_date_per_ticker.items() if start_date < end_date
+    }
+
     logger.info("Fetching data for {} tickers".format(len(start_date_per_ticker)))
     failed_tickers = []
     data = []
@@ -92,9 +313,6 @@ def update_data(tickers_to_update: Optional[List[str]] = None, save_data: bool =
     for ticker, start_date in start_date_per_ticker.items():
         try:
             current_tickers_number += 1
-            end_date = None
-            if not save_data:
-                end_date = (datetime.now() + timedelta(days=1)).date()
             ticker_data = get_ticker_data(ticker, start_date, end_date)
         except KeyboardInterrupt as e:
             logging.info('Interrupted by user')
@@ -123,27 +341,210 @@ def update_data(tickers_to_update: Optional[List[str]] = None, save_data: bool =
     if save_data:
         _insert_data(data)
 
+    if len(added_data) == 0:
+        return pd.DataFrame()
     return pd.concat(added_data, axis=0)
 
 
-def update_tickers_from_scratch():
-    tickers_number = 750
-    tickers_list = get_top_tickers(0, tickers_number)
-    i = 0
-    tickers_number = len(tickers_list)
-    for ticker in tickers_list:
-        try:
-            ticker_data = get_ticker_data(ticker=ticker, start_date=DEFAULT_START_DATE)
-            ticker_data.to_csv(STOCKS_HISTORY_PATH, mode='a', header=False)
-        except KeyboardInterrupt:
-            raise KeyboardInterrupt()
-        except:
-            logger.error("Fail for ticker {}".format(ticker))
+class HistoryGap(NamedTuple):
+    ticker: str
+    start_date: datetime
+    end_date: datetime
+    reason: str
+
+
+def get_history_gaps(
+        df: pd.DataFrame,
+        tickers: List[str],
+        start_date: datetime = DEFAULT_START_DATE,
+        end_date: Optional[datetime] = None,
+        max_gap_days: int = 5,
+        first_dates: Optional[Dict[str, datetime]] = None,
+        last_dates: Optional[Dict[str, datetime]] = None,
+        empty_ranges: Optional[Set[Tuple[str, datetime, datetime]]] = None
+) -> List[HistoryGap]:
+    """
+    Date ranges to fetch to repair the stored history of the given tickers: the whole range of the tickers that are
+    not stored, the missing start or end of short series and the holes of more than max_gap_days days.
+    :param first_dates: first date of the tickers listed after start_date, their history is complete from it
+    :param last_dates: last date of the tickers without bars after it, their history is complete while it is their
+    last stored date
+    :param empty_ranges: (ticker, start date, end date) of the holes without bars, they are not gaps
+    """
+    if end_date is None:
+        end_date = datetime.utcnow() - timedelta(days=1)
+    first_dates = first_dates or dict()
+    last_dates = last_dates or dict()
+    empty_ranges = empty_ranges or set()
+    max_gap = np.timedelta64(max_gap_days, "D")
+    panel = TickerPanel.from_frame(df[["Ticker", "Date"]])
 
-        i += 1
-        if i % 20 == 0:
-            print("{}/{}".format(i, tickers_number))
-            time.sleep(2)
+    gaps = []
+    for ticker in tickers:
+        ticker_start_date = max(start_date, first_dates.get(ticker, start_date))
+        if ticker not in panel:
+            gaps.append(HistoryGap(ticker, ticker_start_date, end_date, "new ticker"))
+            continue
+
+        dates = panel.get_column(ticker, "Date")
+        if dates[0] - np.datetime64(ticker_start_date) > max_gap:
+            gaps.append(HistoryGap(ticker, ticker_start_date, pd.Timestamp(dates[0]).to_pydatetime(), "short start"))
+        for i in np.flatnonzero(np.diff(dates) > max_gap):
+            range_start_date = pd.Timestamp(dates[i]).to_pydatetime() + timedelta(days=1)
+            range_end_date = pd.Timestamp(dates[i + 1]).to_pydatetime()
+            if (ticker, range_start_date, range_end_date) not in empty_ranges:
+                gaps.append(HistoryGap(ticker, range_start_date, range_end_date, "missing range"))
+        last_date = pd.Timestamp(dates[-1]).to_pydatetime()
+        if np.datetime64(end_date) - dates[-1] > max_gap and last_dates.get(ticker) != last_date:
+            gaps.append(HistoryGap(ticker, last_date + timedelta(days=1), end_date, "short end"))
+    return gaps
+
+
+def _read_stored_history() -> pd.DataFrame:
+    if not os.path.exists(STOCKS_HISTORY_PATH):
+        return pd.DataFrame(columns=["Date", "Ticker"])
+    df = pd.read_csv(STOCKS_HISTORY_PATH)
+    # the index column written by the appends
+    df.drop(columns=[column for column in df.columns if column.startswith("Unnamed")], inplace=True)
+    df.loc[:, "Date"] = pd.to_datetime(df["Date"], format="%Y-%m-%d")
+    return df
+
+
+def _read_tickers_dates(path: str, column: str) -> Dict[str, datetime]:
+    if not os.path.exists(path):
+        return dict()
+    df = pd.read_csv(path, parse_dates=[column])
+    return {ticker: ticker_date.to_pydatetime() for ticker, ticker_date in zip(df["Ticker"], df[column])}
+
+
+def _save_tickers_dates(path: str, column: str, tickers_dates: Dict[str, datetime]):
+    pd.DataFrame(
+        {"Ticker": list(tickers_dates.keys()), column: list(tickers_dates.values())}
+    ).to_csv(f"{path}.tmp", index=False, date_format="%Y-%m-%d")
+    os.replace(f"{path}.tmp", path)
+
+
+def _read_first_dates() -> Dict[str, datetime]:
+    return _read_tickers_dates(HISTORY_FIRST_DATES_PATH, "first_date")
+
+
+def _read_last_dates() -> Dict[str, datetime]:
+    return _read_tickers_dates(HISTORY_LAST_DATES_PATH, "last_date")
+
+
+def _read_empty_ranges() -> Set[Tuple[str, datetime, datetime]]:
+    if not os.path.exists(HISTORY_EMPTY_RANGES_PATH):
+        return set()
+    df = pd.read_csv(HISTORY_EMPTY_RANGES_PATH, parse_dates=["start_date", "end_date"])
+    return {
+        (ticker, start_date.to_pydatetime(), end_date.to_pydatetime())
+        for ticker, start_date, end_date in zip(df["Ticker"], df["start_date"], df["end_date"])
+    }
+
+
+def _save_empty_ranges(empty_ranges: Set[Tuple[str, datetime, datetime]]):
+    pd.DataFrame(
+        sorted(empty_ranges), columns=["Ticker", "start_date", "end_date"]
+    ).to_csv(f"{HISTORY_EMPTY_RANGES_PATH}.tmp", index=False, date_format="%Y-%m-%d")
+    os.replace(f"{HISTORY_EMPTY_RANGES_PATH}.tmp", HISTORY_EMPTY_RANGES_PATH)
+
+
+def _has_no_bar(gap_data: pd.DataFrame) -> bool:
+    return gap_data.shape[0] == 0 or gap_data["Close"].isna().all()
+
+
+def repair_history(
+        tickers: Optional[List[str]] = None,
+        max_workers: int = 8,
+        max_gap_days: int = 5,
+        dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Fetches concurrently only the missing ranges of the stored history (see get_history_gaps) and merges them in the
+    history file, without duplicating the stored dates.
+    Once the start of a ticker is fetched, its first date is kept: a ticker listed after the start date does not get
+    the same start gap at every repair. In the same way, the end and the holes of a ticker that have no bar (delisted
+    or halted ticker) are kept and not fetched again.
+    :param tickers: tickers to repair, the 750 top tickers by default
+    :param dry_run: only detect the gaps
+    """
+    if tickers is None:
+        tickers = get_top_tickers(0, 750)
+    stored_df = _read_stored_history()
+    first_dates = _read_first_dates()
+    last_dates = _read_last_dates()
+    empty_ranges = _read_empty_ranges()
+    gaps = get_history_gaps(
+        stored_df, tickers, max_gap_days=max_gap_days, first_dates=first_dates, last_dates=last_dates,
+        empty_ranges=empty_ranges
+    )
+    logger.info(f"{len(gaps)} gaps are found for {len({gap.ticker for gap in gaps})} tickers")
+    if dry_run or len(gaps) == 0:
+        return {"gaps": gaps, "failed_gaps": [], "added_rows": 0}
+
+    data = []
+    failed_gaps = []
+    empty_gaps = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(get_ticker_data, gap.ticker, gap.start_date, gap.end_date): gap for gap in gaps}
+        for current_index, future in enumerate(as_completed(futures)):
+            gap = futures[future]
+            try:
+                gap_data = future.result()
+            except requests.HTTPError as e:
+                # yahoo answers 404 for a range without any bar
+                if e.response is not None and e.response.status_code == 404:
+                    empty_gaps.append(gap)
+                else:
+                    logger.error(f"Failed to fetch data for {gap}")
+                    failed_gaps.append(gap)
+            except Exception:
+                logger.error(f"Failed to fetch data for {gap}")
+                failed_gaps.append(gap)
+            else:
+                data.append(gap_data)
+                if _has_no_bar(gap_data):
+                    empty_gaps.append(gap)
+            if current_index % 20 == 0:
+                logger.info(f"Treated {round(100 * current_index / len(gaps))}% of gaps")
+
+    fetched_df = pd.concat(data, axis=0) if len(data) > 0 else pd.DataFrame(columns=stored_df.columns)
+    fetched_df.loc[:, "Date"] = pd.to_datetime(fetched_df["Date"], format="%Y-%m-%d")
+    columns = list(stored_df.columns) if stored_df.shape[0] > 0 else list(fetched_df.columns)
+
+    # the stored rows are kept first: only the dates that are not stored yet are added
+    df = pd.concat([stored_df, fetched_df[columns]], axis=0)
+    df.drop_duplicates(subset=["Ticker", "Date"], keep="first", inplace=True)
+    df.sort_values(by=["Ticker", "Date"], kind="mergesort", inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    added_rows = df.shape[0] - stored_df.shape[0]
+
+    path = f"{STOCKS_HISTORY_PATH}.tmp"
+    df.to_csv(path, date_format="%Y-%m-%d")
+    os.replace(path, STOCKS_HISTORY_PATH)
+
+    # the start of these tickers is fetched: no bar before their first stored date is available
+    started_tickers = {gap.ticker for gap in gaps if gap.reason in ("new ticker", "short start")}
+    started_tickers -= {gap.ticker for gap in failed_gaps}
+    tickers_first_dates = df[df["Ticker"].isin(started_tickers)].groupby("Ticker")["Date"].min()
+    if len(tickers_first_dates) > 0:
+        first_dates.update(
+            {ticker: first_date.to_pydatetime() for ticker, first_date in tickers_first_dates.items()}
+        )
+        _save_tickers_dates(HISTORY_FIRST_DATES_PATH, "first_date", first_dates)
+
+    # the end and the holes without bars are not fetched again, the end is fetched again once a later bar is stored
+    ended_tickers = {gap.ticker: gap.start_date - timedelta(days=1) for gap in empty_gaps if gap.reason == "short end"}
+    if len(ended_tickers) > 0:
+        last_dates.update(ended_tickers)
+        _save_tickers_dates(HISTORY_LAST_DATES_PATH, "last_date", last_dates)
+    new_empty_ranges = {
+        (gap.ticker, gap.start_date, gap.end_date) for gap in empty_gaps if gap.reason == "missing range"
+    }
+    if len(new_empty_ranges) > 0:
+        _save_empty_ranges(empty_ranges | new_empty_ranges)
+    logger.info(f"{added_rows} rows are added to the history, {len(failed_gaps)} gaps failed")
+    return {"gaps": gaps, "failed_gaps": failed_gaps, "added_rows": added_rows}
 
 
 def get_fresh_data(tickers_to_update: List[str], past_days: int = 90):
@@ -155,7 +556,7 @@ def get_fresh_data(tickers_to_update: List[str], past_days: int = 90):
     start_date = (datetime.now() - timedelta(days=past_days)).date()
     end_date = (datetime.now() + timedelta(days=1)).date()
 
-    tickers_print_range = round(len(tickers_to_update) / 20)
+    tickers_print_range = max(1, round(len(tickers_to_update) / 20))
     for current_index, ticker in enumerate(tickers_to_update):
         try:
             ticker_data = get_ticker_data(ticker, start_date, end_date)
@@ -176,6 +577,8 @@ def get_fresh_data(tickers_to_update: List[str], past_days: int = 90):
                     )
                 )
 
+    if len(data) == 0:
+        return pd.DataFrame()
     df = pd.concat(data, axis=0)
     df.loc[:, "Date"] = pd.to_datetime(df['Date'])
 
@@ -239,13 +642,9 @@ def get_fresh_data_v2(tickers: Optional[List[str]] = None, days_number=100):
     return df
 
 
-def get_top_tickers(start, end):
-
-    df = pd.read_csv(TICKERS_LIST_PATH)
-    df = df[["Ticker", "Market Capitalization"]]
-    df.drop_duplicates(inplace=True)
-    df.sort_values(by="Market Capitalization", ascending=False, inplace=True)
-    df.reset_index(drop=True, inplace=True)
-    df = df.loc[start: end, ]
-    return list(df["Ticker"])
+def get_top_tickers(start: int, end: int, universe_snapshot: Optional[str] = None) -> List[str]:
+    """
+    :param universe_snapshot: snapshot of the universe to rank, the current tickers list by default
+    """
+    return get_catalog(universe_snapshot).get_top_tickers(start, end)
 
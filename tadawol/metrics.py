@@ -0,0 +1,55 @@
+from prometheus_client import Counter, Histogram
+
+
+TICKER_FETCH_SECONDS = Histogram(
+    "tadawol_ticker_fetch_seconds",
+    "Time spent fetching the history of one ticker",
+)
+TICKER_FETCH_FAILURES = Counter(
+    "tadawol_ticker_fetch_failures_total",
+    "Number of failed ticker history fetches",
+)
+YAHOO_REQUEST_SECONDS = Histogram(
+    "tadawol_yahoo_request_seconds",
+    "Duration of the HTTP requests sent to yahoo",
+    ["endpoint"],
+)
+YAHOO_REQUEST_RETRIES = Counter(
+    "tadawol_yahoo_request_retries_total",
+    "Number of yahoo requests retried after a throttling or server error",
+    ["endpoint"],
+)
+YAHOO_CRUMB_REFRESHES = Counter(
+    "tadawol_yahoo_crumb_refreshes_total",
+    "Number of cookie/crumb handshakes with yahoo",
+)
+
+HISTORY_ROWS_LOADED = Counter(
+    "tadawol_history_rows_loaded_total",
+    "Number of rows loaded from the history file",
+)
+
+STRATEGY_STAGE_SECONDS = Histogram(
+    "tadawol_strategy_stage_seconds",
+    "Time spent by a strategy in a backtest stage for one ticker",
+    ["strategy", "stage"],
+)
+SIMULATE_TRADES_SECONDS = Histogram(
+    "tadawol_simulate_trades_seconds",
+    "Time spent simulating the trades list of a strategy",
+    ["strategy"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, float("inf")),
+)
+
+TASK_SECONDS = Histogram(
+    "tadawol_task_seconds",
+    "Celery task duration",
+    ["task"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, float("inf")),
+)
+TASK_QUEUE_WAIT_SECONDS = Histogram(
+    "tadawol_task_queue_wait_seconds",
+    "Time between a celery task publication and its start on a worker",
+    ["task"],
+    buckets=(0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 600, 1800, float("inf")),
+)
@@ -0,0 +1,133 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class TickerPanel:
+    """
+    Rows of several tickers stored as contiguous numpy columns, sorted by ticker then date, with the [start, end)
+    offsets of the rows of each ticker: the rows of a ticker are a slice of the columns, found without any groupby,
+    mask or sort.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], offsets: Dict[str, Tuple[int, int]]):
+        self.columns = columns
+        self.offsets = offsets
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, ticker_column: str = "Ticker", date_column: str = "Date") -> "TickerPanel":
+        codes, _ = pd.factorize(df[ticker_column], sort=True)
+        dates = df[date_column].to_numpy()
+        if dates.dtype.kind not in "Mmiuf":
+            dates, _ = pd.factorize(df[date_column], sort=True)
+        # lexsort is stable: the rows of a ticker on the same date keep their order
+        order = np.lexsort((dates, codes))
+        columns = {column: df[column].to_numpy()[order] for column in df.columns}
+
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(order) > 0 else []
+        ends = np.r_[starts[1:], len(order)] if len(order) > 0 else []
+        tickers = columns[ticker_column]
+        offsets = {tickers[start]: (int(start), int(end)) for start, end in zip(starts, ends)}
+        return cls(columns, offsets)
+
+    def __len__(self) -> int:
+        return sum(end - start for start, end in self.offsets.values())
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.offsets
+
+    @property
+    def tickers(self) -> List[str]:
+        return list(self.offsets.keys())
+
+    def get_column(self, ticker: str, column: str) -> np.ndarray:
+        """
+        Values of a column for one ticker, as a view on the panel column: it must not be modified.
+        """
+        start, end = self.offsets[ticker]
+        return self.columns[column][start: end]
+
+    def get_frame(self, ticker: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Rows of one ticker, sorted by date, in a new dataframe. An unknown ticker gives an empty dataframe.
+        """
+        start, end = self.offsets.get(ticker, (0, 0))
+        columns = columns or list(self.columns.keys())
+        return pd.DataFrame({column: self.columns[column][start: end] for column in columns}, columns=columns)
+
+    def iter_frames(self, columns: Optional[List[str]] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+        for ticker in self.offsets:
+            yield ticker, self.get_frame(ticker, columns)
+
+    def select(self, tickers: List[str]) -> "TickerPanel":
+        """
+        Panel of the given tickers only, the unknown ones are ignored.
+        """
+        tickers = set(tickers)
+        selected = [ticker for ticker in self.offsets if ticker in tickers]
+        slices = [slice(*self.offsets[ticker]) for ticker in selected]
+        columns = {
+            column: np.concatenate([values[s] for s in slices]) if slices else values[:0]
+            for column, values in self.columns.items()
+        }
+        offsets = {}
+        start = 0
+        for ticker, s in zip(selected, slices):
+            offsets[ticker] = (start, start + s.stop - s.start)
+            start += s.stop - s.start
+        return TickerPanel(columns, offsets)
+
+    def split(self, shards_number: int) -> List["TickerPanel"]:
+        """
+        Splits the panel in at most shards_number panels of contiguous tickers, of about the same number of tickers.
+        The columns of a shard are slices of the panel columns: only the rows of the shard are pickled with it.
+        """
+        tickers = self.tickers
+        shard_size = max(1, -(-len(tickers) // max(1, shards_number)))
+        shards = []
+        for i in range(0, len(tickers), shard_size):
+            shard_tickers = tickers[i: i + shard_size]
+            shard_start = self.offsets[shard_tickers[0]][0]
+            shard_end = self.offsets[shard_tickers[-1]][1]
+            columns = {column: values[shard_start: shard_end] for column, values in self.columns.items()}
+            offsets = {
+                ticker: (self.offsets[ticker][0] - shard_start, self.offsets[ticker][1] - shard_start)
+                for ticker in shard_tickers
+            }
+            shards.append(TickerPanel(columns, offsets))
+        return shards
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.columns, columns=list(self.columns.keys()))
+
+
+# shards of tickers per process of the pool, several shards per process even out the load of the processes
+SHARDS_PER_PROCESS = 4
+
+
+def map_shards(
+        function: Callable[..., Any],
+        panel: TickerPanel,
+        processes: int,
+        args: Tuple = (),
+        on_shard_done: Optional[Callable[[TickerPanel], None]] = None
+) -> List[Any]:
+    """
+    Calls function(shard, *args) on shards of contiguous tickers of the panel in a pool of processes, and returns the
+    results in the order of the shards, whatever the order in which they are done.
+    The function and its arguments are pickled: the function must be defined at the module level.
+    :param on_shard_done: called in the calling process with each shard once it is done, e.g. to report the progress
+    """
+    shards = panel.split(processes * SHARDS_PER_PROCESS)
+    results: List[Any] = [None] * len(shards)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {executor.submit(function, shard, *args): i for i, shard in enumerate(shards)}
+        for future in as_completed(futures):
+            shard_index = futures[future]
+            results[shard_index] = future.result()
+            if on_shard_done is not None:
+                on_shard_done(shards[shard_index])
+    return results
@@ -0,0 +1,73 @@
+import os
+import re
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+
+from tadawol.history import DATA_PATH
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+POSITIONS_DATA_PATH = os.path.join(DATA_PATH, "positions")
+
+# Date and Close are the date and the close of the entry, last_date is the date of the last bar evaluated for the exit
+POSITIONS_COLUMNS = ["Ticker", "Date", "Close", "week_previous_entries", "days_number", "last_date"]
+
+
+def _get_path(strategy_name: str, as_of_date: datetime) -> str:
+    return os.path.join(POSITIONS_DATA_PATH, f"{strategy_name}_{as_of_date:%Y-%m-%d}.csv")
+
+
+def _get_books_dates(strategy_name: str) -> List[datetime]:
+    if not os.path.exists(POSITIONS_DATA_PATH):
+        return []
+    pattern = re.compile(rf"^{re.escape(strategy_name)}_(\d{{4}}-\d{{2}}-\d{{2}})\.csv$")
+    matches = (pattern.match(file_name) for file_name in os.listdir(POSITIONS_DATA_PATH))
+    return sorted(datetime.strptime(match.group(1), "%Y-%m-%d") for match in matches if match is not None)
+
+
+def get_empty_positions() -> pd.DataFrame:
+    df = pd.DataFrame(columns=POSITIONS_COLUMNS)
+    df.loc[:, "Date"] = pd.to_datetime(df["Date"])
+    df.loc[:, "last_date"] = pd.to_datetime(df["last_date"])
+    return df
+
+
+def load_positions(strategy_name: str, before_date: datetime) -> Optional[pd.DataFrame]:
+    """
+    Open positions book of a strategy saved on the last day before before_date, None when the strategy has no such
+    book. A live run of a day always starts from the book of the previous days: running it again on the same day
+    gives the same signals and book.
+    """
+    books_dates = [book_date for book_date in _get_books_dates(strategy_name) if book_date < before_date]
+    if len(books_dates) == 0:
+        return None
+    df = pd.read_csv(_get_path(strategy_name, books_dates[-1]))
+    df.loc[:, "Date"] = pd.to_datetime(df["Date"])
+    df.loc[:, "last_date"] = pd.to_datetime(df["last_date"])
+    return df
+
+
+def save_positions(strategy_name: str, df: pd.DataFrame, as_of_date: datetime):
+    """
+    Saves the book of the as_of_date day. The book it was built from is kept, so that the day can be run again, the
+    older ones are deleted.
+    """
+    os.makedirs(POSITIONS_DATA_PATH, exist_ok=True)
+    path = _get_path(strategy_name, as_of_date)
+    df[POSITIONS_COLUMNS].to_csv(f"{path}.tmp", index=False)
+    os.replace(f"{path}.tmp", path)
+
+    previous_dates = [book_date for book_date in _get_books_dates(strategy_name) if book_date < as_of_date]
+    for book_date in previous_dates[:-1]:
+        os.remove(_get_path(strategy_name, book_date))
+    logger.info(f"[Positions] {strategy_name}: {df.shape[0]} open positions are saved for {as_of_date:%Y-%m-%d}")
+
+
+def delete_positions(strategy_name: str):
+    for book_date in _get_books_dates(strategy_name):
+        os.remove(_get_path(strategy_name, book_date))
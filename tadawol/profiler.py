@@ -0,0 +1,86 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+
+class StageProfiler:
+    """
+    Records the wall time, the cpu time and the memory peak (tracemalloc) of the backtest stages.
+    Stages run for a ticker are also aggregated by ticker to find the slowest ones.
+    """
+
+    def __init__(self, slowest_tickers_number: int = 20):
+        self.slowest_tickers_number = slowest_tickers_number
+        self.stages: Dict[str, Dict[str, float]] = dict()
+        self.tickers: Dict[str, Dict[str, float]] = dict()
+        self.start_time = time.time()
+
+    @staticmethod
+    def _reset_memory_peak():
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        else:
+            # python < 3.9: restarting is the only way to reset the peak
+            tracemalloc.stop()
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str, ticker: Optional[str] = None):
+        self._reset_memory_peak()
+        start_memory, _ = tracemalloc.get_traced_memory()
+        start_wall_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start_wall_time
+            cpu_time = time.process_time() - start_cpu_time
+            _, peak_memory = tracemalloc.get_traced_memory()
+            self._record(self.stages, name, wall_time, cpu_time, max(peak_memory - start_memory, 0))
+            if ticker is not None:
+                self._record(self.tickers, ticker, wall_time, cpu_time, max(peak_memory - start_memory, 0))
+
+    @staticmethod
+    def _record(records: Dict[str, Dict[str, float]], key: str, wall_time: float, cpu_time: float, peak_memory: int):
+        record = records.setdefault(
+            key, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "memory_peak_bytes": 0}
+        )
+        record["calls"] += 1
+        record["wall_seconds"] += wall_time
+        record["cpu_seconds"] += cpu_time
+        record["memory_peak_bytes"] = max(record["memory_peak_bytes"], peak_memory)
+
+    def get_report(self) -> Dict[str, Any]:
+        slowest_tickers = sorted(self.tickers.items(), key=lambda x: x[1]["wall_seconds"], reverse=True)
+        return {
+            "total_wall_seconds": round(time.time() - self.start_time, 4),
+            "stages": {
+                name: {key: round(value, 4) for key, value in record.items()}
+                for name, record in sorted(self.stages.items())
+            },
+            "slowest_tickers": [
+                dict(ticker=ticker, **{key: round(value, 4) for key, value in record.items()})
+                for ticker, record in slowest_tickers[:self.slowest_tickers_number]
+            ],
+        }
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.get_report(), f, indent=2, sort_keys=True)
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+@contextmanager
+def profile_stage(profiler: Optional[StageProfiler], name: str, ticker: Optional[str] = None):
+    if profiler is None:
+        yield
+    else:
+        with profiler.stage(name, ticker):
+            yield
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+from datetime import datetime
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from tadawol.config import ProgressConfig
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+DATA_PATH = os.path.join(os.getcwd(), 'tadawol/data')
+PROGRESS_DATA_PATH = os.path.join(DATA_PATH, "progress")
+
+
+def _get_path(job_id: str) -> str:
+    return os.path.join(PROGRESS_DATA_PATH, f"{job_id}.jsonl")
+
+
+class ProgressReporter:
+    """
+    Publishes the events of a running job (grid search, celery task ...) as json lines, one file per job,
+    so that any other process (the api for example) can stream them while the job is running.
+    """
+
+    def __init__(self, job_id: str, total: int, unit: str):
+        self.job_id = job_id
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.start_time = time.time()
+        os.makedirs(PROGRESS_DATA_PATH, exist_ok=True)
+        delete_expired_jobs()
+        self.publish("start", total=total, unit=unit)
+
+    def publish(self, event: str, **data: Any):
+        data.update(
+            {
+                "event": event,
+                "job_id": self.job_id,
+                "time": datetime.utcnow().isoformat(),
+            }
+        )
+        # a job started again under the same id, a resumed grid run for example, replaces the events of the previous
+        # attempt: the readers would stop at its end event
+        with open(_get_path(self.job_id), "w" if event == "start" else "a") as f:
+            f.write(json.dumps(data, default=str) + "\n")
+
+    def advance(self, steps: int = 1, event: str = "progress", **data: Any):
+        self.done += steps
+        elapsed = time.time() - self.start_time
+        throughput = self.done / elapsed if elapsed > 0 else 0
+        eta = (self.total - self.done) / throughput if throughput > 0 else None
+        self.publish(
+            event,
+            done=self.done,
+            total=self.total,
+            elapsed_seconds=round(elapsed, 2),
+            throughput=round(throughput, 4),
+            throughput_unit=f"{self.unit}/sec",
+            eta_seconds=None if eta is None else round(eta, 2),
+            **data
+        )
+
+    def finish(self, **data: Any):
+        elapsed = time.time() - self.start_time
+        self.publish("end", done=self.done, total=self.total, elapsed_seconds=round(elapsed, 2), **data)
+
+
+def get_jobs() -> List[str]:
+    if not os.path.exists(PROGRESS_DATA_PATH):
+        return []
+    return sorted(f[:-len(".jsonl")] for f in os.listdir(PROGRESS_DATA_PATH) if f.endswith(".jsonl"))
+
+
+def read_events(job_id: str, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Returns the events published after the given byte offset, and the offset to use for the next read.
+    """
+    path = _get_path(job_id)
+    if not os.path.exists(path):
+        return [], offset
+    if offset > os.path.getsize(path):
+        # the job is started again, its events are read from the new start
+        offset = 0
+
+    events = []
+    with open(path, "r") as f:
+        f.seek(offset)
+        for line in iter(f.readline, ""):
+            if not line.endswith("\n"):
+                # the line is still being written
+                break
+            events.append(json.loads(line))
+            offset = f.tell()
+    return events, offset
+
+
+def get_last_event(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Last complete event of the job, read from the end of its file.
+    """
+    path = _get_path(job_id)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        block_size = 4096
+        content = b""
+        # the last line is complete when the file ends with a new line, it is still being written otherwise
+        while end > 0 and content.count(b"\n") < 2:
+            start = max(0, end - block_size)
+            f.seek(start)
+            content = f.read(end - start) + content
+            end = start
+
+    lines = content.split(b"\n")[:-1]
+    if len(lines) == 0:
+        return None
+    return json.loads(lines[-1])
+
+
+def delete_expired_jobs(retention_seconds: Optional[float] = None):
+    """
+    Deletes the events of the finished jobs that did not change for retention_seconds, see ProgressConfig.
+    """
+    if retention_seconds is None:
+        retention_seconds = ProgressConfig().retention_hours * 3600
+    expiration_time = time.time() - retention_seconds
+    for job_id in get_jobs():
+        path = _get_path(job_id)
+        try:
+            if os.path.getmtime(path) > expiration_time:
+                continue
+            last_event = get_last_event(job_id)
+            if last_event is not None and last_event["event"] == "end":
+                os.remove(path)
+                logger.info(f"[Progress] Events of the finished job {job_id} are deleted")
+        except FileNotFoundError:
+            # deleted by another process
+            continue
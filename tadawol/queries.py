@@ -0,0 +1,88 @@
+import os
+import json
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from tadawol import history
+from tadawol.stats import add_indicators
+from tadawol.strategies.registry import STRATEGIES
+
+
+class NotFoundError(Exception):
+    pass
+
+
+def _get_history_version() -> float:
+    return os.path.getmtime(history.STOCKS_HISTORY_PATH)
+
+
+def get_tickers() -> List[str]:
+    return sorted(history.get_historical_panel().tickers)
+
+
+def _get_bars(ticker: str) -> pd.DataFrame:
+    panel = history.get_historical_panel()
+    if ticker not in panel:
+        raise NotFoundError(f"Unknown ticker {ticker}")
+    return panel.get_frame(ticker)
+
+
+def _get_strategy(strategy_name: str):
+    if strategy_name not in STRATEGIES:
+        raise NotFoundError(f"Unknown strategy {strategy_name}")
+    return STRATEGIES[strategy_name]()
+
+
+@lru_cache(maxsize=256)
+def _get_indicators(strategy_name: str, ticker: str, version: float) -> pd.DataFrame:
+    strategy = _get_strategy(strategy_name)
+    indicators = strategy.get_indicators()
+    df = add_indicators(_get_bars(ticker).copy(deep=True), indicators)
+    return df[["Date"] + [indicator.column_name for indicator in indicators]]
+
+
+@lru_cache(maxsize=256)
+def _get_signals(strategy_name: str, ticker: str, version: float) -> pd.DataFrame:
+    strategy = _get_strategy(strategy_name)
+    df = strategy.add_entries_for_ticker(_get_bars(ticker))
+    return df[["Date", "Close", "entry", "go-on"] + strategy.get_hint_columns()]
+
+
+def _to_page(df: pd.DataFrame, start: Optional[date], end: Optional[date], offset: int, limit: int) -> Dict[str, Any]:
+    # indicators are computed on the whole history of the ticker, the date range is only applied to the result
+    if start is not None:
+        df = df[df["Date"] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df["Date"] <= pd.Timestamp(end)]
+    page = df.iloc[offset: offset + limit]
+    return {
+        "total": df.shape[0],
+        "offset": offset,
+        "limit": limit,
+        "columns": {
+            column: json.loads(page[column].to_json(orient="values", date_format="iso"))
+            for column in page.columns
+        },
+    }
+
+
+def get_bars_page(ticker: str, start: Optional[date], end: Optional[date], offset: int, limit: int) -> Dict[str, Any]:
+    columns = ["Date", "Open", "High", "Low", "Close", "Volume"]
+    return _to_page(_get_bars(ticker)[columns], start, end, offset, limit)
+
+
+def get_indicators_page(
+        strategy_name: str, ticker: str, start: Optional[date], end: Optional[date], offset: int, limit: int
+) -> Dict[str, Any]:
+    _get_bars(ticker)
+    return _to_page(_get_indicators(strategy_name, ticker, _get_history_version()), start, end, offset, limit)
+
+
+def get_signals_page(
+        strategy_name: str, ticker: str, start: Optional[date], end: Optional[date], offset: int, limit: int
+) -> Dict[str, Any]:
+    _get_bars(ticker)
+    return _to_page(_get_signals(strategy_name, ticker, _get_history_version()), start, end, offset, limit)
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from urllib.parse import urlencode
+
+import requests
+
+from tadawol.config import FetchReplayConfig
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+# query parameters changing from a session to another, they are ignored to match recorded responses
+VOLATILE_PARAMETERS = {"crumb"}
+
+
+def get_request_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    params = {name: value for name, value in (params or {}).items() if name not in VOLATILE_PARAMETERS}
+    request = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+    return hashlib.sha1(request.encode()).hexdigest()
+
+
+def _make_response(url: str, status_code: int, text: str) -> requests.Response:
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response.encoding = "utf-8"
+    response._content = text.encode("utf-8")
+    return response
+
+
+def _get_record_path(directory: str, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    return os.path.join(directory, f"{get_request_key(url, params)}.json")
+
+
+class RecordingSession:
+    """
+    Sends the requests through the wrapped session and writes every response to directory, to be replayed later.
+    The responses to the same request are all kept, in order: e.g. a 401 and the response after a crumb refresh.
+    """
+
+    def __init__(self, session: requests.Session, directory: str):
+        self.session = session
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> requests.Response:
+        response = self.session.get(url, params=params, **kwargs)
+        path = _get_record_path(self.directory, url, params)
+        with self._lock:
+            record = {"url": url, "params": params, "responses": []}
+            if os.path.exists(path):
+                with open(path) as f:
+                    record = json.load(f)
+            record["responses"].append({"status_code": response.status_code, "text": response.text})
+            with open(path, "w") as f:
+                json.dump(record, f)
+        return response
+
+
+class ReplaySession:
+    """
+    Answers the requests with the recorded responses, without any network access.
+    The recorded responses to a request are replayed in order, the last one is then repeated.
+    It simulates a server latency, random errors (503) and a rate limit (429) to benchmark the ingestion path.
+    Requests that were not recorded get a 404.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            latency_seconds: float = 0,
+            error_rate: float = 0,
+            max_requests_per_second: Optional[float] = None,
+            seed: int = 0
+    ):
+        self.directory = directory
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.max_requests_per_second = max_requests_per_second
+        self.random = random.Random(seed)
+        self.requests_times: Deque[float] = deque()
+        self.counts = {"requests": 0, "errors": 0, "throttled": 0, "missing": 0}
+        # number of recorded responses already replayed, by record path
+        self.replayed: Dict[str, int] = dict()
+        self._lock = threading.Lock()
+
+    def _is_throttled(self) -> bool:
+        if self.max_requests_per_second is None:
+            return False
+        now = time.monotonic()
+        while len(self.requests_times) > 0 and self.requests_times[0] <= now - 1:
+            self.requests_times.popleft()
+        if len(self.requests_times) >= self.max_requests_per_second:
+            return True
+        self.requests_times.append(now)
+        return False
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> requests.Response:
+        time.sleep(self.latency_seconds)
+        with self._lock:
+            self.counts["requests"] += 1
+            if self._is_throttled():
+                self.counts["throttled"] += 1
+                return _make_response(url, 429, "Too Many Requests")
+            if self.random.random() < self.error_rate:
+                self.counts["errors"] += 1
+                return _make_response(url, 503, "Service Unavailable")
+
+        path = _get_record_path(self.directory, url, params)
+        if not os.path.exists(path):
+            with self._lock:
+                self.counts["missing"] += 1
+            logger.warning(f"No recorded response for {url} {params}")
+            return _make_response(url, 404, "Not Found")
+
+        with open(path) as f:
+            responses = json.load(f)["responses"]
+        with self._lock:
+            replayed = self.replayed.get(path, 0)
+            self.replayed[path] = replayed + 1
+        response = responses[min(replayed, len(responses) - 1)]
+        return _make_response(url, response["status_code"], response["text"])
+
+
+def wrap_session(session: requests.Session, config: Optional[FetchReplayConfig] = None):
+    """
+    Returns the session to use for yahoo requests: the given session itself, or its recording or replay
+    counterpart when fetch_replay_mode is "record" or "replay".
+    """
+    config = config or FetchReplayConfig()
+    if config.mode is None:
+        return session
+    if config.mode == "record":
+        logger.info(f"Recording yahoo responses in {config.directory}")
+        return RecordingSession(session, config.directory)
+    if config.mode == "replay":
+        logger.info(f"Replaying yahoo responses from {config.directory}")
+        return ReplaySession(
+            config.directory,
+            latency_seconds=config.latency_seconds,
+            error_rate=config.error_rate,
+            max_requests_per_second=config.max_requests_per_second,
+            seed=config.seed,
+        )
+    raise ValueError(f"Unknown fetch replay mode: {config.mode}")
@@ -0,0 +1,154 @@
+import json
+import random
+import hashlib
+import operator
+import itertools
+from functools import reduce
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+
+class Range(NamedTuple):
+    """
+    Continuous dimension of a search space, only explored by sampling. With integer, the sampled values are rounded.
+    """
+    low: float
+    high: float
+    integer: bool = False
+
+    def get_value(self, position: float) -> Union[int, float]:
+        """
+        :param position: position in the range, in [0, 1)
+        """
+        value = self.low + position * (self.high - self.low)
+        return int(round(value)) if self.integer else value
+
+
+Dimension = Union[Sequence[Any], Range]
+
+
+def get_combination_id(combination: Sequence[Any]) -> str:
+    """
+    Id of a combination, that only depends on its values: it is the same in every run and every search space.
+    """
+    return hashlib.sha1(json.dumps(list(combination), default=str).encode()).hexdigest()[:12]
+
+
+class SearchSpace:
+    """
+    Parameters combinations of a grid search, generated lazily: the product of the dimensions is never allocated.
+    Each dimension is a list of values or a continuous Range. The combinations that do not satisfy is_valid are
+    skipped by every way of exploring the space.
+    The enumeration order is the one of the grid searches: the first dimension changes first.
+    """
+
+    def __init__(self, dimensions: List[Dimension], is_valid: Optional[Callable[[List[Any]], bool]] = None):
+        # copies, the given grid can be used again
+        self.dimensions = [d if isinstance(d, Range) else list(d) for d in dimensions]
+        self.is_valid = is_valid or (lambda combination: True)
+
+    @property
+    def is_discrete(self) -> bool:
+        return not any(isinstance(d, Range) for d in self.dimensions)
+
+    @property
+    def size(self) -> int:
+        """
+        Number of combinations, invalid ones included.
+        """
+        if not self.is_discrete:
+            raise ValueError("A search space with a continuous range has no size")
+        return reduce(operator.mul, (len(d) for d in self.dimensions), 1)
+
+    def get_combination(self, index: int) -> List[Any]:
+        """
+        Combination at the given index of the enumeration, computed without enumerating the previous ones.
+        """
+        combination = []
+        for values in self.dimensions:
+            index, position = divmod(index, len(values))
+            combination.append(values[position])
+        return combination
+
+    def __iter__(self) -> Iterator[List[Any]]:
+        if not self.is_discrete:
+            raise ValueError("A search space with a continuous range can only be sampled")
+        for reversed_combination in itertools.product(*reversed(self.dimensions)):
+            combination = list(reversed(reversed_combination))
+            if self.is_valid(combination):
+                yield combination
+
+    def sample_random(self, budget: int, seed: int = 0, max_attempts_factor: int = 10) -> List[List[Any]]:
+        """
+        At most budget distinct valid combinations drawn uniformly. Fewer are returned when the valid combinations
+        are too rare to be found in max_attempts_factor * budget draws.
+        """
+        generator = random.Random(seed)
+        attempts = max_attempts_factor * budget
+        if self.is_discrete:
+            # drawing indices instead of combinations: the space is not allocated and there is no duplicate
+            indices = generator.sample(range(self.size), min(attempts, self.size))
+            combinations = (self.get_combination(index) for index in indices)
+        else:
+            combinations = (
+                [
+                    d.get_value(generator.random()) if isinstance(d, Range) else generator.choice(d)
+                    for d in self.dimensions
+                ]
+                for _ in range(attempts)
+            )
+        return self._get_distinct_valid(combinations, budget)
+
+    def sample_latin_hypercube(self, budget: int, seed: int = 0) -> List[List[Any]]:
+        """
+        Latin hypercube sample of budget points: the range of each dimension is cut in budget strata and each stratum
+        gets exactly one point, so every value of every dimension is covered as evenly as the budget allows.
+        The invalid combinations and the duplicates, possible on small discrete dimensions, are dropped.
+        """
+        generator = random.Random(seed)
+        positions_per_dimension = []
+        for _ in self.dimensions:
+            strata = list(range(budget))
+            generator.shuffle(strata)
+            positions_per_dimension.append([(stratum + generator.random()) / budget for stratum in strata])
+
+        combinations = (
+            [
+                d.get_value(position) if isinstance(d, Range) else d[int(position * len(d))]
+                for d, position in zip(self.dimensions, positions)
+            ]
+            for positions in zip(*positions_per_dimension)
+        )
+        return self._get_distinct_valid(combinations, budget)
+
+    def _get_distinct_valid(self, combinations: Iterator[List[Any]], budget: int) -> List[List[Any]]:
+        sample = []
+        seen_ids = set()
+        for combination in combinations:
+            combination_id = get_combination_id(combination)
+            if combination_id in seen_ids or not self.is_valid(combination):
+                continue
+            seen_ids.add(combination_id)
+            sample.append(combination)
+            if len(sample) == budget:
+                break
+        return sample
+
+    def get_combinations(
+            self,
+            sampling: Optional[str] = None,
+            budget: Optional[int] = None,
+            seed: int = 0
+    ) -> Iterable[List[Any]]:
+        """
+        Combinations to evaluate, that can be iterated several times.
+        :param sampling: None to enumerate the whole space lazily, "random" or "lhs" for a sample of budget combinations
+        """
+        if sampling is None:
+            return self
+        if budget is None:
+            raise ValueError(f"A budget is needed for the {sampling} sampling")
+        if sampling == "random":
+            return self.sample_random(budget, seed)
+        if sampling == "lhs":
+            return self.sample_latin_hypercube(budget, seed)
+        raise ValueError(f"Unknown sampling {sampling}")
@@ -0,0 +1,66 @@
+import os
+from datetime import datetime
+import logging
+from typing import Tuple, Optional
+
+import pandas as pd
+
+from tadawol.history import DATA_PATH
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+SIGNALS_DATA_PATH = os.path.join(DATA_PATH, "signals")
+
+DATE_COLUMNS = ["Date", "exit"]
+
+
+def _get_path(strategy_name: str, kind: str) -> str:
+    return os.path.join(SIGNALS_DATA_PATH, f"{strategy_name}_{kind}.csv")
+
+
+def save_signals(strategy_name: str, trades: pd.DataFrame, entries: pd.DataFrame, exits: pd.DataFrame):
+    os.makedirs(SIGNALS_DATA_PATH, exist_ok=True)
+    for kind, df in [("trades", trades), ("entries", entries), ("exits", exits)]:
+        df.to_csv(_get_path(strategy_name, kind), index=False)
+    logger.info(f"[Signals] {strategy_name}: {entries.shape[0]} entries and {exits.shape[0]} exits are saved")
+
+
+def _read_signals_file(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    for column in DATE_COLUMNS:
+        if column in df.columns:
+            df.loc[:, column] = pd.to_datetime(df[column])
+    return df
+
+
+def get_signals(strategy_name: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    entries = _read_signals_file(_get_path(strategy_name, "entries"))
+    exits = _read_signals_file(_get_path(strategy_name, "exits"))
+    return entries, exits
+
+
+def get_trades(strategy_name: str) -> pd.DataFrame:
+    return _read_signals_file(_get_path(strategy_name, "trades"))
+
+
+def save_indicators(strategy_name: str, indicators: pd.DataFrame):
+    """
+    :param indicators: indicators of the strategy for each ticker and date of the precomputed signals
+    """
+    os.makedirs(SIGNALS_DATA_PATH, exist_ok=True)
+    path = _get_path(strategy_name, "indicators")
+    indicators.to_csv(f"{path}.tmp", index=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def get_indicators(strategy_name: str) -> pd.DataFrame:
+    return _read_signals_file(_get_path(strategy_name, "indicators"))
+
+
+def get_computation_date(strategy_name: str) -> Optional[datetime]:
+    path = _get_path(strategy_name, "entries")
+    if not os.path.exists(path):
+        return None
+    return datetime.fromtimestamp(os.path.getmtime(path))
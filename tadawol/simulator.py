@@ -1,18 +1,76 @@
 from datetime import datetime, timedelta
+from itertools import product
+from typing import List, Iterable, Tuple
+
+import numpy as np
 import pandas as pd
 
+from tadawol import metrics
+
+# order of the trades of a day, the first ones are taken when there are more trades than max_trades_by_day: a stable
+# sort on a total order gives the same simulation for the trades in memory and for the spilled ones
+TRADES_ORDER = ["Date", "Ticker"]
+
+# label of the simulations of trades that do not come from a known strategy
+UNKNOWN_STRATEGY = "unknown"
+
+
+def sort_trades(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(by=TRADES_ORDER, ascending=True, kind="mergesort")
+
 
 def simulate_trades(
         df: pd.DataFrame,
         total_amount: int = 30000,
         transaction_min: float = 1800,
         transaction_max: float = 2500,
-        max_trades_by_day: int = 3
+        max_trades_by_day: int = 3,
+        strategy: str = UNKNOWN_STRATEGY
+):
+    """
+    :param strategy: name of the strategy of the trades, the label of the simulation time metric
+    """
+    df = sort_trades(df)
+    return simulate_trades_stream(
+        df.groupby("Date", sort=False),
+        total_amount=total_amount,
+        transaction_min=transaction_min,
+        transaction_max=transaction_max,
+        max_trades_by_day=max_trades_by_day,
+        strategy=strategy
+    )
+
+
+def simulate_trades_stream(
+        trades_by_date: Iterable[Tuple[datetime, pd.DataFrame]],
+        total_amount: int = 30000,
+        transaction_min: float = 1800,
+        transaction_max: float = 2500,
+        max_trades_by_day: int = 3,
+        strategy: str = UNKNOWN_STRATEGY
 ):
+    """
+    simulate_trades on trades given as a stream of (date, trades of the date), by ascending date, so that the
+    trades do not need to be loaded at once. The trades of a date must be sorted with sort_trades.
+    """
+    with metrics.SIMULATE_TRADES_SECONDS.labels(strategy=strategy).time():
+        return _simulate_trades_stream(
+            trades_by_date, total_amount, transaction_min, transaction_max, max_trades_by_day
+        )
+
+
+def _simulate_trades_stream(
+        trades_by_date: Iterable[Tuple[datetime, pd.DataFrame]],
+        total_amount: int,
+        transaction_min: float,
+        transaction_max: float,
+        max_trades_by_day: int
+):
+    trades_by_date = iter(trades_by_date)
+    next_day = next(trades_by_date, None)
 
     current_amount = total_amount
-    df = df.sort_values(by="Date", ascending=True)
-    date = df["Date"].min()
+    date = next_day[0] if next_day is not None else pd.NaT
 
     returned_money_by_date = dict()
     trade_fees = 0
@@ -24,8 +82,12 @@ def simulate_trades(
         returned_money_by_date[date] = 0
 
         # see available money
-        day_trades = df[df["Date"] == date]
-        day_trades_number = min(day_trades.shape[0], max_trades_by_day)
+        while next_day is not None and next_day[0] < date:
+            next_day = next(trades_by_date, None)
+        day_trades_number = 0
+        if next_day is not None and next_day[0] == date:
+            day_trades = next_day[1]
+            day_trades_number = min(day_trades.shape[0], max_trades_by_day)
 
         if day_trades_number == 0 or current_amount / day_trades_number < transaction_min:
             date += timedelta(days=1)
@@ -79,3 +141,123 @@ def simulate_trades(
         data=realized_trades,
         columns=["Ticker", "Date", "Exit date", "Enter price", "Exit price", "win_percent"])
     return win, trade_fees, realized_trades_df
+
+
+SETTINGS_DEFAULTS = {
+    "total_amount": 30000,
+    "transaction_min": 1800,
+    "transaction_max": 2500,
+    "max_trades_by_day": 3,
+}
+
+
+def get_settings_grid(**values: List[float]) -> pd.DataFrame:
+    """
+    Cartesian product of the given settings values, e.g. get_settings_grid(total_amount=[20000, 30000]).
+    Missing settings take the default values of simulate_trades.
+    """
+    for setting in values:
+        if setting not in SETTINGS_DEFAULTS:
+            raise ValueError(f"Unknown setting {setting}")
+    settings_values = {setting: values.get(setting, [default]) for setting, default in SETTINGS_DEFAULTS.items()}
+    return pd.DataFrame(
+        data=list(product(*settings_values.values())),
+        columns=list(settings_values.keys())
+    )
+
+
+def simulate_trades_batch(df: pd.DataFrame, settings: pd.DataFrame, strategy: str = UNKNOWN_STRATEGY) -> pd.DataFrame:
+    """
+    Runs simulate_trades for every row of settings in one pass over the trades: the trades are grouped by date once,
+    and the cash bookkeeping of all the settings is done with arrays.
+    Returns the settings with their final equity, fees and trades number.
+    """
+    with metrics.SIMULATE_TRADES_SECONDS.labels(strategy=strategy).time():
+        return _simulate_trades_batch(df, settings)
+
+
+def _simulate_trades_batch(df: pd.DataFrame, settings: pd.DataFrame) -> pd.DataFrame:
+    settings = settings.copy()
+    for setting, default in SETTINGS_DEFAULTS.items():
+        if setting not in settings.columns:
+            settings.loc[:, setting] = default
+    settings.reset_index(drop=True, inplace=True)
+    settings_number = settings.shape[0]
+
+    transaction_min = settings["transaction_min"].to_numpy(dtype=float)
+    transaction_max = settings["transaction_max"].to_numpy(dtype=float)
+    max_trades_by_day = settings["max_trades_by_day"].to_numpy(dtype=int)
+    current_amount = settings["total_amount"].to_numpy(dtype=float).copy()
+    trade_fees = np.zeros(settings_number)
+    trades_number = np.zeros(settings_number, dtype=int)
+
+    df = sort_trades(df)
+    tickers_indexes = {ticker: i for i, ticker in enumerate(df["Ticker"].unique())}
+    # open_trades[s, t]: trades of the ticker t opened before the current date and not exited yet, for setting s
+    open_trades = np.zeros((settings_number, len(tickers_indexes)), dtype=int)
+    trades_by_date = {
+        date: list(zip(
+            day_trades["Ticker"].map(tickers_indexes),
+            day_trades["win_percent"],
+            day_trades["exit_date"],
+            day_trades["exit"]
+        ))
+        for date, day_trades in df.groupby("Date", sort=False)
+    }
+
+    returned_money_by_date = dict()
+    closed_trades_by_date = dict()
+    date = df["Date"].min()
+    while date < datetime.now():
+        # recuperate money
+        current_amount += returned_money_by_date.pop(date, 0)
+        for ticker_index, traded in closed_trades_by_date.pop(date, []):
+            open_trades[:, ticker_index] -= traded
+
+        day_trades = trades_by_date.get(date, [])
+        day_trades_number = np.minimum(len(day_trades), max_trades_by_day)
+        active = day_trades_number > 0
+        money_by_trade = np.divide(
+            current_amount, day_trades_number, out=np.zeros(settings_number), where=active
+        )
+        active &= money_by_trade >= transaction_min
+
+        if not active.any():
+            date += timedelta(days=1)
+            continue
+
+        money_by_trade = np.minimum(money_by_trade, transaction_max)
+
+        day_traded_number = np.zeros(settings_number, dtype=int)
+        opened_trades = []
+        for ticker_index, win_percent, exit_days, exit_date in day_trades:
+            traded = active & (day_traded_number < day_trades_number) & (open_trades[:, ticker_index] < 2)
+            if not traded.any():
+                continue
+
+            day_traded_number += traded
+            trades_number += traded
+            trade_fees += 2 * traded
+            invested_money = np.where(traded, money_by_trade, 0)
+            current_amount -= invested_money
+
+            money_return_date = date + timedelta(days=exit_days)
+            returned_money_by_date[money_return_date] = \
+                returned_money_by_date.get(money_return_date, 0) + (1 + win_percent / 100.0) * invested_money
+            closed_trades_by_date.setdefault(exit_date, []).append((ticker_index, traded.astype(int)))
+            opened_trades.append((ticker_index, traded.astype(int)))
+
+        # trades opened today are only counted from tomorrow
+        for ticker_index, traded in opened_trades:
+            open_trades[:, ticker_index] += traded
+
+        date += timedelta(days=1)
+
+    rest_money = np.zeros(settings_number)
+    for money in returned_money_by_date.values():
+        rest_money += money
+
+    settings.loc[:, "final_equity"] = rest_money + current_amount
+    settings.loc[:, "fees"] = trade_fees
+    settings.loc[:, "trades_number"] = trades_number
+    return settings
@@ -0,0 +1,71 @@
+import os
+import heapq
+import logging
+from itertools import groupby
+from typing import Iterator, List, Tuple
+
+import pandas as pd
+
+from tadawol.simulator import sort_trades
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+SPILLED_DATE_COLUMNS = ["Date", "exit"]
+
+
+def _iter_file_days(path: str, rows_chunk_size: int) -> Iterator[Tuple[pd.Timestamp, pd.DataFrame]]:
+    # the trades of a file are sorted by date: a date can only be split between two consecutive chunks of rows
+    pending = None
+    for rows in pd.read_csv(path, chunksize=rows_chunk_size, parse_dates=SPILLED_DATE_COLUMNS):
+        if rows.empty:
+            continue
+        if pending is not None:
+            rows = pd.concat([pending, rows], axis=0)
+        last_date = rows["Date"].iloc[-1]
+        pending = rows[rows["Date"] == last_date]
+        for date, day_trades in rows[rows["Date"] < last_date].groupby("Date", sort=False):
+            yield date, day_trades
+
+    if pending is not None and not pending.empty:
+        yield pending["Date"].iloc[0], pending
+
+
+class SpilledTrades:
+    """
+    Trades written to disk chunk by chunk, one csv file per chunk sorted with sort_trades, and read back as a stream
+    of (date, trades of the date) by ascending date.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def paths(self) -> List[str]:
+        return sorted(
+            os.path.join(self.directory, f) for f in os.listdir(self.directory)
+            if f.startswith("trades_") and f.endswith(".csv")
+        )
+
+    def append(self, trades: pd.DataFrame):
+        if trades.empty:
+            return
+        path = os.path.join(self.directory, f"trades_{len(self.paths):05d}.csv")
+        sort_trades(trades).to_csv(path, index=False)
+        logger.info(f"[Spill] {trades.shape[0]} trades are written in {path}")
+
+    def clear(self):
+        for path in self.paths:
+            os.remove(path)
+
+    def iter_days(self, rows_chunk_size: int = 10 ** 5) -> Iterator[Tuple[pd.Timestamp, pd.DataFrame]]:
+        files_days = [_iter_file_days(path, rows_chunk_size) for path in self.paths]
+        merged_days = heapq.merge(*files_days, key=lambda day: day[0])
+        for date, days in groupby(merged_days, key=lambda day: day[0]):
+            # the trades of a date come from several files, they are sorted as in simulate_trades
+            yield date, sort_trades(pd.concat([day_trades for _, day_trades in days], axis=0))
+
+    def read(self) -> pd.DataFrame:
+        return pd.concat([pd.read_csv(path, parse_dates=SPILLED_DATE_COLUMNS) for path in self.paths], axis=0)
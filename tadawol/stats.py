@@ -1,5 +1,5 @@
 import math
-from typing import Tuple
+from typing import Tuple, List, NamedTuple
 
 import pandas as pd
 
@@ -103,6 +103,48 @@ def add_bollinger_bands(df: pd.DataFrame, window: int = 20) -> Tuple[pd.DataFram
     return df, "low_bb", "high_bb"
 
 
+class Indicator(NamedTuple):
+    """
+    Declaration of an indicator computed by one of the functions of this module. The column of an indicator can be
+    the column of another indicator, declared before it.
+    """
+    function: str
+    window: int
+    column: str = "Close"
+
+    @property
+    def column_name(self) -> str:
+        if self.function == "atr":
+            return f"atr_{self.window}"
+        return f"{self.column}_{self.function}_{self.window}"
+
+
+def add_indicators(df: pd.DataFrame, indicators: List[Indicator]) -> pd.DataFrame:
+    """
+    Adds the columns of the given indicators to a single ticker dataframe, each indicator being computed once.
+    """
+    for indicator in indicators:
+        if indicator.column_name in df.columns:
+            continue
+
+        if indicator.function == "ema":
+            df, _ = add_ema(df, window=indicator.window, column=indicator.column)
+        elif indicator.function == "sma":
+            df, _ = add_sma(df, window=indicator.window, column=indicator.column)
+        elif indicator.function == "max":
+            df, _ = add_max(df, window=indicator.window, column=indicator.column)
+        elif indicator.function == "atr":
+            df, column_name = add_atr(df, window=indicator.window)
+            df.rename(columns={column_name: indicator.column_name}, inplace=True)
+        elif indicator.function == "rsi":
+            df, column_name = add_rsi(df, window=indicator.window, column=indicator.column)
+            df.rename(columns={column_name: indicator.column_name}, inplace=True)
+        else:
+            raise ValueError(f"Unknown indicator function {indicator.function}")
+
+    return df
+
+
 if __name__ == "__main__":
     from tadawol.history import get_historical_data
 
@@ -1,22 +1,40 @@
 from abc import ABC, abstractmethod
 from math import inf
-from typing import List, Any, Type, Optional
+from typing import List, Any, Type, Optional, Dict, Tuple, Iterable, Iterator
 import logging
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
 from click import progressbar
 
 from ..simulator import simulate_trades
+from ..stats import Indicator, add_indicators
 
 
+import numpy as np
 import pandas as pd
 
-from ..history import get_historical_data, get_top_tickers
-from ..utils import get_last_week_entries, clean_results, get_search_grid
+from ..history import get_historical_data, get_top_tickers, iter_historical_data_chunks
+from ..spill import SpilledTrades
+from ..panel import TickerPanel, map_shards
+from ..utils import get_last_week_entries, clean_results, filter_universe, mask_untradable_entries
+from ..search_space import SearchSpace, get_combination_id
+from ..config import UniverseFilterConfig
+from ..progress import ProgressReporter
+from .. import metrics
+from .. import grid_runs, universe, positions
+from ..profiler import StageProfiler, profile_stage
+from ..cache import TradesCache, get_trades_key, get_data_version, get_code_version
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# columns of the trades kept by the lean mode, in addition to the hint columns of the strategy
+LEAN_TRADES_COLUMNS = ["Date", "Ticker", "Open", "High", "Low", "Close", "Volume", "entry"]
+
+# columns of the entries and exits signals, the entries also have the hint columns of the strategy
+SIGNALS_COLUMNS = ["Date", "Ticker", "Close", "week_previous_entries", "exit_reason"]
+
 
 class BaseStrategy(ABC):
 
@@ -27,16 +45,77 @@ class BaseStrategy(ABC):
         self.max_keep_days = max_keep_days
         self.logger = logger
         self.name = "abstract"
+        self.progress_reporter_id: Optional[str] = None
+
+    @abstractmethod
+    def get_indicators(self) -> List[Indicator]:
+        """
+        Indicators needed by the entry and go-on rules of the strategy.
+        """
+        pass
 
     @abstractmethod
-    def add_entries_for_ticker(self, ticker_data: pd.DataFrame):
+    def add_entries_from_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds the entry and go-on columns to a single ticker dataframe, sorted by date, that already has the columns of
+        the strategy indicators. Existing columns must not be modified since they can be shared with other strategies.
+        """
         pass
 
+    def add_panel_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds the columns that are computed for all the tickers at once, before the per ticker rules.
+        Returns a new dataframe: the given one can be shared.
+        """
+        return df
+
+    def add_entries_for_ticker(self, ticker_data: pd.DataFrame) -> pd.DataFrame:
+        # the indicators and rules only add columns, a shallow copy keeps the given frame unchanged
+        ticker_data = ticker_data.copy(deep=False)
+        if not ticker_data["Date"].is_monotonic_increasing:
+            ticker_data.sort_values(by="Date", ascending=True, inplace=True)
+        ticker_data.reset_index(drop=True, inplace=True)
+        assert ticker_data["Ticker"].nunique() == 1
+
+        df = add_indicators(ticker_data, self.get_indicators())
+        return self.add_entries_from_indicators(df)
+
+    def get_parameters(self) -> Dict[str, Any]:
+        """
+        Parameters that define the trades of the strategy, used to identify its cached results.
+        """
+        return {
+            key: value for key, value in vars(self).items()
+            if isinstance(value, (int, float, str, bool)) and key != "progress_reporter_id"
+        }
+
+    @classmethod
+    def get_code_modules(cls) -> Tuple[str, ...]:
+        """
+        Modules whose code computes the trades of the strategy: its classes modules, the indicators, the panel of the
+        tickers rows and the results cleaning. The strategies reading other modules add them.
+        """
+        strategy_modules = [c.__module__ for c in cls.__mro__ if issubclass(c, BaseStrategy)]
+        return tuple(sorted(set(
+            strategy_modules + [add_indicators.__module__, TickerPanel.__module__, clean_results.__module__]
+        )))
+
     @staticmethod
     @abstractmethod
     def get_grid() -> List[Any]:
         pass
 
+    @staticmethod
+    def is_valid_combination(combination: List[Any]) -> bool:
+        """
+        Whether a combination of the grid gives valid parameters, the invalid ones are skipped by the grid searches.
+        """
+        return True
+
+    @classmethod
+    def get_search_space(cls) -> SearchSpace:
+        return SearchSpace(cls.get_grid(), cls.is_valid_combination)
+
     @staticmethod
     @abstractmethod
     def get_hint_columns() -> List[str]:
@@ -46,7 +125,8 @@ class BaseStrategy(ABC):
         assert "entry" in list(df.columns)
         assert df["Ticker"].nunique() == 1
 
-        df.sort_values(by="Date", inplace=True, ascending=True)
+        if not df["Date"].is_monotonic_increasing:
+            df.sort_values(by="Date", inplace=True, ascending=True)
         df.reset_index(drop=True, inplace=True)
         for i in range(1, self.max_keep_days + 1):
             df.loc[:, f"Close_{i}"] = df["Close"].shift(-i)
@@ -87,43 +167,214 @@ class BaseStrategy(ABC):
 
         return df
 
-    def _get_trades(self, df: pd.DataFrame, tickers_to_simulate: Optional[List[str]] = None):
+    def get_lean_exit_prices_for_ticker(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Same exits as get_exit_prices_for_ticker, computed without the shifted columns: only the entry rows and the
+        columns needed by the trades are kept.
+        """
+        assert "entry" in list(df.columns)
+        assert df["Ticker"].nunique() == 1
+
+        if not df["Date"].is_monotonic_increasing:
+            df = df.sort_values(by="Date", ascending=True)
+
+        closes = df["Close"].to_numpy()
+        opens = df["Open"].to_numpy()
+        go_ons = df["go-on"].to_numpy()
+        dates = df["Date"].tolist()
+        rows_number = df.shape[0]
+        max_win = 1 + self.max_win_percent / 100.0
+        max_lose = 1 - self.max_lose_percent / 100.0
+
+        def get_exit_data(index):
+            close = closes[index]
+            for day in range(1, self.max_keep_days + 1):
+                day_index = index + day
+                if day_index >= rows_number or pd.isna(closes[day_index]):
+                    return None, None, None, None
+                day_close = closes[day_index]
+                day_date = dates[day_index]
+                if day_close > max_win * close:
+                    return max(opens[day_index], max_win * close), day, "max win", day_date
+                if day_close < max_lose * close:
+                    return min(opens[day_index], max_lose * close), day, "max lose", day_date
+                if not go_ons[day_index]:
+                    return day_close, day, "go-on lost", day_date
+
+            return closes[index + self.max_keep_days], self.max_keep_days, "end days", dates[index + self.max_keep_days]
+
+        entries_positions = np.flatnonzero(df["entry"].to_numpy(dtype=bool))
+        columns = [c for c in LEAN_TRADES_COLUMNS + self.get_hint_columns() if c in df.columns]
+        entries = df.iloc[entries_positions][columns].copy()
+        entries.index = entries_positions
+        exits_data = [get_exit_data(position) for position in entries_positions]
+        entries.loc[:, "exit_price"] = [x[0] for x in exits_data]
+        entries.loc[:, "exit_date"] = [x[1] for x in exits_data]
+        entries.loc[:, "exit_reason"] = [x[2] for x in exits_data]
+        entries.loc[:, "exit"] = [x[3] for x in exits_data]
+
+        return entries
+
+    def _get_trades(
+            self,
+            df: pd.DataFrame,
+            tickers_to_simulate: Optional[List[str]] = None,
+            profiler: Optional[StageProfiler] = None,
+            use_cache: bool = False,
+            lean: bool = False,
+            processes: Optional[int] = None
+    ):
+        """
+        :param lean: keep only the entry rows and the trades columns of each ticker, instead of all its rows with their
+        intermediate and shifted columns
+        :param processes: number of processes computing the tickers in parallel, see _get_exits_in_pool. Celery prefork
+        children can not start processes: use it in a worker with the solo or threads pool.
+        """
 
-        df = df.copy(deep=True)
         if tickers_to_simulate is not None:
             df = df[df["Ticker"].isin(tickers_to_simulate)]
+
+        universe_filter = UniverseFilterConfig()
+        cache_key = None
+        if use_cache:
+            strategy_class = type(self)
+            cache_key = get_trades_key(
+                f"{strategy_class.__module__}.{strategy_class.__qualname__}",
+                dict(self.get_parameters(), lean=lean, **universe_filter.dict()),
+                list(df["Ticker"].unique()),
+                get_data_version(df),
+                get_code_version(self.get_code_modules())
+            )
+            trades = TradesCache().get(cache_key)
+            if trades is not None:
+                logger.info(f"Trades are loaded from cache for {self.name}")
+                return trades
+
+        panel = TickerPanel.from_frame(self.add_panel_features(filter_universe(df, universe_filter)))
         data = []
-        tickers_number = df["Ticker"].nunique()
+        tickers_number = len(panel.tickers)
         logger.info(f"Simulating strategy for {tickers_number} tickers")
+        progress_reporter = None
+        if self.progress_reporter_id is not None:
+            progress_reporter = ProgressReporter(self.progress_reporter_id, total=tickers_number, unit="tickers")
+
+        if processes is not None and processes > 1:
+            data = self._get_exits_in_pool(panel, universe_filter, lean, processes, progress_reporter)
+        else:
+            current_tickers_number = 0
+            for ticker, ticker_data in panel.iter_frames():
+                data.append(self._get_ticker_exits(ticker, ticker_data, universe_filter, lean, profiler))
+
+                current_tickers_number += 1
+                if progress_reporter is not None:
+                    progress_reporter.advance(ticker=ticker)
+                if current_tickers_number % 20 == 0:
+                    logger.info(f"Simulation in progress : {round(100 * current_tickers_number / tickers_number)}%")
+
+        if progress_reporter is not None:
+            progress_reporter.finish()
+        df = self._get_trades_from_exits(data, universe_filter, profiler)
+
+        if cache_key is not None and df is not None:
+            TradesCache().set(cache_key, df)
+        return df
 
-        current_tickers_number = 0
-        for ticker, ticker_data in df.groupby(["Ticker"]):
-            ticker_data = ticker_data.sort_values(by=["Date"], ascending=True)
-            ticker_data.reset_index(drop=True, inplace=True)
+    def _get_ticker_exits(
+            self,
+            ticker: str,
+            ticker_data: pd.DataFrame,
+            universe_filter: UniverseFilterConfig,
+            lean: bool,
+            profiler: Optional[StageProfiler] = None
+    ) -> pd.DataFrame:
+        with metrics.STRATEGY_STAGE_SECONDS.labels(strategy=self.name, stage="add_entries_for_ticker").time(), \
+                profile_stage(profiler, "add_entries_for_ticker", ticker):
             ticker_entries = self.add_entries_for_ticker(ticker_data)
-            ticker_exits = self.get_exit_prices_for_ticker(ticker_entries)
-
-            data.append(ticker_exits)
-
-            current_tickers_number += 1
-            if current_tickers_number % 20 == 0:
-                logger.info(f"Simulation in progress : {round(100 * current_tickers_number / tickers_number)}%")
+        ticker_entries = mask_untradable_entries(ticker_entries, universe_filter)
+        with metrics.STRATEGY_STAGE_SECONDS.labels(strategy=self.name, stage="get_exit_prices_for_ticker").time(), \
+                profile_stage(profiler, "get_exit_prices_for_ticker", ticker):
+            if lean:
+                return self.get_lean_exit_prices_for_ticker(ticker_entries)
+            return self.get_exit_prices_for_ticker(ticker_entries)
+
+    def _get_exits_in_pool(
+            self,
+            panel: TickerPanel,
+            universe_filter: UniverseFilterConfig,
+            lean: bool,
+            processes: int,
+            progress_reporter: Optional[ProgressReporter] = None
+    ) -> List[pd.DataFrame]:
+        """
+        Computes the exits of the tickers of the panel in a pool of processes, see map_shards. Each worker only
+        receives the rows of its shard and the shards are merged in the panel order: the result is the serial one.
+        The stages are not profiled in the workers.
+        """
+        logger.info(f"Simulating {len(panel.tickers)} tickers on {processes} processes")
+
+        def on_shard_done(shard: TickerPanel):
+            if progress_reporter is not None:
+                progress_reporter.advance(steps=len(shard.tickers))
+
+        shards_exits = map_shards(_get_shard_exits, panel, processes, (self, universe_filter, lean), on_shard_done)
+        return [ticker_exits for shard_exits in shards_exits for ticker_exits in shard_exits]
 
+    @staticmethod
+    def _get_trades_from_exits(
+            data: List[pd.DataFrame],
+            universe_filter: UniverseFilterConfig,
+            profiler: Optional[StageProfiler] = None
+    ):
         if len(data) == 0:
             return None
         df = pd.concat(data, axis=0)
         df = df[df["entry"]]
 
         df.loc[:, "win_percent"] = 100 * (df["exit_price"] - df["Close"]) / df["Close"]
-        df = clean_results(df)
-        df = get_last_week_entries(df)
+        with profile_stage(profiler, "clean_results"):
+            df = clean_results(df, universe_filter)
+        with profile_stage(profiler, "get_last_week_entries"):
+            df = get_last_week_entries(df)
         return df
 
-    def simulate(self, tickers_to_simulate: Optional[List[str]] = None):
-        df = get_historical_data()
-        trades = self._get_trades(df, tickers_to_simulate)
+    def simulate(
+            self,
+            tickers_to_simulate: Optional[List[str]] = None,
+            profiler: Optional[StageProfiler] = None,
+            use_cache: bool = False,
+            lean: bool = False,
+            processes: Optional[int] = None
+    ):
+        """
+        :param profiler: when given, records the time and memory spent in each backtest stage
+        :param use_cache: reuse the trades already computed with the same parameters on the same data
+        :param lean: reduce the memory peak by keeping only the trades columns, see _get_trades
+        :param processes: number of processes computing the tickers in parallel, see _get_trades
+        """
+        with profile_stage(profiler, "data_load"):
+            df = get_historical_data()
+        trades = self._get_trades(df, tickers_to_simulate, profiler, use_cache, lean, processes)
         return trades[trades['exit_price'].notna()]
 
+    def simulate_out_of_core(
+            self,
+            spill_directory: str,
+            tickers_chunk_size: int = 50,
+            tickers_to_simulate: Optional[List[str]] = None,
+            profiler: Optional[StageProfiler] = None
+    ) -> SpilledTrades:
+        """
+        simulate() with a bounded memory peak: the history is loaded by chunks of tickers and the trades of each chunk
+        are written to spill_directory. The returned trades can be simulated with simulator.simulate_trades_stream.
+        """
+        spilled_trades = SpilledTrades(spill_directory)
+        spilled_trades.clear()
+        for df in iter_historical_data_chunks(tickers_chunk_size, tickers_to_simulate):
+            trades = self._get_trades(df, profiler=profiler, lean=True)
+            if trades is not None:
+                spilled_trades.append(trades[trades['exit_price'].notna()])
+        return spilled_trades
+
     def add_entry_hints(self, df: pd.DataFrame):
 
         if df.empty:
@@ -139,20 +390,50 @@ class BaseStrategy(ABC):
 
         return df
 
-    def get_today_trades_and_exits(self, df: pd.DataFrame):
+    def get_today_trades_and_exits(self, df: pd.DataFrame, live: bool = False):
+        """
+        :param live: use and update the open positions book of the strategy instead of simulating all the trades of df,
+        see get_live_signals
+        """
+        if live:
+            today_date = self._get_today_date()
+            today_trades, today_exits, open_positions = self.get_live_signals(
+                df, positions.load_positions(self.name, today_date)
+            )
+            positions.save_positions(self.name, open_positions, today_date)
+            return today_trades, today_exits
+
+        _, today_trades, today_exits = self.get_trades_and_today_signals(df)
+        return today_trades, today_exits
+
+    def get_trades_and_today_signals(self, df: pd.DataFrame):
 
         assert "Ticker" in list(df.columns)
         assert "Close" in list(df.columns)
         assert "Date" in list(df.columns)
         trades = self._get_trades(df)
+        today_trades, today_exits = self.get_today_signals(trades)
+        return trades, today_trades, today_exits
+
+    @staticmethod
+    def _get_today_date() -> datetime:
         today = (datetime.now()).date()
-        today_date = datetime(today.year, today.month, today.day)
-        #today_date = datetime(2020, 11, 3)
+        #return datetime(2020, 11, 3)
+        return datetime(today.year, today.month, today.day)
+
+    def get_today_signals(self, trades: Optional[pd.DataFrame]):
+        """
+        :param trades: trades of _get_trades, None when no ticker is tradable: the signals are then empty
+        """
+        if trades is None:
+            trades = pd.DataFrame(columns=SIGNALS_COLUMNS + ["exit"])
+        today_date = self._get_today_date()
         today_trades = trades[trades["Date"] == today_date]
         today_exits = trades[trades["exit"] == today_date]
-        trades_columns = [
-            "Date", "Ticker", "Close", "week_previous_entries", "exit_reason"
-        ]
+        return self._format_today_trades(today_trades), today_exits
+
+    def _format_today_trades(self, today_trades: pd.DataFrame) -> pd.DataFrame:
+        trades_columns = list(SIGNALS_COLUMNS)
 
         if not today_trades.empty:
             hint_columns = self.get_hint_columns()
@@ -164,41 +445,338 @@ class BaseStrategy(ABC):
             today_trades = self.add_entry_hints(today_trades)
             trades_columns.extend(["max_lose", "invest", "shares_number"])
 
-        return today_trades[trades_columns], today_exits
-
-
-def get_best_config(strategy: Type[BaseStrategy]):
-    grid = strategy.get_grid()
-    search_grid = get_search_grid(grid)
-
-    tickers = get_top_tickers(100, 300)
+        return today_trades[trades_columns]
+
+    def get_open_positions_from_trades(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Open positions book built from the simulated trades of df, as of the bar before today: the entries before today
+        that are not exited yet on the previous bar. Today's exits of these positions are then found by
+        get_live_signals, as the next days exits.
+        """
+        df = df[df["Date"] < self._get_today_date()]
+        trades = self._get_trades(df, lean=True)
+        if trades is None:
+            return positions.get_empty_positions()
+        open_trades = trades[trades["exit_price"].isna()]
+
+        panel = TickerPanel.from_frame(df[["Ticker", "Date"]])
+        open_positions = []
+        for ticker, entry_date, close, week_previous_entries in zip(
+                open_trades["Ticker"], open_trades["Date"], open_trades["Close"], open_trades["week_previous_entries"]
+        ):
+            dates = panel.get_column(ticker, "Date")
+            open_positions.append({
+                "Ticker": ticker,
+                "Date": entry_date,
+                "Close": close,
+                "week_previous_entries": week_previous_entries,
+                "days_number": len(dates) - int(np.searchsorted(dates, np.datetime64(entry_date), side="right")),
+                "last_date": pd.Timestamp(dates[-1]),
+            })
+        return pd.DataFrame(open_positions, columns=positions.POSITIONS_COLUMNS)
+
+    def _get_position_exit(self, position: Dict[str, Any], ticker_entries: pd.DataFrame) -> Optional[Dict[str, Any]]:
+        """
+        Evaluates the exit rules of an open position on the bars after its last evaluated date, with the rules of
+        get_lean_exit_prices_for_ticker. The position is updated in place. Returns its exit, None if it is still open.
+        """
+        close = position["Close"]
+        max_win = 1 + self.max_win_percent / 100.0
+        max_lose = 1 - self.max_lose_percent / 100.0
+
+        new_bars = ticker_entries[ticker_entries["Date"] > position["last_date"]]
+        for day_date, day_open, day_close, go_on in zip(
+                new_bars["Date"], new_bars["Open"], new_bars["Close"], new_bars["go-on"]
+        ):
+            if pd.isna(day_close):
+                break
+            position["days_number"] += 1
+            position["last_date"] = day_date
+
+            if day_close > max_win * close:
+                exit_price, exit_reason = max(day_open, max_win * close), "max win"
+            elif day_close < max_lose * close:
+                exit_price, exit_reason = min(day_open, max_lose * close), "max lose"
+            elif not go_on:
+                exit_price, exit_reason = day_close, "go-on lost"
+            elif position["days_number"] >= self.max_keep_days:
+                exit_price, exit_reason = day_close, "end days"
+            else:
+                continue
+            return dict(
+                position,
+                exit_price=exit_price,
+                exit_date=position["days_number"],
+                exit_reason=exit_reason,
+                exit=day_date
+            )
+        return None
+
+    def get_live_signals(self, df: pd.DataFrame, open_positions: Optional[pd.DataFrame] = None):
+        """
+        Today's entries and the exits of the open positions, without simulating the past trades: the entries are only
+        taken on today's bar and the exit rules are only evaluated for the open positions, on their new bars. The rules
+        are only computed for the tickers with a bar today or an open position.
+        :param open_positions: open positions book, built from the trades of df when None
+        Returns today's entries, the exits and the updated open positions book.
+        """
+        today_date = self._get_today_date()
+        if open_positions is None:
+            open_positions = self.get_open_positions_from_trades(df)
+
+        positions_by_ticker: Dict[str, List[Dict[str, Any]]] = dict()
+        for position in open_positions.to_dict("records"):
+            positions_by_ticker.setdefault(position["Ticker"], []).append(position)
+
+        universe_filter = UniverseFilterConfig()
+        panel = TickerPanel.from_frame(self.add_panel_features(df))
+        entries = []
+        exits = []
+        kept_positions = []
+        for ticker in panel.tickers:
+            ticker_positions = positions_by_ticker.pop(ticker, [])
+            has_today_bar = panel.get_column(ticker, "Date")[-1] == np.datetime64(today_date)
+            if not has_today_bar and len(ticker_positions) == 0:
+                continue
+
+            ticker_entries = self.add_entries_for_ticker(panel.get_frame(ticker))
+            ticker_entries = mask_untradable_entries(ticker_entries, universe_filter)
+            for position in ticker_positions:
+                position_exit = self._get_position_exit(position, ticker_entries)
+                if position_exit is None:
+                    kept_positions.append(position)
+                else:
+                    exits.append(position_exit)
+
+            today_entry = ticker_entries.iloc[-1]
+            if has_today_bar and today_entry["entry"]:
+                last_week_entries = ticker_entries[
+                    (ticker_entries["Date"] > today_date - timedelta(days=7)) & (ticker_entries["Date"] < today_date)
+                ]
+                entries.append(dict(
+                    today_entry.to_dict(),
+                    week_previous_entries=min(int(last_week_entries["entry"].sum()), 4),
+                    exit_reason=None
+                ))
+
+        # positions of the tickers without bars in df
+        for ticker_positions in positions_by_ticker.values():
+            kept_positions.extend(ticker_positions)
+
+        new_positions = [
+            {**{column: entry[column] for column in ["Ticker", "Date", "Close", "week_previous_entries"]},
+             "days_number": 0, "last_date": entry["Date"]}
+            for entry in entries
+        ]
+        open_positions = pd.DataFrame(kept_positions + new_positions, columns=positions.POSITIONS_COLUMNS)
+        today_exits = pd.DataFrame(
+            exits, columns=positions.POSITIONS_COLUMNS + ["exit_price", "exit_date", "exit_reason", "exit"]
+        )
+        today_trades = pd.DataFrame(entries) if len(entries) > 0 else pd.DataFrame(columns=SIGNALS_COLUMNS)
+        logger.info(
+            f"{self.name}: {len(entries)} entries, {len(exits)} exits and {open_positions.shape[0]} open positions"
+        )
+        return self._format_today_trades(today_trades), today_exits, open_positions
+
+
+def _get_shard_exits(
+        shard: TickerPanel,
+        strategy: BaseStrategy,
+        universe_filter: UniverseFilterConfig,
+        lean: bool
+) -> List[pd.DataFrame]:
+    return [
+        strategy._get_ticker_exits(ticker, ticker_data, universe_filter, lean)
+        for ticker, ticker_data in shard.iter_frames()
+    ]
+
+
+def evaluate_combination(
+        strategy: Type[BaseStrategy],
+        combination: List[Any],
+        tickers: List[str],
+        profiler: Optional[StageProfiler] = None
+) -> Dict[str, Any]:
+    start_time = time.time()
+    # the grid searches reuse the trades of the combinations already evaluated on the same data
+    strategy_instance = strategy(*combination)
+    res = strategy_instance.simulate(tickers, profiler=profiler, use_cache=True)
+    with profile_stage(profiler, "simulate_trades"):
+        win, _, _ = simulate_trades(res, strategy=strategy_instance.name)
+    win_percent = round(100 * res[res["win_percent"] > 0].shape[0] / res.shape[0], 2)
+    return {
+        "combination": list(combination),
+        "combination_id": get_combination_id(combination),
+        "win": float(win),
+        "win_percent": float(win_percent),
+        "trades_number": int(res.shape[0]),
+        "runtime_seconds": round(time.time() - start_time, 2),
+    }
+
+
+class GridAggregator:
+    """
+    Tracks the best combination of a grid search as the evaluated combinations come, and publishes them as progress
+    events.
+    """
+
+    def __init__(
+            self,
+            strategy_name: str,
+            combinations: Iterable[List[Any]],
+            tickers_number: int,
+            run_id: Optional[str] = None,
+            universe_snapshot: Optional[str] = None,
+            sampling: Optional[Dict[str, Any]] = None
+    ):
+        """
+        :param universe_snapshot: universe of the tickers, saved with a new run before any combination is evaluated, see
+        get_grid_universe_snapshot
+        :param sampling: sampling, budget and seed of the combinations, saved with a new run, see get_grid_sampling
+        """
+        self.strategy_name = strategy_name
+        self.tickers_number = tickers_number
+        self.universe_snapshot = universe_snapshot
+        self.best_win = -inf
+        self.best_win_percent = 0
+        self.best_combination = None
+
+        if run_id is None:
+            run_id = f"grid_{strategy_name}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+        self.run_id = run_id
+        if grid_runs.get_metadata(run_id) is None:
+            grid_runs.save_metadata(
+                run_id, {"strategy": strategy_name, "universe_snapshot": universe_snapshot, **(sampling or {})}
+            )
+
+        self.done_combinations = set()
+        for result in grid_runs.load_results(run_id):
+            if result["strategy"] != strategy_name:
+                raise ValueError(f"Grid run {run_id} is a run of {result['strategy']}, not {strategy_name}")
+            self._update_best(result)
+            self.done_combinations.add(tuple(result["combination"]))
+        if len(self.done_combinations) > 0:
+            print(f"Resuming grid run {run_id}: {len(self.done_combinations)} combinations are already evaluated")
+
+        # the combinations are iterated twice, to count and to evaluate the remaining ones, without being allocated
+        self.combinations = combinations
+        self.remaining_combinations_number = sum(1 for _ in self.iter_remaining_combinations())
+        self.progress_reporter = ProgressReporter(
+            self.run_id, total=self.remaining_combinations_number, unit="combinations"
+        )
+        print(f"Results are saved and progress events are published under run id {self.run_id}")
+
+    def iter_remaining_combinations(self) -> Iterator[List[Any]]:
+        """
+        Combinations not evaluated yet by the run, generated lazily.
+        """
+        return (c for c in self.combinations if tuple(c) not in self.done_combinations)
+
+    def _update_best(self, result: Dict[str, Any]):
+        if result["win"] > self.best_win:
+            self.best_win = result["win"]
+            self.best_win_percent = result["win_percent"]
+            self.best_combination = result["combination"]
+
+    def add(self, result: Dict[str, Any]):
+        result = dict(result, strategy=self.strategy_name, universe_snapshot=self.universe_snapshot)
+        grid_runs.save_result(self.run_id, result)
+        self._update_best(result)
+
+        elapsed = time.time() - self.progress_reporter.start_time
+        self.progress_reporter.advance(
+            event="combination",
+            tickers_per_sec=round((self.progress_reporter.done + 1) * self.tickers_number / max(elapsed, 1e-6), 2),
+            tickers_number=self.tickers_number,
+            best_combination=self.best_combination,
+            best_win=self.best_win,
+            best_win_percent=self.best_win_percent,
+            **result
+        )
+
+    def finish(self):
+        self.progress_reporter.finish(
+            best_combination=self.best_combination,
+            best_win=self.best_win,
+            best_win_percent=self.best_win_percent
+        )
+        print("Best combination = ", self.best_combination)
+        print("Best win = ", self.best_win)
+        print("Best win % = ", self.best_win_percent)
+
+
+def get_grid_universe_snapshot(run_id: Optional[str] = None, universe_snapshot: Optional[str] = None) -> str:
+    """
+    Universe snapshot a grid run is pinned to, so that its tickers do not change while it runs or when it is resumed:
+    the snapshot of the resumed run, else the given one, else a snapshot of the current tickers list.
+    """
+    run_snapshot = grid_runs.get_universe_snapshot(run_id) if run_id is not None else None
+    if run_snapshot is not None:
+        if universe_snapshot is not None and universe_snapshot != run_snapshot:
+            raise ValueError(f"Grid run {run_id} is pinned to the universe snapshot {run_snapshot}")
+        return run_snapshot
+    return universe_snapshot or universe.save_snapshot()
+
+
+def get_grid_sampling(
+        run_id: Optional[str] = None,
+        sampling: Optional[str] = None,
+        budget: Optional[int] = None,
+        seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Sampling, budget and seed of a grid run, so that a resumed run evaluates the same sample: the ones the resumed run
+    was started with, else the given ones. The seed is 0 by default.
+    """
+    run_metadata = grid_runs.get_metadata(run_id) if run_id is not None else None
+    if run_metadata is None or "seed" not in run_metadata:
+        return {"sampling": sampling, "budget": budget, "seed": seed if seed is not None else 0}
+
+    run_sampling = {key: run_metadata[key] for key in ["sampling", "budget", "seed"]}
+    for key, value in [("sampling", sampling), ("budget", budget), ("seed", seed)]:
+        if value is not None and value != run_sampling[key]:
+            raise ValueError(f"Grid run {run_id} was started with the {key} {run_sampling[key]}, not {value}")
+    return run_sampling
+
+
+def get_best_config(
+        strategy: Type[BaseStrategy],
+        profile_path: Optional[str] = None,
+        run_id: Optional[str] = None,
+        sampling: Optional[str] = None,
+        budget: Optional[int] = None,
+        seed: Optional[int] = None,
+        universe_snapshot: Optional[str] = None
+):
+    """
+    :param profile_path: when given, the stages of all the simulations are profiled and the report is saved there
+    :param run_id: grid run to resume, its already evaluated combinations are skipped
+    :param sampling: "random" or "lhs" to evaluate a sample of budget combinations instead of the whole grid, a resumed
+    run keeps its sampling, see get_grid_sampling
+    :param universe_snapshot: universe to take the tickers from, see get_grid_universe_snapshot
+    """
+    grid_sampling = get_grid_sampling(run_id, sampling, budget, seed)
+    search_grid = strategy.get_search_space().get_combinations(**grid_sampling)
+
+    universe_snapshot = get_grid_universe_snapshot(run_id, universe_snapshot)
+    tickers = get_top_tickers(100, 300, universe_snapshot)
 
-    best_win = -inf
-    best_win_percent = 0
-    best_combination = None
     logger.setLevel(logging.ERROR)
-    simulations_number = len(search_grid)
-    i = 1
+    aggregator = GridAggregator(
+        strategy.__name__, search_grid, len(tickers), run_id, universe_snapshot, grid_sampling
+    )
+    profiler = StageProfiler() if profile_path is not None else None
 
-    with progressbar(search_grid) as combinations:
+    with progressbar(
+            aggregator.iter_remaining_combinations(), length=aggregator.remaining_combinations_number
+    ) as combinations:
 
         for combination in combinations:
-            r = strategy(*combination)
-            res = r.simulate(tickers)
-            current_win, _, _ = simulate_trades(res)
-            win_percent = round(100 * res[res["win_percent"] > 0].shape[0] / res.shape[0], 2)
-            if current_win > best_win:
-                best_win = current_win
-                best_win_percent = win_percent
-                best_combination = combination
-
-            print(f" Simulation : {i}/{simulations_number}: Best combination = ", best_combination)
-            print(f" Simulation : {i}/{simulations_number}:Best win = ", best_win)
-            print(f" Simulation : {i}/{simulations_number}:Best win %= ", best_win_percent)
-            print("-----------------------------------------------------")
-
-            i += 1
-
-        print("Best combination = ", best_combination)
-        print("Best win = ", best_win)
-        print("Best win % = ", best_win_percent)
+            aggregator.add(evaluate_combination(strategy, combination, tickers, profiler))
+
+        aggregator.finish()
+
+    if profiler is not None:
+        profiler.stop()
+        profiler.save(profile_path)
+        print(f"Profile report is saved in {profile_path}")
@@ -1,9 +1,11 @@
-from typing import List
+from typing import List, Optional, Tuple
+import numpy as np
 import pandas as pd
 
 from ..strategies import base_strategy
 from tadawol import stats
 from tadawol import earnings
+from tadawol.cache import get_data_version
 from math import inf
 
 
@@ -15,8 +17,13 @@ class Earnings(base_strategy.BaseStrategy):
             long_window: int = 50,
             max_lose_percent: int = 8,
             max_win_percent: int = 15,
-            max_keep_days: int = 15
+            max_keep_days: int = 15,
+            earnings_df: Optional[pd.DataFrame] = None,
+            max_surprise_age_days: int = 100
     ):
+        """
+        :param max_surprise_age_days: age after which the surprise of the last earnings is stale and gives no entry
+        """
         super().__init__(
             max_lose_percent=max_lose_percent,
             max_win_percent=max_win_percent,
@@ -25,42 +32,50 @@ class Earnings(base_strategy.BaseStrategy):
 
         self.short_window = short_window
         self.long_window = long_window
+        self.max_surprise_age_days = max_surprise_age_days
 
-        earnings.update_data()
-        self.earnings_df = earnings.get_earnings_df()
+        if earnings_df is None:
+            earnings.update_data()
+            earnings_df = earnings.get_earnings_df()
+        self.earnings_df = earnings_df.copy(deep=True)
         self.earnings_df.rename(columns={"ticker": "Ticker"}, inplace=True)
+        self.earnings_version = get_data_version(self.earnings_df)
+        surprises_df = self.earnings_df.loc[
+            self.earnings_df["epssurprisepct"].notna(), ["Ticker", "Date", "epssurprisepct"]
+        ]
+        surprises_df.loc[:, "Date"] = pd.to_datetime(surprises_df["Date"])
+        self.surprises_df = surprises_df.sort_values(by="Date", kind="mergesort")
 
         self.name = "Earnings"
 
-    def add_entries_for_ticker(self, ticker_data: pd.DataFrame, **kwargs):
-        ticker_data = ticker_data.copy(deep=True)
-        ticker_data.sort_values(by="Date", ascending=True, inplace=True)
-        ticker_data.reset_index(drop=True, inplace=True)
-        assert ticker_data["Ticker"].nunique() == 1
-
-        # get ticker earnings
-        df, long_window_ema_column = stats.add_ema(ticker_data, window=self.long_window)
-        df, short_window_ema_column = stats.add_ema(df, window=self.short_window)
+    @classmethod
+    def get_code_modules(cls) -> Tuple[str, ...]:
+        # the surprises of the entries are computed by the earnings module
+        return tuple(sorted(set(super().get_code_modules() + (earnings.__name__,))))
 
-        df.loc[:, "long_ema_evolution"] = df[long_window_ema_column] - df[long_window_ema_column].shift(1)
-        df.loc[:, "short_ema_evolution"] = df[short_window_ema_column] - df[short_window_ema_column].shift(1)
+    def get_indicators(self) -> List[stats.Indicator]:
+        return [
+            stats.Indicator("ema", self.long_window),
+            stats.Indicator("ema", self.short_window),
+        ]
 
-        ticker = ticker_data["Ticker"].unique()[0]
-        ticker_earnings = self.earnings_df[self.earnings_df["Ticker"] == ticker]
-        df = pd.merge(df, ticker_earnings, on=["Date", "Ticker"], how="left")
-        df.sort_values(by="Date", ascending=True, inplace=True)
-        for i in range(1, 4):
-            df.loc[:, f"earnings_{i}"] = df["epssurprisepct"].shift(i)
+    def add_panel_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds the surprise of the last earnings before each date, forward filled up to max_surprise_age_days days.
+        """
+        df = df.copy(deep=False)
+        last_surprises = earnings.get_latest_surprises(df, self.surprises_df, self.max_surprise_age_days)
+        df.loc[:, "last_surprise"] = np.nan_to_num(last_surprises, nan=-inf)
+        return df
 
-        def last_surprise(row):
-            for i in range(1, 4):
-                last_surprise = row[f"earnings_{i}"]
-                if not pd.isna(last_surprise):
-                    return last_surprise
+    def add_entries_from_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        long_window_ema_column, short_window_ema_column = [indicator.column_name for indicator in self.get_indicators()]
 
-            return -inf
+        df.loc[:, "long_ema_evolution"] = df[long_window_ema_column] - df[long_window_ema_column].shift(1)
+        df.loc[:, "short_ema_evolution"] = df[short_window_ema_column] - df[short_window_ema_column].shift(1)
 
-        df.loc[:, "last_surprise"] = df.apply(last_surprise, axis=1)
+        if "last_surprise" not in df.columns:
+            df = self.add_panel_features(df)
 
         df.loc[:, "entry"] = (df["short_ema_evolution"] > 0) & (df["last_surprise"] > 0)
 
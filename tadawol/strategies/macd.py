@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, List
 import pandas as pd
 
 from ..strategies import base_strategy
@@ -34,15 +34,24 @@ class MACD(base_strategy.BaseStrategy):
 
         self.name = "MACD"
 
-    def add_entries_for_ticker(self, ticker_data: pd.DataFrame):
-        ticker_data = ticker_data.copy(deep=True)
-        ticker_data.sort_values(by="Date", ascending=True, inplace=True)
-        ticker_data.reset_index(drop=True, inplace=True)
-        assert ticker_data["Ticker"].nunique() == 1
+    def get_indicators(self) -> List[stats.Indicator]:
+        atr = stats.Indicator("atr", 14)
+        ema_21 = stats.Indicator("ema", 21)
+        return [
+            stats.Indicator("ema", self.long_window),
+            stats.Indicator("ema", self.short_window),
+            atr,
+            stats.Indicator("sma", 3, atr.column_name),
+            ema_21,
+            stats.Indicator("ema", 2, ema_21.column_name),
+            stats.Indicator("rsi", 14),
+        ]
+
+    def add_entries_from_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        long_window_ema, short_window_ema, _, smoothed_atr, _, smoothed_ema_21, _ = \
+            [indicator.column_name for indicator in self.get_indicators()]
 
-        df, long_window_ema_column = stats.add_ema(ticker_data, window=self.long_window)
-        df, short_window_ema_column = stats.add_ema(df, window=self.short_window)
-        df["macd"] = df[short_window_ema_column] - df[long_window_ema_column]
+        df["macd"] = df[short_window_ema] - df[long_window_ema]
 
         df, macd_signal = stats.add_ema(df, window=self.macd_window, column="macd")
 
@@ -50,18 +59,12 @@ class MACD(base_strategy.BaseStrategy):
         df, ema_diff = stats.add_ema(df, window=3, column="emas_diff")
         df.loc[:, "evolution_emas_diff"] = (df[ema_diff] - df[ema_diff].shift(1)).rolling(window=self.ema_window_search).min()
 
-        df, atr_col = stats.add_atr(df, window=14)
-        df, smoothed_atr_col = stats.add_sma(df, column=atr_col, window=3)
-        df.loc[:, "evolution_atr"] = (df[smoothed_atr_col] - df[smoothed_atr_col].shift(1)).rolling(window=5).max()
+        df.loc[:, "evolution_atr"] = (df[smoothed_atr] - df[smoothed_atr].shift(1)).rolling(window=5).max()
         df.loc[:, "atr_decreasing"] = df["evolution_atr"] < 0
 
-        df, ema_21 = stats.add_ema(ticker_data, window=21)
-        df, smoothed_ema_21 = stats.add_ema(ticker_data, window=2, column=ema_21)
         df.loc[:, "ema_evolution"] = (df[smoothed_ema_21] - df[smoothed_ema_21].shift(1)).rolling(window=5).min()
         df.loc[:, "ema_increasing"] = df["ema_evolution"] > 0
 
-        df, rsi_column = stats.add_rsi(df)
-
         df.loc[:, "entry"] = (df["evolution_emas_diff"] > 0) & (df["emas_diff"] < 0)
 
         # go-on condition
@@ -81,6 +84,11 @@ class MACD(base_strategy.BaseStrategy):
             [7, 10, 15]
         ]
 
+    @staticmethod
+    def is_valid_combination(combination: List[Any]) -> bool:
+        short_window, long_window = combination[:2]
+        return short_window < long_window
+
     @staticmethod
     def get_hint_columns() -> List[str]:
         return ["atr_decreasing", "ema_increasing"]
@@ -0,0 +1,8 @@
+from .macd import MACD
+from .reverse import Reverse
+
+
+STRATEGIES = {
+    "MACD": MACD,
+    "Reverse": Reverse,
+}
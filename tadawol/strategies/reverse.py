@@ -26,20 +26,29 @@ class Reverse(base_strategy.BaseStrategy):
 
         self.name = "Reverse"
 
-    def add_entries_for_ticker(self, ticker_data: pd.DataFrame):
-        ticker_data = ticker_data.copy(deep=True)
-        ticker_data.sort_values(by="Date", ascending=True, inplace=True)
-        ticker_data.reset_index(drop=True, inplace=True)
-        assert ticker_data["Ticker"].nunique() == 1
-
-        df, ema_column = stats.add_ema(ticker_data, window=self.ema_window)
+    def get_indicators(self) -> List[stats.Indicator]:
+        ema = stats.Indicator("ema", self.ema_window)
         # smooth ema
-        df, ema_column = stats.add_sma(df, window=3, column=ema_column)
-
-        df, rsi_column = stats.add_rsi(df)
+        smoothed_ema = stats.Indicator("sma", 3, ema.column_name)
+        rsi = stats.Indicator("rsi", 14)
         # smooth rsi twice
-        df, rsi_column = stats.add_sma(df, window=3, column=rsi_column)
-        df, rsi_column = stats.add_sma(df, window=3, column=rsi_column)
+        smoothed_rsi = stats.Indicator("sma", 3, rsi.column_name)
+        twice_smoothed_rsi = stats.Indicator("sma", 3, smoothed_rsi.column_name)
+        atr = stats.Indicator("atr", 14)
+        return [
+            ema,
+            smoothed_ema,
+            rsi,
+            smoothed_rsi,
+            twice_smoothed_rsi,
+            atr,
+            stats.Indicator("sma", 5, atr.column_name),
+            stats.Indicator("sma", 52),
+        ]
+
+    def add_entries_from_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        indicators_columns = [indicator.column_name for indicator in self.get_indicators()]
+        ema_column, rsi_column, smoothed_atr_col, sma = [indicators_columns[i] for i in [1, 4, 6, 7]]
 
         df.loc[:, "evolution_rsi"] = (df[rsi_column] - df[rsi_column].shift(1)).rolling(window=self.evolution_window).min()
         df.loc[:, "rsi_increasing"] = df["evolution_rsi"] > 0
@@ -53,12 +62,9 @@ class Reverse(base_strategy.BaseStrategy):
 
         df.loc[:, "entry"] = (df["ema_increasing"]) & (df["fake_entry"] | df["fake_entry"].shift(1) | df["fake_entry"].shift(2) | df["fake_entry"].shift(3) | df["fake_entry"].shift(4))
 
-        df, atr_col = stats.add_atr(df, window=14)
-        df, smoothed_atr_col = stats.add_sma(df, column=atr_col, window=5)
         df.loc[:, "evolution_atr"] = (df[smoothed_atr_col] - df[smoothed_atr_col].shift(1)).rolling(window=5).max()
         df.loc[:, "atr_decreasing"] = df["evolution_atr"] < 0
 
-        df, sma = stats.add_sma(df, window=52)
         df.loc[:, "sma_diff"] =(df[sma] - df[sma].shift(1)).rolling(window=10).max()
         df.loc[:, "sma_decreasing"] = df["sma_diff"] < 0
 
@@ -0,0 +1,160 @@
+import logging
+from typing import List, Optional
+
+import pandas as pd
+
+from ..stats import Indicator, add_indicators
+from ..panel import TickerPanel, map_shards
+from ..progress import ProgressReporter
+from ..config import UniverseFilterConfig
+from ..utils import filter_universe, mask_untradable_entries
+from .. import metrics
+from .base_strategy import BaseStrategy
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+# strategy label of the stages shared by all the strategies of a run
+SHARED_STAGE_STRATEGY = "shared"
+
+
+def get_indicators_union(strategies: List[BaseStrategy]) -> List[Indicator]:
+    indicators = []
+    for strategy in strategies:
+        for indicator in strategy.get_indicators():
+            if indicator not in indicators:
+                indicators.append(indicator)
+    return indicators
+
+
+def get_strategies_indicators(
+        strategies: List[BaseStrategy],
+        df: pd.DataFrame
+) -> List[pd.DataFrame]:
+    """
+    Indicators of each strategy for the tradable tickers of df, computed once per ticker for all the strategies.
+    Returns a frame of the Ticker and Date columns and the indicators columns for each strategy, in the order of the
+    given strategies.
+    """
+    df = filter_universe(df, UniverseFilterConfig())
+    indicators = get_indicators_union(strategies)
+    columns = ["Ticker", "Date"] + [indicator.column_name for indicator in indicators]
+    features = [] if df.empty else [
+        add_indicators(ticker_data.copy(deep=False), indicators)[columns]
+        for _, ticker_data in TickerPanel.from_frame(df).iter_frames()
+    ]
+    if len(features) == 0:
+        features = pd.DataFrame(columns=columns)
+    else:
+        features = pd.concat(features, axis=0).reset_index(drop=True)
+    return [
+        features[["Ticker", "Date"] + [indicator.column_name for indicator in strategy.get_indicators()]]
+        for strategy in strategies
+    ]
+
+
+def _get_ticker_exits(
+        ticker_data: pd.DataFrame,
+        strategies: List[BaseStrategy],
+        indicators: List[Indicator],
+        universe_filter: UniverseFilterConfig,
+        lean: bool
+) -> List[pd.DataFrame]:
+    """
+    Exits of one ticker for each strategy.
+    """
+    # the indicators are shared by the strategies, their time is not given to one of them
+    with metrics.STRATEGY_STAGE_SECONDS.labels(strategy=SHARED_STAGE_STRATEGY, stage="add_indicators").time():
+        features = add_indicators(ticker_data, indicators)
+
+    ticker_exits = []
+    for strategy in strategies:
+        with metrics.STRATEGY_STAGE_SECONDS.labels(strategy=strategy.name, stage="add_entries_for_ticker").time():
+            # the shallow copy shares the indicators columns, the rules only add new columns to it
+            ticker_entries = strategy.add_entries_from_indicators(features.copy(deep=False))
+        ticker_entries = mask_untradable_entries(ticker_entries, universe_filter)
+        with metrics.STRATEGY_STAGE_SECONDS.labels(strategy=strategy.name, stage="get_exit_prices_for_ticker").time():
+            if lean:
+                ticker_exits.append(strategy.get_lean_exit_prices_for_ticker(ticker_entries))
+            else:
+                ticker_exits.append(strategy.get_exit_prices_for_ticker(ticker_entries))
+    return ticker_exits
+
+
+def _get_shard_exits(
+        shard: TickerPanel,
+        strategies: List[BaseStrategy],
+        indicators: List[Indicator],
+        universe_filter: UniverseFilterConfig,
+        lean: bool
+) -> List[List[pd.DataFrame]]:
+    return [
+        _get_ticker_exits(ticker_data, strategies, indicators, universe_filter, lean)
+        for _, ticker_data in shard.iter_frames()
+    ]
+
+
+def get_strategies_trades(
+        strategies: List[BaseStrategy],
+        df: pd.DataFrame,
+        tickers_to_simulate: Optional[List[str]] = None,
+        progress_reporter_id: Optional[str] = None,
+        lean: bool = False,
+        processes: Optional[int] = None
+) -> List[Optional[pd.DataFrame]]:
+    """
+    Computes the trades of several strategies in one pass: for each ticker, the indicators needed by all the strategies
+    are computed once in a shared feature frame, then each strategy only adds its entry and go-on rules on top of it.
+    Returns the trades of each strategy, in the order of the given strategies.
+    With lean, only the entry rows and the trades columns are kept, see BaseStrategy._get_trades.
+    With processes, the tickers are shared out to a pool of processes, see BaseStrategy._get_trades.
+    """
+    if tickers_to_simulate is not None:
+        df = df[df["Ticker"].isin(tickers_to_simulate)]
+    if df.empty:
+        # e.g. a chunk whose fetches all failed
+        return [None for _ in strategies]
+
+    universe_filter = UniverseFilterConfig()
+    df = filter_universe(df, universe_filter)
+    for strategy in strategies:
+        df = strategy.add_panel_features(df)
+    panel = TickerPanel.from_frame(df)
+    indicators = get_indicators_union(strategies)
+    tickers_number = len(panel.tickers)
+    logger.info(
+        f"Simulating {len(strategies)} strategies for {tickers_number} tickers with {len(indicators)} indicators"
+    )
+
+    progress_reporter = None
+    if progress_reporter_id is not None:
+        progress_reporter = ProgressReporter(progress_reporter_id, total=tickers_number, unit="tickers")
+
+    data = [[] for _ in strategies]
+    if processes is not None and processes > 1:
+        def on_shard_done(shard: TickerPanel):
+            if progress_reporter is not None:
+                progress_reporter.advance(steps=len(shard.tickers))
+
+        shards_exits = map_shards(
+            _get_shard_exits, panel, processes, (strategies, indicators, universe_filter, lean), on_shard_done
+        )
+        for ticker_exits in (ticker_exits for shard_exits in shards_exits for ticker_exits in shard_exits):
+            for strategy_data, strategy_exits in zip(data, ticker_exits):
+                strategy_data.append(strategy_exits)
+    else:
+        current_tickers_number = 0
+        for ticker, ticker_data in panel.iter_frames():
+            ticker_exits = _get_ticker_exits(ticker_data, strategies, indicators, universe_filter, lean)
+            for strategy_data, strategy_exits in zip(data, ticker_exits):
+                strategy_data.append(strategy_exits)
+
+            current_tickers_number += 1
+            if progress_reporter is not None:
+                progress_reporter.advance(ticker=ticker)
+            if current_tickers_number % 20 == 0:
+                logger.info(f"Simulation in progress : {round(100 * current_tickers_number / tickers_number)}%")
+
+    if progress_reporter is not None:
+        progress_reporter.finish()
+    return [BaseStrategy._get_trades_from_exits(strategy_data, universe_filter) for strategy_data in data]
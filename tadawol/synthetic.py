@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+SYNTHETIC_END_DATE = datetime(2020, 12, 31)
+TRADING_DAYS_BY_YEAR = 252
+
+
+def get_synthetic_tickers(tickers_number: int):
+    return [f"SYN{i:05d}" for i in range(tickers_number)]
+
+
+def get_synthetic_history(tickers_number: int, years_number: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Deterministic daily bars with the columns of the history file: a geometric random walk per ticker,
+    with prices and volumes spread over penny, small and large stocks.
+    """
+    random_state = np.random.RandomState(seed)
+    dates = pd.bdate_range(end=SYNTHETIC_END_DATE, periods=years_number * TRADING_DAYS_BY_YEAR)
+    days_number = len(dates)
+    shape = (tickers_number, days_number)
+
+    start_prices = np.exp(random_state.uniform(np.log(1), np.log(500), size=(tickers_number, 1)))
+    daily_returns = random_state.normal(0.0003, 0.02, size=shape)
+    close = start_prices * np.exp(np.cumsum(daily_returns, axis=1))
+    previous_close = np.concatenate([start_prices, close[:, :-1]], axis=1)
+    open_ = previous_close * (1 + random_state.normal(0, 0.005, size=shape))
+    high = np.maximum(open_, close) * (1 + np.abs(random_state.normal(0, 0.01, size=shape)))
+    low = np.minimum(open_, close) * (1 - np.abs(random_state.normal(0, 0.01, size=shape)))
+    mean_volumes = np.exp(random_state.uniform(np.log(10 ** 4), np.log(10 ** 8), size=(tickers_number, 1)))
+    volume = (mean_volumes * random_state.lognormal(0, 0.3, size=shape)).astype(np.int64)
+
+    return pd.DataFrame(
+        {
+            "Date": np.tile(dates.values, tickers_number),
+            "Open": open_.ravel(),
+            "High": high.ravel(),
+            "Low": low.ravel(),
+            "Close": close.ravel(),
+            "Adj Close": close.ravel(),
+            "Volume": volume.ravel(),
+            "Ticker": np.repeat(get_synthetic_tickers(tickers_number), days_number),
+        }
+    )
+
+
+def get_synthetic_earnings(tickers_number: int, years_number: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Deterministic quarterly earnings with the columns of the earnings file, as returned by earnings.get_earnings_df.
+    """
+    random_state = np.random.RandomState(seed + 1)
+    quarters_number = 4 * years_number
+    days = pd.bdate_range(end=SYNTHETIC_END_DATE, periods=years_number * TRADING_DAYS_BY_YEAR)
+    quarter_length = len(days) // quarters_number
+    offsets = random_state.randint(0, quarter_length, size=(tickers_number, quarters_number))
+    positions = offsets + np.arange(quarters_number) * quarter_length
+    dates = days.values[positions.ravel()]
+
+    estimates = random_state.normal(1, 0.5, size=tickers_number * quarters_number)
+    surprises = random_state.normal(2, 10, size=tickers_number * quarters_number)
+    tickers = np.repeat(get_synthetic_tickers(tickers_number), quarters_number)
+
+    return pd.DataFrame(
+        {
+            "ticker": tickers,
+            "companyshortname": tickers,
+            "startdatetime": pd.to_datetime(dates).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "epsestimate": estimates,
+            "epsactual": estimates * (1 + surprises / 100),
+            "epssurprisepct": surprises,
+            "Date": dates,
+        }
+    )
+
+
+def get_synthetic_data(tickers_number: int, years_number: int, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    return (
+        get_synthetic_history(tickers_number, years_number, seed),
+        get_synthetic_earnings(tickers_number, years_number, seed),
+    )
@@ -0,0 +1,108 @@
+import io
+import os
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+
+DATA_PATH = os.path.join(os.getcwd(), 'tadawol/data')
+TICKERS_LIST_PATH = os.path.join(DATA_PATH, "tickers_list.csv")
+UNIVERSE_SNAPSHOTS_PATH = os.path.join(DATA_PATH, "universe_snapshots")
+
+
+class UniverseCatalog:
+    """
+    Tickers of the universe ranked once by market capitalization: a range of top tickers is a slice of the ranks.
+    """
+
+    def __init__(self, df: pd.DataFrame, version: str):
+        self.version = version
+        self.tickers: FrozenSet[str] = frozenset(df["Ticker"])
+
+        ranked = df[["Ticker", "Market Capitalization"]].sort_values(
+            by="Market Capitalization", ascending=False, kind="mergesort"
+        )
+        # a ticker listed twice keeps its best rank
+        self.ranked_tickers: List[str] = list(ranked["Ticker"].drop_duplicates(keep="first"))
+        self.ranks: Dict[str, int] = {ticker: rank for rank, ticker in enumerate(self.ranked_tickers)}
+
+    def get_top_tickers(self, start: int, end: int) -> List[str]:
+        """
+        Tickers ranked from start to end, both included.
+        """
+        return self.ranked_tickers[start: end + 1]
+
+    def get_rank(self, ticker: str) -> Optional[int]:
+        return self.ranks.get(ticker)
+
+
+def _load_catalog(path: str) -> UniverseCatalog:
+    with open(path, "rb") as f:
+        content = f.read()
+    version = hashlib.sha1(content).hexdigest()[:12]
+    return UniverseCatalog(pd.read_csv(io.BytesIO(content)), version)
+
+
+# catalog of the tickers list, reloaded only when the file changes, and the catalogs of the loaded snapshots
+_catalog_cache: Dict[str, Any] = {}
+_snapshots_cache: Dict[str, UniverseCatalog] = {}
+
+
+def _get_snapshot_path(snapshot: str) -> str:
+    return os.path.join(UNIVERSE_SNAPSHOTS_PATH, f"{snapshot}.csv")
+
+
+def get_catalog(snapshot: Optional[str] = None) -> UniverseCatalog:
+    """
+    :param snapshot: snapshot of the universe to use, the current tickers list by default
+    """
+    if snapshot is None:
+        modification_time = os.path.getmtime(TICKERS_LIST_PATH)
+        if _catalog_cache.get("modification_time") != modification_time:
+            _catalog_cache["catalog"] = _load_catalog(TICKERS_LIST_PATH)
+            _catalog_cache["modification_time"] = modification_time
+        return _catalog_cache["catalog"]
+
+    if snapshot not in _snapshots_cache:
+        path = _get_snapshot_path(snapshot)
+        if not os.path.exists(path):
+            raise ValueError(f"Unknown universe snapshot {snapshot}")
+        _snapshots_cache[snapshot] = _load_catalog(path)
+    return _snapshots_cache[snapshot]
+
+
+def get_snapshots() -> List[str]:
+    """
+    Saved snapshots, from the oldest to the newest. A snapshot is named by its date and its content version.
+    """
+    if not os.path.exists(UNIVERSE_SNAPSHOTS_PATH):
+        return []
+    return sorted(f[:-len(".csv")] for f in os.listdir(UNIVERSE_SNAPSHOTS_PATH) if f.endswith(".csv"))
+
+
+def save_snapshot(on_date: Optional[datetime] = None) -> str:
+    """
+    Saves the current tickers list as a dated snapshot and returns its name. The list is saved only once: an existing
+    snapshot with the same content is returned instead.
+    """
+    with open(TICKERS_LIST_PATH, "rb") as f:
+        content = f.read()
+    version = hashlib.sha1(content).hexdigest()[:12]
+    for snapshot in get_snapshots():
+        if snapshot.endswith(f"_{version}"):
+            return snapshot
+
+    snapshot = f"{(on_date or datetime.utcnow()).strftime('%Y%m%d')}_{version}"
+    os.makedirs(UNIVERSE_SNAPSHOTS_PATH, exist_ok=True)
+    path = _get_snapshot_path(snapshot)
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(content)
+    os.replace(f"{path}.tmp", path)
+    logger.info(f"Universe snapshot {snapshot} is saved")
+    return snapshot
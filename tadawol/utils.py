@@ -1,40 +1,51 @@
-from typing import List, Any
+from typing import Optional
 import pandas as pd
 
+from tadawol.config import UniverseFilterConfig
+from tadawol.panel import TickerPanel
 
-def clean_results(df: pd.DataFrame):
-    df = df[df["Close"] > 2]
-    df = df[df["Volume"] > 100000]
+
+def is_tradable(df: pd.DataFrame, universe_filter: UniverseFilterConfig) -> pd.Series:
+    return (df["Close"] > universe_filter.min_close) & (df["Volume"] > universe_filter.min_volume)
+
+
+def clean_results(df: pd.DataFrame, universe_filter: Optional[UniverseFilterConfig] = None):
+    if universe_filter is None:
+        universe_filter = UniverseFilterConfig()
+    df = df[is_tradable(df, universe_filter)]
     df = df[~((df["win_percent"] > 50) | (df["win_percent"] < -50))]
 
     return df
 
 
-def get_search_grid(grid: List[List[Any]]):
-    search_grid = [[v] for v in grid[0]]
-    grid.pop(0)
+def filter_universe(df: pd.DataFrame, universe_filter: UniverseFilterConfig) -> pd.DataFrame:
+    """
+    Drops the tickers that are never tradable: none of their entries would be kept by clean_results.
+    """
+    if df.empty:
+        return df
+    tradable_tickers = df.loc[is_tradable(df, universe_filter), "Ticker"].unique()
+    return df[df["Ticker"].isin(tradable_tickers)]
+
 
-    while len(grid) > 0:
-        values = grid[0]
-        intermediate_search_grid = []
-        for v in values:
-            for current_list in search_grid:
-                new_list = current_list.copy()
-                new_list.append(v)
-                intermediate_search_grid.append(new_list)
-        search_grid = intermediate_search_grid
-        grid.pop(0)
-    return search_grid
+def mask_untradable_entries(df: pd.DataFrame, universe_filter: UniverseFilterConfig) -> pd.DataFrame:
+    """
+    Removes the entries on untradable rows, dropped anyway by clean_results, so that no exit is computed for them.
+    The rows are kept since they are needed by the indicators.
+    """
+    df.loc[:, "entry"] = df["entry"].astype(bool) & is_tradable(df, universe_filter)
+    return df
 
 
 def get_last_week_entries(df) -> pd.DataFrame:
 
     assert df[df["entry"]].shape[0] == df.shape[0]
+    if df.empty:
+        # no entry is kept, e.g. in a small chunk of tickers
+        return df.assign(week_previous_entries=pd.Series(dtype="int64"))
 
-    df = df.copy(deep=True)
     tickers_data = []
-    for ticker, ticker_data in df.groupby(["Ticker"]):
-        ticker_data = ticker_data.sort_values(by="Date", ascending=True)
+    for ticker, ticker_data in TickerPanel.from_frame(df).iter_frames():
         for i in range(1, 5):
             ticker_data.loc[:, f"Date_{i}"] = ticker_data["Date"].shift(i)
 
@@ -52,6 +63,3 @@ def get_last_week_entries(df) -> pd.DataFrame:
         tickers_data.append(ticker_data)
 
     return pd.concat(tickers_data, axis=0)
-
-
-
@@ -1,20 +1,124 @@
 from datetime import datetime
+from itertools import islice
 import logging
+import os
+import time
+from typing import List, Dict, Any, Tuple, Optional
 
-from celery import Celery
+from celery import chain, chord, group
+from celery.schedules import crontab
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, task_prerun, task_postrun
+from prometheus_client import start_http_server, CollectorRegistry, multiprocess
 import pandas as pd
+import requests
 
-from tadawol.strategies.macd import MACD
-from tadawol.strategies.base_strategy import BaseStrategy
-from tadawol.strategies.reverse import Reverse
-from tadawol.history import get_top_tickers, get_fresh_data
+from tadawol.strategies.base_strategy import BaseStrategy, GridAggregator, evaluate_combination, \
+    get_grid_universe_snapshot, get_grid_sampling
+from tadawol.strategies.registry import STRATEGIES
+from tadawol.strategies.runner import get_strategies_trades, get_strategies_indicators
+from tadawol.history import get_top_tickers, get_fresh_data, get_recent_data, update_data as update_history, \
+    get_historical_data
+from tadawol.earnings import update_data as update_earnings, get_earnings_df
+from tadawol import signals, positions
 from tadawol.services import email
-from tadawol.config import BrokerConfig
+from tadawol.broker import app
+from tadawol.config import MetricsConfig, SimulationConfig
+from tadawol import metrics
 
+logger = logging.getLogger(__name__)
 
-app = Celery("tasks", broker=BrokerConfig().url)
+TICKERS_CHUNK_SIZE = 50
 
-logger = logging.getLogger(__name__)
+# errors worth retrying a task for, the others would fail again on the same input
+TRANSIENT_ERRORS = (requests.exceptions.RequestException, ConnectionError, TimeoutError)
+
+GRID_BATCH_SIZE = 500
+
+PRECOMPUTED_MIN_TOP_TICKER = 0
+PRECOMPUTED_MAX_TOP_TICKER = 500
+
+# US markets close at 16:00 New York time, 21:30 UTC leaves room for late bars in winter and summer.
+app.conf.beat_schedule = {
+    "post-close-precomputation": {
+        "task": "tasks.run_post_close_pipeline",
+        "schedule": crontab(hour=21, minute=30, day_of_week="mon-fri"),
+    },
+}
+app.conf.timezone = "UTC"
+
+
+# strategies instances of the worker process, built once by the worker_process_init hook
+_strategies: Dict[str, BaseStrategy] = dict()
+
+_process_start_time = time.time()
+_first_task_start_time: Dict[str, float] = dict()
+_tasks_start_time: Dict[str, float] = dict()
+
+
+def _get_strategy(strategy_name: str) -> BaseStrategy:
+    if strategy_name not in _strategies:
+        _strategies[strategy_name] = STRATEGIES[strategy_name]()
+    return _strategies[strategy_name]
+
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    port = MetricsConfig().worker_port
+    # with the prefork pool, metrics of the child processes are only visible through the multiprocess mode
+    if "prometheus_multiproc_dir" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+    else:
+        start_http_server(port)
+    logger.info(f"[Worker] Metrics are exported on port {port}")
+
+
+@worker_process_shutdown.connect
+def clean_process_metrics(pid=None, **kwargs):
+    if "prometheus_multiproc_dir" in os.environ:
+        multiprocess.mark_process_dead(pid)
+
+
+@worker_process_init.connect
+def preload_worker_data(**kwargs):
+    start_time = time.time()
+    for strategy_name in STRATEGIES:
+        _get_strategy(strategy_name)
+    try:
+        get_historical_data()
+        get_earnings_df()
+    except FileNotFoundError as e:
+        logger.warning(f"[Worker] Data can not be preloaded: {e}")
+    logger.info(f"[Worker] Data and strategies are preloaded in {round(time.time() - start_time, 2)}s")
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, task=None, **kwargs):
+    start_time = time.time()
+    if len(_first_task_start_time) == 0:
+        _first_task_start_time[task_id] = start_time
+    _tasks_start_time[task_id] = start_time
+
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is None:
+        published_at = (task.request.headers or {}).get("published_at")
+    if published_at is not None:
+        metrics.TASK_QUEUE_WAIT_SECONDS.labels(task=task.name).observe(max(start_time - published_at, 0))
+
+
+@task_postrun.connect
+def report_task_duration(task_id=None, task=None, **kwargs):
+    task_start_time = _tasks_start_time.pop(task_id, None)
+    if task_start_time is not None:
+        metrics.TASK_SECONDS.labels(task=task.name).observe(time.time() - task_start_time)
+
+    start_time = _first_task_start_time.get(task_id)
+    if start_time is not None:
+        logger.info(
+            f"[Worker] First task {task.name} took {round(time.time() - start_time, 2)}s, "
+            f"{round(time.time() - _process_start_time, 2)}s after the worker process start"
+        )
 
 
 def _send_entry_and_exit(entry_df: pd.DataFrame, exit_df: pd.DataFrame, strategy: BaseStrategy):
@@ -36,22 +140,191 @@ def _send_entry_and_exit(entry_df: pd.DataFrame, exit_df: pd.DataFrame, strategy
     email.send_email(html, subject)
 
 
+def _df_to_payload(df: pd.DataFrame) -> str:
+    return df.to_json(orient="split", date_format="iso")
+
+
+def _payload_to_df(payload: str, date_columns: List[str]) -> pd.DataFrame:
+    df = pd.read_json(payload, orient="split", convert_dates=False)
+    for column in date_columns:
+        if column in df.columns:
+            df.loc[:, column] = pd.to_datetime(df[column]).dt.tz_localize(None)
+    return df
+
+
+def _get_chunks(tickers: List[str], chunk_size: int) -> List[List[str]]:
+    return [tickers[i: i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+
+
+@app.task(bind=True, autoretry_for=TRANSIENT_ERRORS, retry_backoff=True, max_retries=3)
+def fetch_tickers_chunk(self, tickers: List[str]) -> str:
+    df = get_fresh_data(tickers)
+    if df.empty and len(tickers) > 0 and self.request.retries < self.max_retries:
+        # every fetch failed, yahoo is most likely unreachable: the chunk is fetched again, then given up empty
+        # so that the other chunks are still aggregated
+        raise ConnectionError(f"No data is fetched for the {len(tickers)} tickers of the chunk")
+    return _df_to_payload(df)
+
+
+def _get_strategies_signals(df: pd.DataFrame, progress_reporter_id: str) -> List[Tuple[str, Any, Any, Any]]:
+    strategies_names = list(STRATEGIES.keys())
+    strategies = [_get_strategy(strategy_name) for strategy_name in strategies_names]
+    strategies_trades = get_strategies_trades(
+        strategies, df, progress_reporter_id=progress_reporter_id, processes=SimulationConfig().processes
+    )
+
+    strategies_signals = []
+    for strategy_name, strategy, trades in zip(strategies_names, strategies, strategies_trades):
+        today_trades, today_exits = strategy.get_today_signals(trades)
+        if trades is None:
+            # no ticker of df is tradable
+            trades = today_exits
+        strategies_signals.append((strategy_name, trades, today_trades, today_exits))
+    return strategies_signals
+
+
+@app.task(bind=True, autoretry_for=TRANSIENT_ERRORS, retry_backoff=True, max_retries=3)
+def compute_chunk_signals(self, chunk_payload: str) -> List[Dict[str, Any]]:
+    df = _payload_to_df(chunk_payload, date_columns=["Date"])
+    return [
+        {
+            "strategy": strategy_name,
+            "entries": _df_to_payload(today_trades),
+            "exits": _df_to_payload(today_exits),
+        }
+        for strategy_name, _, today_trades, today_exits in _get_strategies_signals(df, f"task_{self.request.id}")
+    ]
+
+
+@app.task
+def aggregate_signals(chunks_signals: List[List[Dict[str, Any]]]):
+    signals_by_strategy = dict()
+    for chunk_signals in chunks_signals:
+        for strategy_signals in chunk_signals:
+            signals_by_strategy.setdefault(strategy_signals["strategy"], []).append(strategy_signals)
+
+    for strategy_name, strategy_signals in signals_by_strategy.items():
+        strategy = _get_strategy(strategy_name)
+        today_trades = pd.concat(
+            [_payload_to_df(s["entries"], date_columns=["Date"]) for s in strategy_signals], axis=0
+        ).reset_index(drop=True)
+        today_exits = pd.concat(
+            [_payload_to_df(s["exits"], date_columns=["Date", "exit"]) for s in strategy_signals], axis=0
+        ).reset_index(drop=True)
+
+        logger.info(f"****************** RESULTS {strategy.name} **********************")
+        logger.info("****************** ENTRIES **********************")
+        logger.info(today_trades)
+        logger.info("****************** EXITS *************************")
+        logger.info(today_exits)
+        #_send_entry_and_exit(today_trades, today_exits, strategy)
+
+
 @app.task
 def execute_macd_reverse_strategies(
         min_top_ticker: int,
-        max_top_ticker: int
+        max_top_ticker: int,
+        chunk_size: int = TICKERS_CHUNK_SIZE,
+        universe_snapshot: Optional[str] = None
 ):
-    strategies = [MACD(), Reverse()]
-    tickers = get_top_tickers(min_top_ticker, max_top_ticker)
-    df = get_fresh_data(tickers)
-    for strategy in strategies:
-        try:
-            today_trades, today_exits = strategy.get_today_trades_and_exits(df.copy(deep=True))
-            logger.info("****************** RESULTS **********************")
-            logger.info("****************** ENTRIES **********************")
-            logger.info(today_trades)
-            logger.info("****************** EXITS *************************")
-            logger.info(today_trades)
-            #_send_entry_and_exit(today_trades, today_exits, strategy)
-        except KeyboardInterrupt as k_e:
-            raise KeyboardInterrupt from k_e
+    tickers = get_top_tickers(min_top_ticker, max_top_ticker, universe_snapshot)
+    chunks = _get_chunks(tickers, chunk_size)
+    logger.info(f"Dispatching {len(tickers)} tickers in {len(chunks)} chunks")
+
+    chunks_tasks = [fetch_tickers_chunk.s(chunk) | compute_chunk_signals.s() for chunk in chunks]
+    chord(chunks_tasks)(aggregate_signals.s())
+
+
+@app.task(bind=True)
+def precompute_signals(
+        self,
+        min_top_ticker: int = PRECOMPUTED_MIN_TOP_TICKER,
+        max_top_ticker: int = PRECOMPUTED_MAX_TOP_TICKER,
+        universe_snapshot: Optional[str] = None,
+        live: bool = False
+):
+    """
+    :param live: compute the signals from the open positions books of the strategies, see BaseStrategy.get_live_signals.
+    The open positions are then saved in place of the trades.
+    """
+    tickers = get_top_tickers(min_top_ticker, max_top_ticker, universe_snapshot)
+
+    logger.info("[Precomputation] Updating history and earnings")
+    update_history(tickers)
+    update_earnings()
+
+    df = get_recent_data(tickers)
+    strategies_names = list(STRATEGIES.keys())
+    strategies_indicators = get_strategies_indicators([_get_strategy(name) for name in strategies_names], df)
+    for strategy_name, indicators in zip(strategies_names, strategies_indicators):
+        signals.save_indicators(strategy_name, indicators)
+
+    if live:
+        for strategy_name in STRATEGIES:
+            strategy = _get_strategy(strategy_name)
+            today_date = strategy._get_today_date()
+            today_trades, today_exits, open_positions = strategy.get_live_signals(
+                df, positions.load_positions(strategy.name, today_date)
+            )
+            positions.save_positions(strategy.name, open_positions, today_date)
+            signals.save_signals(strategy_name, open_positions, today_trades, today_exits)
+    else:
+        for strategy_name, trades, today_trades, today_exits in _get_strategies_signals(df, f"task_{self.request.id}"):
+            signals.save_signals(strategy_name, trades, today_trades, today_exits)
+    logger.info("[Precomputation] Signals are computed for all strategies")
+
+
+@app.task
+def send_precomputed_signals():
+    for strategy_name in STRATEGIES:
+        today_trades, today_exits = signals.get_signals(strategy_name)
+        _send_entry_and_exit(today_trades, today_exits, _get_strategy(strategy_name))
+
+
+@app.task
+def run_post_close_pipeline(live: bool = False):
+    """
+    Scheduled after the market close: the signals are precomputed, then sent by email once they are all saved.
+    """
+    chain(precompute_signals.si(live=live), send_precomputed_signals.si()).apply_async()
+
+
+@app.task(autoretry_for=TRANSIENT_ERRORS, retry_backoff=True, max_retries=3)
+def evaluate_grid_combination(strategy_name: str, combination: List[Any], tickers: List[str]) -> Dict[str, Any]:
+    # the history is cached by the worker process, only the first combination of a worker loads it
+    return evaluate_combination(STRATEGIES[strategy_name], combination, tickers)
+
+
+def run_distributed_grid(
+        strategy_name: str,
+        min_top_ticker: int = 100,
+        max_top_ticker: int = 300,
+        run_id: Optional[str] = None,
+        sampling: Optional[str] = None,
+        budget: Optional[int] = None,
+        seed: Optional[int] = None,
+        universe_snapshot: Optional[str] = None
+):
+    """
+    Grid search where each combination is evaluated by a celery task. The results are aggregated here as they come.
+    Without a real broker, run it with AMQP_URL=memory:// and RESULT_BACKEND_URL=cache+memory:// and an in-process
+    worker, or with task_always_eager.
+    """
+    strategy = STRATEGIES[strategy_name]
+    grid_sampling = get_grid_sampling(run_id, sampling, budget, seed)
+    combinations = strategy.get_search_space().get_combinations(**grid_sampling)
+    universe_snapshot = get_grid_universe_snapshot(run_id, universe_snapshot)
+    tickers = get_top_tickers(min_top_ticker, max_top_ticker, universe_snapshot)
+
+    aggregator = GridAggregator(
+        strategy.__name__, combinations, len(tickers), run_id, universe_snapshot, grid_sampling
+    )
+    remaining_combinations = aggregator.iter_remaining_combinations()
+    # the combinations are sent by batches: the signatures of the whole grid are never built at once
+    for batch in iter(lambda: list(islice(remaining_combinations, GRID_BATCH_SIZE)), []):
+        grid_result = group(
+            evaluate_grid_combination.s(strategy_name, combination, tickers) for combination in batch
+        ).apply_async()
+        grid_result.join(callback=lambda task_id, result: aggregator.add(result))
+    aggregator.finish()
+    return aggregator.best_combination
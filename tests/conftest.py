@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+# the celery app is built when tadawol.broker is imported, the tests never reach a broker
+os.environ.setdefault("AMQP_URL", "memory://")
+
+from tadawol import cache, grid_runs, history, progress, universe  # noqa: E402
+from tadawol.synthetic import get_synthetic_history, get_synthetic_tickers  # noqa: E402
+
+
+@pytest.fixture
+def history_df(tmp_path, monkeypatch):
+    """
+    Synthetic history stored as the history file.
+    """
+    df = get_synthetic_history(30, 2)
+    path = tmp_path / "history.csv"
+    df.to_csv(path, index=False)
+    monkeypatch.setattr(history, "STOCKS_HISTORY_PATH", str(path))
+    monkeypatch.setattr(history, "_history_cache", {})
+    return df
+
+
+@pytest.fixture
+def data_paths(tmp_path, monkeypatch):
+    """
+    Grid runs, progress events, trades cache and universe snapshots written in a temporary directory, with a universe
+    where the synthetic tickers are ranked from 100.
+    """
+    monkeypatch.setattr(grid_runs, "GRID_RUNS_DATA_PATH", str(tmp_path / "grid_runs"))
+    monkeypatch.setattr(progress, "PROGRESS_DATA_PATH", str(tmp_path / "progress"))
+    monkeypatch.setattr(cache.TradesCache.__init__, "__defaults__", (str(tmp_path / "cache"), None))
+
+    tickers = [f"TOP{i:03d}" for i in range(100)] + get_synthetic_tickers(30) + [f"LOW{i:03d}" for i in range(300)]
+    tickers_list_path = tmp_path / "tickers_list.csv"
+    pd.DataFrame({"Ticker": tickers, "Market Capitalization": range(len(tickers), 0, -1)}).to_csv(
+        tickers_list_path, index=False
+    )
+    monkeypatch.setattr(universe, "TICKERS_LIST_PATH", str(tickers_list_path))
+    monkeypatch.setattr(universe, "UNIVERSE_SNAPSHOTS_PATH", str(tmp_path / "universe_snapshots"))
+    monkeypatch.setattr(universe, "_catalog_cache", {})
+    monkeypatch.setattr(universe, "_snapshots_cache", {})
+    return tmp_path
@@ -0,0 +1,45 @@
+import importlib
+import inspect
+import sys
+
+from tadawol import cache
+from tadawol.strategies.base_strategy import BaseStrategy
+from tadawol.strategies.earnings import Earnings
+from tadawol.strategies.macd import MACD
+
+
+def test_code_version_changes_with_the_code(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module_path = tmp_path / "cached_strategy_module.py"
+    module_path.write_text("RULE = 1\n")
+    importlib.import_module("cached_strategy_module")
+
+    try:
+        version = cache.get_code_version(("cached_strategy_module",))
+        module_path.write_text("RULE = 2\n")
+        cache.get_code_version.cache_clear()
+
+        assert cache.get_code_version(("cached_strategy_module",)) != version
+    finally:
+        del sys.modules["cached_strategy_module"]
+        cache.get_code_version.cache_clear()
+
+
+def test_trades_key_depends_on_the_code_version():
+    keys = {cache.get_trades_key("MACD", {"long_window": 26}, ["A", "B"], "data", code) for code in ["v1", "v2"]}
+
+    assert len(keys) == 2
+
+
+def test_strategy_code_modules():
+    assert MACD.get_code_modules() == (
+        "tadawol.panel", "tadawol.stats", "tadawol.strategies.base_strategy", "tadawol.strategies.macd", "tadawol.utils"
+    )
+    assert Earnings.get_code_modules() == (
+        "tadawol.earnings", "tadawol.panel", "tadawol.stats", "tadawol.strategies.base_strategy",
+        "tadawol.strategies.earnings", "tadawol.utils"
+    )
+
+
+def test_simulate_does_not_use_the_cache_by_default():
+    assert inspect.signature(BaseStrategy.simulate).parameters["use_cache"].default is False
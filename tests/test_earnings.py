@@ -0,0 +1,67 @@
+from datetime import datetime
+from math import inf
+
+import numpy as np
+import pandas as pd
+
+from tadawol.earnings import get_latest_surprises
+from tadawol.strategies.earnings import Earnings
+
+# sorted by date, as get_latest_surprises expects
+SURPRISES_DF = pd.DataFrame({
+    "Ticker": ["AAA", "BBB", "AAA"],
+    "Date": pd.to_datetime(["2020-01-10", "2020-02-03", "2020-04-10"]),
+    "epssurprisepct": [5.0, 12.0, -3.0],
+})
+
+
+def _get_reference_df(rows):
+    return pd.DataFrame(rows, columns=["Ticker", "Date"])
+
+
+def test_latest_surprise_is_strictly_before_the_date():
+    reference_df = _get_reference_df([
+        ("AAA", datetime(2020, 1, 9)),
+        ("AAA", datetime(2020, 1, 10)),
+        ("AAA", datetime(2020, 1, 11)),
+        ("AAA", datetime(2020, 4, 10)),
+        ("AAA", datetime(2020, 4, 11)),
+    ])
+
+    surprises = get_latest_surprises(reference_df, SURPRISES_DF, max_age_days=100)
+
+    np.testing.assert_array_equal(surprises, [np.nan, np.nan, 5.0, 5.0, -3.0])
+
+
+def test_stale_surprise_is_dropped():
+    reference_df = _get_reference_df([
+        ("BBB", datetime(2020, 2, 13)),
+        ("BBB", datetime(2020, 2, 14)),
+        ("BBB", datetime(2020, 6, 1)),
+    ])
+
+    surprises = get_latest_surprises(reference_df, SURPRISES_DF, max_age_days=10)
+
+    np.testing.assert_array_equal(surprises, [12.0, np.nan, np.nan])
+
+
+def test_ticker_without_surprise_has_none_and_rows_keep_their_order():
+    reference_df = _get_reference_df([
+        ("CCC", datetime(2020, 3, 1)),
+        ("BBB", datetime(2020, 3, 1)),
+        ("AAA", datetime(2020, 1, 20)),
+    ])
+
+    surprises = get_latest_surprises(reference_df, SURPRISES_DF, max_age_days=100)
+
+    np.testing.assert_array_equal(surprises, [np.nan, 12.0, 5.0])
+
+
+def test_strategy_gives_no_surprise_to_the_ticker_without_earnings():
+    earnings_df = SURPRISES_DF.rename(columns={"Ticker": "ticker"})
+    strategy = Earnings(earnings_df=earnings_df, max_surprise_age_days=100)
+    df = _get_reference_df([("CCC", datetime(2020, 3, 1)), ("AAA", datetime(2020, 3, 1))])
+
+    df = strategy.add_panel_features(df)
+
+    assert list(df["last_surprise"]) == [-inf, 5.0]
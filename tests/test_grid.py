@@ -0,0 +1,92 @@
+import json
+import types
+
+import pandas as pd
+import pytest
+
+import tasks
+from tadawol import grid_runs, universe
+from tadawol.search_space import SearchSpace
+from tadawol.strategies import base_strategy
+from tadawol.strategies.base_strategy import GridAggregator, get_best_config
+from tadawol.strategies.macd import MACD
+from tadawol.synthetic import get_synthetic_tickers
+
+LEADERBOARD_COLUMNS = ["combination", "win", "win_percent", "trades_number"]
+
+
+@pytest.fixture
+def small_grid(monkeypatch):
+    monkeypatch.setattr(MACD, "get_grid", staticmethod(lambda: [[9, 12], [26], [9], [5], [8], [15], [7, 10]]))
+
+
+@pytest.fixture
+def eager_celery(monkeypatch):
+    monkeypatch.setattr(tasks.app.conf, "task_always_eager", True)
+
+
+def test_distributed_grid_gives_the_local_leaderboard(history_df, data_paths, small_grid, eager_celery):
+    get_best_config(MACD, run_id="local")
+    best_combination = tasks.run_distributed_grid("MACD", run_id="distributed")
+
+    local_leaderboard = grid_runs.get_leaderboard("local")
+    distributed_leaderboard = grid_runs.get_leaderboard("distributed")
+    assert local_leaderboard.shape[0] == 4
+    pd.testing.assert_frame_equal(
+        distributed_leaderboard[LEADERBOARD_COLUMNS], local_leaderboard[LEADERBOARD_COLUMNS]
+    )
+    assert best_combination == list(local_leaderboard["combination"].iloc[0])
+
+
+def test_resumed_run_skips_the_evaluated_combinations_lazily(data_paths):
+    for combination, win in [([1, 3], 10), ([2, 4], 20)]:
+        grid_runs.save_result("run", {"strategy": "MACD", "combination": combination, "win": win, "win_percent": 50})
+    search_space = SearchSpace([[1, 2], [3, 4, 5]])
+
+    aggregator = GridAggregator("MACD", search_space.get_combinations(), 10, "run")
+
+    assert aggregator.remaining_combinations_number == 4
+    assert isinstance(aggregator.iter_remaining_combinations(), types.GeneratorType)
+    assert list(aggregator.iter_remaining_combinations()) == [[2, 3], [1, 4], [1, 5], [2, 5]]
+    assert aggregator.best_combination == [2, 4]
+
+
+def test_resumed_run_keeps_its_sample(history_df, data_paths, small_grid):
+    get_best_config(MACD, run_id="sampled", sampling="random", budget=2, seed=3)
+    results = grid_runs.load_results("sampled")
+    # the run is interrupted before its last combination
+    with open(grid_runs._get_path("sampled"), "w") as f:
+        f.write(json.dumps(results[0]) + "\n")
+
+    get_best_config(MACD, run_id="sampled")
+
+    assert [r["combination"] for r in grid_runs.load_results("sampled")] == [r["combination"] for r in results]
+    with pytest.raises(ValueError):
+        get_best_config(MACD, run_id="sampled", seed=4)
+
+
+def test_run_interrupted_before_any_result_keeps_its_universe(data_paths, small_grid, monkeypatch):
+    evaluated_tickers = []
+
+    def evaluate_combination(strategy, combination, tickers, profiler=None):
+        evaluated_tickers.append(tickers)
+        if len(evaluated_tickers) == 1:
+            raise RuntimeError("the run is interrupted")
+        return {"combination": list(combination), "win": 0.0, "win_percent": 0.0}
+
+    monkeypatch.setattr(base_strategy, "evaluate_combination", evaluate_combination)
+    with pytest.raises(RuntimeError):
+        get_best_config(MACD, run_id="interrupted")
+    assert grid_runs.load_results("interrupted") == []
+
+    # the universe is ranked again before the run is resumed
+    tickers = get_synthetic_tickers(30)
+    pd.DataFrame({"Ticker": tickers, "Market Capitalization": range(len(tickers))}).to_csv(
+        universe.TICKERS_LIST_PATH, index=False
+    )
+    universe._catalog_cache.clear()
+    get_best_config(MACD, run_id="interrupted")
+
+    assert len(evaluated_tickers) == 5
+    assert all(tickers == evaluated_tickers[0] for tickers in evaluated_tickers)
+    assert set(evaluated_tickers[0]) >= set(get_synthetic_tickers(30))
@@ -0,0 +1,124 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from tadawol import replay
+from tadawol.config import YahooConfig
+from tadawol.history import YahooHistoryClient, parse_history
+
+CONFIG = YahooConfig(retry_backoff_seconds=0)
+QUOTE_URL = f"{CONFIG.quote_url}/AAPL/history"
+DOWNLOAD_URL = f"{CONFIG.download_url}/AAPL"
+
+HISTORY_CSV = (
+    "Date,Open,High,Low,Close,Adj Close,Volume\n"
+    "2020-01-02,74.06,75.15,73.79,75.08,74.33,135480400\n"
+    "2020-01-03,74.28,75.14,74.12,74.35,73.61,146322800\n"
+)
+
+
+def _get_quote_page(crumb: str) -> str:
+    return f'<script>root.App.main = {{"CrumbStore":{{"crumb":"{crumb}"}}}};</script>'
+
+
+class YahooServer:
+    """
+    Scripted yahoo server: the responses to each url are given in order, the last one is then repeated.
+    """
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def get(self, url, params=None, **kwargs):
+        self.requests.append((url, dict(params or {})))
+        url_responses = self.responses[url]
+        status_code, text = url_responses[min(len(self.requests_to(url)) - 1, len(url_responses) - 1)]
+        return replay._make_response(url, status_code, text)
+
+    def requests_to(self, url):
+        return [request for request in self.requests if request[0] == url]
+
+
+@pytest.fixture
+def recorded_session(tmp_path):
+    """
+    Session replaying the responses recorded from a yahoo server rejecting the first crumb.
+    """
+    server = YahooServer({
+        QUOTE_URL: [(200, _get_quote_page("first")), (200, _get_quote_page("second"))],
+        DOWNLOAD_URL: [(401, "Invalid cookie"), (200, HISTORY_CSV)],
+    })
+    YahooHistoryClient(CONFIG, replay.RecordingSession(server, str(tmp_path))).get_history(
+        "AAPL", date(2020, 1, 1), date(2020, 1, 4)
+    )
+    assert [params.get("crumb") for url, params in server.requests_to(DOWNLOAD_URL)] == ["first", "second"]
+    return replay.ReplaySession(str(tmp_path))
+
+
+def test_rejected_crumb_is_refreshed_once(recorded_session):
+    client = YahooHistoryClient(CONFIG, recorded_session)
+
+    df = client.get_history("AAPL", date(2020, 1, 1), date(2020, 1, 4))
+
+    assert client.crumb == "second"
+    assert list(df["Date"]) == ["2020-01-02", "2020-01-03"]
+    assert recorded_session.counts == {"requests": 4, "errors": 0, "throttled": 0, "missing": 0}
+    # the crumb is reused for the next tickers
+    client.get_history("AAPL", date(2020, 1, 1), date(2020, 1, 4))
+    assert recorded_session.counts["requests"] == 5
+
+
+def test_server_errors_are_retried():
+    server = YahooServer({
+        QUOTE_URL: [(200, _get_quote_page("crumb"))],
+        DOWNLOAD_URL: [(503, "Service Unavailable"), (429, "Too Many Requests"), (200, HISTORY_CSV)],
+    })
+
+    df = YahooHistoryClient(CONFIG, server).get_history("AAPL", date(2020, 1, 1), date(2020, 1, 4))
+
+    assert df.shape[0] == 2
+    assert len(server.requests_to(DOWNLOAD_URL)) == 3
+
+
+def test_too_many_server_errors_raise():
+    server = YahooServer({
+        QUOTE_URL: [(200, _get_quote_page("crumb"))],
+        DOWNLOAD_URL: [(503, "Service Unavailable")],
+    })
+
+    with pytest.raises(Exception):
+        YahooHistoryClient(CONFIG, server).get_history("AAPL", date(2020, 1, 1), date(2020, 1, 4))
+    assert len(server.requests_to(DOWNLOAD_URL)) == CONFIG.retries + 1
+
+
+def test_parse_history_types():
+    df = parse_history(HISTORY_CSV)
+
+    assert df["Close"].dtype == np.float64
+    assert df["Volume"].dtype == np.int64
+
+
+def test_parse_history_null_rows():
+    df = parse_history(HISTORY_CSV + "2020-01-06,null,null,null,null,null,null\n")
+
+    assert df.shape[0] == 3
+    assert np.isnan(df["Close"].iloc[2])
+    assert np.isnan(df["Volume"].iloc[2])
+    assert df["Close"].iloc[1] == 74.35
+
+
+def test_parse_history_empty_rows():
+    df = parse_history(HISTORY_CSV.replace("\n2020-01-03", "\n\n2020-01-03") + "\n\n")
+
+    assert list(df.columns) == ["Date", "Open", "High", "Low", "Close", "Adj Close", "Volume"]
+    assert list(df["Volume"]) == [135480400, 146322800]
+
+
+@pytest.mark.parametrize("text", ["", "Date,Open,High,Low,Close,Adj Close,Volume\n"])
+def test_parse_empty_history(text):
+    df = parse_history(text)
+
+    assert df.empty
+    assert list(df.columns) == ["Date", "Open", "High", "Low", "Close", "Adj Close", "Volume"]
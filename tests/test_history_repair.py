@@ -0,0 +1,97 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from tadawol import history
+
+LISTING_DATE = datetime(2018, 3, 1)
+DELISTING_DATE = datetime(2020, 6, 30)
+HALT_RANGE = (datetime(2019, 5, 1), datetime(2019, 6, 30))
+
+
+@pytest.fixture
+def yahoo_history(monkeypatch):
+    """
+    Fake yahoo fetch that records the fetched ranges: NEW is listed on LISTING_DATE, OLD is delisted after
+    DELISTING_DATE and HALT has no bar in HALT_RANGE.
+    """
+    fetched_ranges = []
+
+    def get_ticker_data(ticker, start_date, end_date=None):
+        fetched_ranges.append((ticker, start_date, end_date))
+        if ticker == "NEW":
+            start_date = max(start_date, LISTING_DATE)
+        # the end date is excluded by yahoo
+        dates = pd.bdate_range(start_date, end_date, closed="left")
+        if ticker == "OLD":
+            dates = dates[dates <= DELISTING_DATE]
+        if ticker == "HALT":
+            dates = dates[(dates < HALT_RANGE[0]) | (dates > HALT_RANGE[1])]
+        return pd.DataFrame({
+            "Date": dates.strftime("%Y-%m-%d"),
+            "Open": 10.0, "High": 10.0, "Low": 10.0, "Close": 10.0, "Adj Close": 10.0, "Volume": 1000,
+            "Ticker": ticker,
+        })
+
+    monkeypatch.setattr(history, "get_ticker_data", get_ticker_data)
+    return fetched_ranges
+
+
+@pytest.fixture
+def history_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "STOCKS_HISTORY_PATH", str(tmp_path / "history.csv"))
+    monkeypatch.setattr(history, "HISTORY_FIRST_DATES_PATH", str(tmp_path / "history_first_dates.csv"))
+    monkeypatch.setattr(history, "HISTORY_LAST_DATES_PATH", str(tmp_path / "history_last_dates.csv"))
+    monkeypatch.setattr(history, "HISTORY_EMPTY_RANGES_PATH", str(tmp_path / "history_empty_ranges.csv"))
+
+
+@pytest.mark.parametrize("stored_start_date", [None, LISTING_DATE])
+def test_ticker_listed_after_the_start_date_is_fetched_once(history_paths, yahoo_history, stored_start_date):
+    if stored_start_date is not None:
+        yahoo_history_df = history.get_ticker_data("NEW", stored_start_date, datetime(2019, 1, 1))
+        yahoo_history_df.to_csv(history.STOCKS_HISTORY_PATH)
+        yahoo_history.clear()
+
+    result = history.repair_history(["NEW"])
+    assert result["added_rows"] > 0
+    assert result["failed_gaps"] == []
+    fetched_ranges_number = len(yahoo_history)
+
+    result = history.repair_history(["NEW"])
+    assert result["gaps"] == []
+    assert len(yahoo_history) == fetched_ranges_number
+    assert history._read_first_dates() == {"NEW": LISTING_DATE}
+
+
+def test_first_date_limits_the_start_gap():
+    df = pd.DataFrame({"Ticker": "NEW", "Date": pd.bdate_range(LISTING_DATE, datetime(2019, 1, 1))})
+
+    gaps = history.get_history_gaps(df, ["NEW"], end_date=datetime(2019, 1, 1))
+    assert [gap.reason for gap in gaps] == ["short start"]
+    first_dates = {"NEW": LISTING_DATE}
+    assert history.get_history_gaps(df, ["NEW"], end_date=datetime(2019, 1, 1), first_dates=first_dates) == []
+
+
+@pytest.mark.parametrize("ticker, reason", [("OLD", "short end"), ("HALT", "missing range")])
+def test_range_without_bars_is_fetched_once(history_paths, yahoo_history, ticker, reason):
+    yahoo_history_df = history.get_ticker_data(ticker, history.DEFAULT_START_DATE, datetime(2021, 1, 1))
+    yahoo_history_df.to_csv(history.STOCKS_HISTORY_PATH)
+    yahoo_history.clear()
+
+    result = history.repair_history([ticker])
+    assert reason in [gap.reason for gap in result["gaps"]]
+    assert result["failed_gaps"] == []
+
+    result = history.repair_history([ticker])
+    assert [gap for gap in result["gaps"] if gap.reason == reason] == []
+
+
+def test_stored_bar_after_the_last_date_gives_the_end_gap_again():
+    df = pd.DataFrame({"Ticker": "OLD", "Date": pd.bdate_range(LISTING_DATE, DELISTING_DATE)})
+    dates = {"start_date": LISTING_DATE, "end_date": datetime(2021, 1, 1), "last_dates": {"OLD": DELISTING_DATE}}
+
+    assert history.get_history_gaps(df, ["OLD"], **dates) == []
+    df = pd.concat([df, pd.DataFrame({"Ticker": ["OLD"], "Date": [datetime(2020, 8, 3)]})], ignore_index=True)
+    gaps = history.get_history_gaps(df, ["OLD"], **dates)
+    assert [gap.reason for gap in gaps] == ["missing range", "short end"]
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from tadawol import positions
+from tadawol.strategies.base_strategy import BaseStrategy
+from tadawol.strategies.macd import MACD
+from tadawol.strategies.reverse import Reverse
+from tadawol.synthetic import get_synthetic_history
+
+EXITS_COLUMNS = ["Ticker", "Date", "exit", "exit_price", "exit_reason"]
+
+
+def _get_exits(exits: pd.DataFrame) -> pd.DataFrame:
+    exits = exits[EXITS_COLUMNS].astype({"exit_price": float, "exit_reason": str})
+    exits = exits.sort_values(by=["Ticker", "Date"]).reset_index(drop=True)
+    exits.loc[:, "Date"] = pd.to_datetime(exits["Date"])
+    exits.loc[:, "exit"] = pd.to_datetime(exits["exit"])
+    return exits
+
+
+@pytest.mark.parametrize("strategy_class", [MACD, Reverse])
+def test_live_exits_on_the_bootstrap_day_are_the_simulated_ones(strategy_class, monkeypatch):
+    strategy = strategy_class()
+    df = get_synthetic_history(30, 1)
+    df = df[df["Date"] > datetime(2020, 6, 1)]
+    trades = strategy._get_trades(df)
+    # the day with the most exits
+    today_date = trades["exit"].value_counts().index[0].to_pydatetime()
+    monkeypatch.setattr(BaseStrategy, "_get_today_date", staticmethod(lambda: today_date))
+    df = df[df["Date"] <= today_date]
+
+    today_trades, today_exits = strategy.get_today_trades_and_exits(df)
+    live_today_trades, live_today_exits, open_positions = strategy.get_live_signals(df)
+
+    assert today_exits.shape[0] > 0
+    pd.testing.assert_frame_equal(_get_exits(live_today_exits), _get_exits(today_exits))
+    assert sorted(live_today_trades["Ticker"]) == sorted(today_trades["Ticker"])
+    # positions exited today are not kept in the book
+    exited = set(zip(live_today_exits["Ticker"], pd.to_datetime(live_today_exits["Date"])))
+    assert not exited & set(zip(open_positions["Ticker"], pd.to_datetime(open_positions["Date"])))
+
+
+@pytest.mark.parametrize("strategy_class", [MACD, Reverse])
+def test_live_run_is_idempotent_on_the_same_day(strategy_class, tmp_path, monkeypatch):
+    monkeypatch.setattr(positions, "POSITIONS_DATA_PATH", str(tmp_path))
+    strategy = strategy_class()
+    df = get_synthetic_history(30, 1)
+    df = df[df["Date"] > datetime(2020, 6, 1)]
+    trades = strategy._get_trades(df)
+    today_date = trades["exit"].value_counts().index[0].to_pydatetime()
+    previous_date = df.loc[df["Date"] < today_date, "Date"].max().to_pydatetime()
+
+    # the book is bootstrapped the day before, then today is run twice
+    monkeypatch.setattr(BaseStrategy, "_get_today_date", staticmethod(lambda: previous_date))
+    strategy.get_today_trades_and_exits(df[df["Date"] <= previous_date], live=True)
+    monkeypatch.setattr(BaseStrategy, "_get_today_date", staticmethod(lambda: today_date))
+    df = df[df["Date"] <= today_date]
+    today_trades, today_exits = strategy.get_today_trades_and_exits(df, live=True)
+    book = positions.load_positions(strategy.name, today_date + timedelta(days=1))
+    rerun_today_trades, rerun_today_exits = strategy.get_today_trades_and_exits(df, live=True)
+    rerun_book = positions.load_positions(strategy.name, today_date + timedelta(days=1))
+
+    assert today_exits.shape[0] > 0
+    pd.testing.assert_frame_equal(_get_exits(rerun_today_exits), _get_exits(today_exits))
+    pd.testing.assert_frame_equal(rerun_today_trades, today_trades)
+    pd.testing.assert_frame_equal(rerun_book, book)
+    assert not rerun_book.duplicated(subset=["Ticker", "Date"]).any()
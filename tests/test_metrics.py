@@ -0,0 +1,35 @@
+from prometheus_client import REGISTRY
+
+from tadawol.simulator import simulate_trades
+from tadawol.strategies.macd import MACD
+from tadawol.strategies.reverse import Reverse
+from tadawol.strategies.runner import get_strategies_trades
+from tadawol.synthetic import get_synthetic_history
+
+
+def _get_count(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(f"{name}_count", labels) or 0
+
+
+def test_runner_stages_are_measured_per_strategy():
+    strategies = [MACD(), Reverse()]
+    stages = ["add_entries_for_ticker", "get_exit_prices_for_ticker"]
+    counts = {
+        (strategy.name, stage): _get_count("tadawol_strategy_stage_seconds", strategy=strategy.name, stage=stage)
+        for strategy in strategies for stage in stages
+    }
+
+    get_strategies_trades(strategies, get_synthetic_history(3, 1))
+
+    for (strategy_name, stage), count in counts.items():
+        assert _get_count("tadawol_strategy_stage_seconds", strategy=strategy_name, stage=stage) == count + 3
+
+
+def test_trades_simulation_is_measured_per_strategy():
+    strategy = MACD()
+    trades = strategy._get_trades(get_synthetic_history(3, 1))
+    count = _get_count("tadawol_simulate_trades_seconds", strategy=strategy.name)
+
+    simulate_trades(trades, strategy=strategy.name)
+
+    assert _get_count("tadawol_simulate_trades_seconds", strategy=strategy.name) == count + 1
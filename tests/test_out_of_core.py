@@ -0,0 +1,20 @@
+from tadawol.simulator import simulate_trades, simulate_trades_stream
+from tadawol.strategies.macd import MACD
+
+
+def test_out_of_core_simulation_reproduces_the_in_memory_one(history_df, tmp_path):
+    strategy = MACD()
+    trades = strategy.simulate()
+    spilled_trades = strategy.simulate_out_of_core(str(tmp_path / "spill"), tickers_chunk_size=7)
+
+    assert spilled_trades.read().shape[0] == trades.shape[0]
+    win, fees, realized_trades = simulate_trades(trades)
+    stream_win, stream_fees, stream_realized_trades = simulate_trades_stream(spilled_trades.iter_days())
+    assert (stream_win, stream_fees) == (win, fees)
+    assert list(stream_realized_trades["Ticker"]) == list(realized_trades["Ticker"])
+
+
+def test_simulation_does_not_depend_on_the_trades_order(history_df):
+    trades = MACD().simulate()
+
+    assert simulate_trades(trades)[:2] == simulate_trades(trades.sample(frac=1, random_state=0))[:2]
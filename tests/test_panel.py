@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from tadawol.panel import SHARDS_PER_PROCESS, TickerPanel, map_shards
+from tadawol.synthetic import get_synthetic_history
+
+
+def _get_unsorted_frame() -> pd.DataFrame:
+    df = get_synthetic_history(5, 1)
+    return df.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def _get_rows_number(shard: TickerPanel) -> int:
+    return len(shard)
+
+
+def test_offsets_slice_the_rows_of_each_ticker_sorted_by_date():
+    df = _get_unsorted_frame()
+
+    panel = TickerPanel.from_frame(df)
+
+    assert panel.tickers == sorted(df["Ticker"].unique())
+    assert len(panel) == df.shape[0]
+    start = 0
+    for ticker in panel.tickers:
+        ticker_df = df[df["Ticker"] == ticker].sort_values(by="Date")
+        assert panel.offsets[ticker] == (start, start + ticker_df.shape[0])
+        np.testing.assert_array_equal(panel.get_column(ticker, "Date"), ticker_df["Date"].to_numpy())
+        pd.testing.assert_frame_equal(panel.get_frame(ticker), ticker_df.reset_index(drop=True))
+        start += ticker_df.shape[0]
+
+
+def test_rows_of_a_ticker_on_the_same_date_keep_their_order():
+    df = pd.DataFrame({
+        "Ticker": ["B", "A", "B", "A"],
+        "Date": [datetime(2020, 1, 2), datetime(2020, 1, 1), datetime(2020, 1, 2), datetime(2020, 1, 1)],
+        "Close": [1.0, 2.0, 3.0, 4.0],
+    })
+
+    panel = TickerPanel.from_frame(df)
+
+    assert list(panel.get_column("A", "Close")) == [2.0, 4.0]
+    assert list(panel.get_column("B", "Close")) == [1.0, 3.0]
+
+
+def test_unknown_ticker_gives_an_empty_frame():
+    panel = TickerPanel.from_frame(_get_unsorted_frame())
+
+    assert "UNKNOWN" not in panel
+    frame = panel.get_frame("UNKNOWN")
+    assert frame.empty
+    assert list(frame.columns) == list(panel.columns.keys())
+
+
+def test_select_and_split_keep_the_rows_of_the_tickers():
+    panel = TickerPanel.from_frame(_get_unsorted_frame())
+    tickers = panel.tickers
+
+    selected = panel.select([tickers[3], tickers[1], "UNKNOWN"])
+    assert selected.tickers == [tickers[1], tickers[3]]
+    for ticker in selected.tickers:
+        pd.testing.assert_frame_equal(selected.get_frame(ticker), panel.get_frame(ticker))
+
+    shards = panel.split(2)
+    assert [ticker for shard in shards for ticker in shard.tickers] == tickers
+    for shard in shards:
+        for ticker in shard.tickers:
+            pd.testing.assert_frame_equal(shard.get_frame(ticker), panel.get_frame(ticker))
+    shards_df = pd.concat([shard.to_frame() for shard in shards], ignore_index=True)
+    pd.testing.assert_frame_equal(shards_df, panel.to_frame())
+
+
+def test_map_shards_returns_the_results_in_the_shards_order():
+    panel = TickerPanel.from_frame(_get_unsorted_frame())
+
+    results = map_shards(_get_rows_number, panel, 2)
+
+    assert results == [len(shard) for shard in panel.split(2 * SHARDS_PER_PROCESS)]
+    assert sum(results) == len(panel)
@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from tadawol.strategies.macd import MACD
+from tadawol.strategies.reverse import Reverse
+from tadawol.strategies.runner import get_strategies_trades
+from tadawol.synthetic import get_synthetic_history
+
+
+@pytest.fixture(scope="module")
+def df():
+    return get_synthetic_history(12, 1)
+
+
+@pytest.mark.parametrize("lean", [False, True])
+def test_trades_of_a_pool_are_the_serial_ones(df, lean):
+    strategy = Reverse()
+
+    serial_trades = strategy._get_trades(df, lean=lean)
+    pool_trades = strategy._get_trades(df, lean=lean, processes=2)
+
+    assert serial_trades.shape[0] > 0
+    pd.testing.assert_frame_equal(pool_trades, serial_trades)
+
+
+def test_strategies_trades_of_a_pool_are_the_serial_ones(df):
+    strategies = [MACD(), Reverse()]
+
+    serial_trades = get_strategies_trades(strategies, df, lean=True)
+    pool_trades = get_strategies_trades(strategies, df, lean=True, processes=3)
+
+    for strategy_pool_trades, strategy_serial_trades in zip(pool_trades, serial_trades):
+        pd.testing.assert_frame_equal(strategy_pool_trades, strategy_serial_trades)
@@ -0,0 +1,56 @@
+import os
+import time
+
+import pytest
+
+from tadawol import progress
+from tadawol.progress import ProgressReporter
+
+
+@pytest.fixture(autouse=True)
+def progress_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(progress, "PROGRESS_DATA_PATH", str(tmp_path))
+
+
+def _get_events_names(job_id: str, offset: int = 0):
+    events, offset = progress.read_events(job_id, offset)
+    return [event["event"] for event in events], offset
+
+
+def test_restarted_job_replaces_the_events_of_the_previous_attempt():
+    reporter = ProgressReporter("grid_run", total=2, unit="combinations")
+    reporter.advance()
+    reporter.finish()
+    _, offset = _get_events_names("grid_run")
+
+    reporter = ProgressReporter("grid_run", total=1, unit="combinations")
+    reporter.advance()
+
+    assert _get_events_names("grid_run") == (["start", "progress"], os.path.getsize(progress._get_path("grid_run")))
+    # a reader of the previous attempt starts again from the new start
+    assert _get_events_names("grid_run", offset)[0] == ["start", "progress"]
+
+
+def test_last_event_ignores_a_line_being_written():
+    reporter = ProgressReporter("job", total=2, unit="tickers")
+    reporter.advance(ticker="A" * 10000)
+    with open(progress._get_path("job"), "a") as f:
+        f.write('{"event": "progr')
+
+    last_event = progress.get_last_event("job")
+
+    assert last_event["event"] == "progress"
+    assert last_event["ticker"] == "A" * 10000
+
+
+def test_only_old_finished_jobs_expire():
+    ProgressReporter("running", total=1, unit="tickers")
+    ProgressReporter("finished", total=1, unit="tickers").finish()
+    ProgressReporter("recently_finished", total=1, unit="tickers").finish()
+    old_time = time.time() - 3600
+    for job_id in ["running", "finished"]:
+        os.utime(progress._get_path(job_id), (old_time, old_time))
+
+    progress.delete_expired_jobs(retention_seconds=60)
+
+    assert progress.get_jobs() == ["recently_finished", "running"]
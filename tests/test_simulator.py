@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from tadawol.simulator import get_settings_grid, simulate_trades, simulate_trades_batch
+from tadawol.strategies.macd import MACD
+from tadawol.synthetic import get_synthetic_history
+
+
+def _assert_batch_is_simulate_trades(trades: pd.DataFrame, settings: pd.DataFrame):
+    results = simulate_trades_batch(trades, settings)
+
+    for _, result in results.iterrows():
+        win, fees, realized_trades = simulate_trades(
+            trades,
+            total_amount=result["total_amount"],
+            transaction_min=result["transaction_min"],
+            transaction_max=result["transaction_max"],
+            max_trades_by_day=int(result["max_trades_by_day"])
+        )
+        assert result["final_equity"] == pytest.approx(win)
+        assert result["fees"] == fees
+        assert result["trades_number"] == realized_trades.shape[0]
+
+
+def _get_trade(ticker: str, date: datetime, win_percent: float, exit_days: int):
+    return {
+        "Date": date,
+        "Ticker": ticker,
+        "Close": 10.0,
+        "exit_price": 10.0 * (1 + win_percent / 100),
+        "win_percent": win_percent,
+        "exit_date": exit_days,
+        "exit": date + timedelta(days=exit_days),
+    }
+
+
+def test_batch_simulation_is_simulate_trades_for_each_setting():
+    trades = MACD()._get_trades(get_synthetic_history(10, 1))
+    trades = trades[trades["exit_price"].notna()]
+    settings = get_settings_grid(
+        total_amount=[5000, 30000], transaction_min=[1000, 1800], transaction_max=[2500, 6000], max_trades_by_day=[1, 3]
+    )
+
+    _assert_batch_is_simulate_trades(trades, settings)
+
+
+def test_batch_simulation_takes_the_trades_of_a_day_in_order():
+    # more trades on the same day than max_trades_by_day, given out of order: the first ones by ticker are taken
+    day = datetime(2020, 6, 1)
+    trades = pd.DataFrame([
+        _get_trade(ticker, day, win_percent, 3)
+        for ticker, win_percent in [("DDD", 20), ("AAA", -10), ("CCC", 5), ("BBB", 30)]
+    ])
+    settings = get_settings_grid(max_trades_by_day=[1, 2, 3, 4])
+
+    _assert_batch_is_simulate_trades(trades, settings)
+    results = simulate_trades_batch(trades, settings)
+    assert list(results["trades_number"]) == [1, 2, 3, 4]
+    assert results["final_equity"].iloc[0] == pytest.approx(30000 - 2500 * 0.1)
+
+
+def test_batch_simulation_limits_the_open_positions_of_a_ticker():
+    # a third position on a ticker is not opened while two of them are open, the first one exits on the last day
+    day = datetime(2020, 6, 1)
+    trades = pd.DataFrame(
+        [_get_trade("AAA", day + timedelta(days=i), 10, 5) for i in range(4)]
+        + [_get_trade("AAA", day + timedelta(days=6), 10, 5)]
+    )
+    settings = get_settings_grid(total_amount=[3000, 30000], max_trades_by_day=[1, 3])
+
+    _assert_batch_is_simulate_trades(trades, settings)
+    results = simulate_trades_batch(trades, settings)
+    assert list(results["trades_number"]) == [2, 2, 3, 3]
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+import requests
+
+import tasks
+from tadawol import history, progress, signals
+from tadawol.strategies.base_strategy import BaseStrategy
+from tadawol.strategies.runner import get_strategies_trades
+from tadawol.synthetic import get_synthetic_history, get_synthetic_tickers
+
+
+@pytest.fixture(autouse=True)
+def progress_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(progress, "PROGRESS_DATA_PATH", str(tmp_path))
+
+
+def _compute_chunk_signals(df: pd.DataFrame):
+    return tasks.compute_chunk_signals(tasks._df_to_payload(df))
+
+
+def test_chunk_without_tradable_ticker_gives_empty_signals():
+    df = get_synthetic_history(1, 1)
+    df["Close"] = 1
+
+    chunk_signals = _compute_chunk_signals(df)
+
+    assert [s["strategy"] for s in chunk_signals] == list(tasks.STRATEGIES)
+    for strategy_signals in chunk_signals:
+        assert tasks._payload_to_df(strategy_signals["entries"], date_columns=["Date"]).empty
+        assert tasks._payload_to_df(strategy_signals["exits"], date_columns=["Date", "exit"]).empty
+
+
+def test_chunk_without_trade_gives_empty_signals():
+    df = get_synthetic_history(1, 1)
+    df = df.tail(90).copy()
+    df["Close"] = 10
+    df["Volume"] = 10 ** 6
+
+    chunk_signals = _compute_chunk_signals(df)
+
+    for strategy_signals in chunk_signals:
+        assert tasks._payload_to_df(strategy_signals["entries"], date_columns=["Date"]).empty
+        assert tasks._payload_to_df(strategy_signals["exits"], date_columns=["Date", "exit"]).empty
+
+
+def test_chunk_signals_are_aggregated_with_empty_chunks():
+    df = get_synthetic_history(3, 1)
+    df.loc[df["Ticker"] == "SYN00000", "Close"] = 1
+    chunks_signals = [_compute_chunk_signals(df[df["Ticker"] == ticker]) for ticker in df["Ticker"].unique()]
+
+    tasks.aggregate_signals(chunks_signals)
+
+
+def test_deterministic_errors_are_not_retried():
+    assert ValueError not in tasks.compute_chunk_signals.autoretry_for
+    assert TypeError not in tasks.compute_chunk_signals.autoretry_for
+
+
+@pytest.fixture
+def today_history(tmp_path, monkeypatch, data_paths):
+    """
+    Synthetic history ending today, with an entry of one of the strategies today. The history file has the bars
+    until yesterday, the bars of today are only given by the fetches.
+    """
+    today_date = BaseStrategy._get_today_date()
+    df = get_synthetic_history(30, 1)
+    df = df[df["Ticker"].isin(get_synthetic_tickers(10))]
+    strategies = [tasks._get_strategy(strategy_name) for strategy_name in tasks.STRATEGIES]
+    for entry_date in sorted(df["Date"].unique(), reverse=True):
+        shifted_df = df.assign(Date=df["Date"] + (today_date - pd.Timestamp(entry_date)))
+        recent_df = shifted_df[
+            (shifted_df["Date"] > datetime.now() - timedelta(days=90)) & (shifted_df["Date"] <= today_date)
+        ]
+        if any(
+                trades is not None and (trades["Date"] == today_date).any()
+                for trades in get_strategies_trades(strategies, recent_df)
+        ):
+            break
+    shifted_df = shifted_df[shifted_df["Date"] <= today_date]
+
+    path = tmp_path / "history.csv"
+    stored_df = shifted_df[shifted_df["Date"] < today_date].reset_index(drop=True)
+    stored_df.to_csv(path, date_format="%Y-%m-%d")
+    monkeypatch.setattr(history, "STOCKS_HISTORY_PATH", str(path))
+    monkeypatch.setattr(history, "_history_cache", {})
+    monkeypatch.setattr(signals, "SIGNALS_DATA_PATH", str(tmp_path / "signals"))
+    monkeypatch.setattr(tasks, "update_earnings", lambda: None)
+
+    def get_ticker_data(ticker, start_date, end_date=None):
+        end_date = end_date or history.get_history_end_date()
+        ticker_df = shifted_df[
+            (shifted_df["Ticker"] == ticker) & (shifted_df["Date"] >= start_date) & (shifted_df["Date"] < end_date)
+        ]
+        return ticker_df.assign(Date=ticker_df["Date"].dt.strftime("%Y-%m-%d"))
+
+    monkeypatch.setattr(history, "get_ticker_data", get_ticker_data)
+    return today_date
+
+
+def test_precomputed_signals_have_today_entries(today_history):
+    tasks.precompute_signals(min_top_ticker=100, max_top_ticker=110)
+
+    assert history.get_historical_data()["Date"].max() == today_history
+    entries = [signals.get_signals(strategy_name)[0] for strategy_name in tasks.STRATEGIES]
+    assert any((strategy_entries["Date"] == today_history).any() for strategy_entries in entries)
+    for strategy_name, strategy in zip(tasks.STRATEGIES, tasks.STRATEGIES.values()):
+        indicators = signals.get_indicators(strategy_name)
+        assert list(indicators.columns) == ["Ticker", "Date"] + [i.column_name for i in strategy().get_indicators()]
+        assert indicators["Date"].max() == today_history
+
+
+def test_post_close_schedule_sends_the_precomputed_signals(monkeypatch):
+    monkeypatch.setattr(tasks.app.conf, "task_always_eager", True)
+    executed_tasks = []
+    for task in [tasks.precompute_signals, tasks.send_precomputed_signals]:
+        monkeypatch.setattr(task, "run", lambda *args, name=task.name, **kwargs: executed_tasks.append(name))
+
+    tasks.run_post_close_pipeline()
+
+    assert tasks.app.conf.beat_schedule["post-close-precomputation"]["task"] == tasks.run_post_close_pipeline.name
+    assert executed_tasks == [tasks.precompute_signals.name, tasks.send_precomputed_signals.name]
+
+
+def test_chunk_whose_fetches_all_fail_is_retried_then_gives_empty_signals(monkeypatch):
+    monkeypatch.setattr(tasks.app.conf, "task_always_eager", True)
+    fetched_tickers = []
+
+    def get_ticker_data(ticker, start_date, end_date=None):
+        fetched_tickers.append(ticker)
+        raise requests.ConnectionError("yahoo is unreachable")
+
+    monkeypatch.setattr(history, "get_ticker_data", get_ticker_data)
+
+    chunk_signals = (tasks.fetch_tickers_chunk.s(["AAA", "BBB"]) | tasks.compute_chunk_signals.s()).apply().get()
+
+    assert fetched_tickers == ["AAA", "BBB"] * (tasks.fetch_tickers_chunk.max_retries + 1)
+    assert [s["strategy"] for s in chunk_signals] == list(tasks.STRATEGIES)
+    for strategy_signals in chunk_signals:
+        assert tasks._payload_to_df(strategy_signals["entries"], date_columns=["Date"]).empty
+        assert tasks._payload_to_df(strategy_signals["exits"], date_columns=["Date", "exit"]).empty
+    tasks.aggregate_signals([chunk_signals])
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from tadawol import history, universe
+from tadawol.synthetic import get_synthetic_tickers
+
+
+def _write_tickers_list(tickers, market_capitalizations):
+    pd.DataFrame({"Ticker": tickers, "Market Capitalization": market_capitalizations}).to_csv(
+        universe.TICKERS_LIST_PATH, index=False
+    )
+    universe._catalog_cache.clear()
+
+
+def test_tickers_are_ranked_by_market_capitalization(data_paths):
+    _write_tickers_list(["SMALL", "LARGE", "MEDIUM", "LARGE"], [10, 1000, 100, 1])
+    catalog = universe.get_catalog()
+
+    assert catalog.ranked_tickers == ["LARGE", "MEDIUM", "SMALL"]
+    assert catalog.get_rank("MEDIUM") == 1
+    assert catalog.get_rank("UNKNOWN") is None
+    assert catalog.get_top_tickers(1, 2) == ["MEDIUM", "SMALL"]
+    assert catalog.tickers == {"SMALL", "LARGE", "MEDIUM"}
+
+
+def test_snapshot_keeps_the_ranks_of_the_tickers_list(data_paths):
+    snapshot = universe.save_snapshot()
+    assert history.get_top_tickers(100, 129, snapshot) == get_synthetic_tickers(30)
+
+    tickers = get_synthetic_tickers(30)
+    _write_tickers_list(tickers, range(len(tickers)))
+
+    assert history.get_top_tickers(0, 29) == tickers[::-1]
+    assert history.get_top_tickers(100, 129, snapshot) == get_synthetic_tickers(30)
+    assert universe.save_snapshot() != snapshot
+    assert universe.get_snapshots() == sorted([snapshot, universe.save_snapshot()])
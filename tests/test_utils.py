@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from tadawol.config import UniverseFilterConfig
+from tadawol.panel import TickerPanel
+from tadawol.strategies.macd import MACD
+from tadawol.strategies.reverse import Reverse
+from tadawol.synthetic import get_synthetic_history
+from tadawol.utils import clean_results, filter_universe, get_last_week_entries, is_tradable, mask_untradable_entries
+
+UNIVERSE_FILTER = UniverseFilterConfig()
+
+
+def _get_history_with_untradable_rows() -> pd.DataFrame:
+    """
+    Synthetic history with never tradable tickers and a ticker that is only tradable on its second half.
+    """
+    df = get_synthetic_history(12, 1)
+    df.loc[df["Ticker"] == "SYN00000", "Close"] = UNIVERSE_FILTER.min_close / 2
+    df.loc[df["Ticker"] == "SYN00001", "Volume"] = UNIVERSE_FILTER.min_volume / 2
+    partly_tradable = df["Ticker"] == "SYN00002"
+    first_half = partly_tradable & (df["Date"] < df.loc[partly_tradable, "Date"].median())
+    df.loc[first_half, "Volume"] = UNIVERSE_FILTER.min_volume / 2
+    return df
+
+
+def _get_unfiltered_trades(strategy, df: pd.DataFrame) -> pd.DataFrame:
+    # the trades before the universe filtering: exits of all the entries, the untradable ones dropped at the end
+    data = [
+        strategy.get_lean_exit_prices_for_ticker(strategy.add_entries_for_ticker(ticker_data))
+        for _, ticker_data in TickerPanel.from_frame(df).iter_frames()
+    ]
+    trades = pd.concat(data, axis=0)
+    trades = trades[trades["entry"]]
+    trades.loc[:, "win_percent"] = 100 * (trades["exit_price"] - trades["Close"]) / trades["Close"]
+    return get_last_week_entries(clean_results(trades, UNIVERSE_FILTER))
+
+
+def test_filter_universe_drops_only_the_never_tradable_tickers():
+    df = _get_history_with_untradable_rows()
+
+    filtered_df = filter_universe(df, UNIVERSE_FILTER)
+
+    tradable_rows_numbers = is_tradable(df, UNIVERSE_FILTER).groupby(df["Ticker"]).sum()
+    assert {"SYN00000", "SYN00001"} <= set(tradable_rows_numbers[tradable_rows_numbers == 0].index)
+    kept_tickers = tradable_rows_numbers[tradable_rows_numbers > 0].index
+    assert "SYN00002" in kept_tickers
+    pd.testing.assert_frame_equal(filtered_df, df[df["Ticker"].isin(kept_tickers)])
+
+
+def test_mask_untradable_entries_keeps_the_rows():
+    df = pd.DataFrame({
+        "Close": [1.0, 10.0, 10.0, 10.0],
+        "Volume": [10 ** 6, 10 ** 3, 10 ** 6, 10 ** 6],
+        "entry": [True, True, True, False],
+    })
+
+    df = mask_untradable_entries(df, UNIVERSE_FILTER)
+
+    assert list(df["entry"]) == [False, False, True, False]
+
+
+@pytest.mark.parametrize("strategy_class", [MACD, Reverse])
+def test_filtered_trades_are_the_unfiltered_trades(strategy_class):
+    strategy = strategy_class()
+    df = _get_history_with_untradable_rows()
+
+    trades = strategy._get_trades(df, lean=True)
+    unfiltered_trades = _get_unfiltered_trades(strategy, df)
+
+    assert trades.shape[0] > 0
+    pd.testing.assert_frame_equal(
+        trades.reset_index(drop=True), unfiltered_trades[trades.columns].reset_index(drop=True)
+    )